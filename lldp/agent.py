@@ -1,7 +1,41 @@
 import socket, select
+import struct
 import time
+from .frame import is_lldp_frame
 from .lldpdu import LLDPDU
+from .metrics import AgentMetrics
+from .neighbors import NeighborTable
+from . import handoff as handoffs
+from . import snapshot as snapshots
+from .scheduler import Scheduler, Timer
 from .tlv import *
+from .tlv.intern import STRINGS
+from .transmit import TransmitState
+
+
+# Linux socket options for kernel receive timestamps (not exported by the socket module)
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35)
+SCM_TIMESTAMPNS = SO_TIMESTAMPNS
+_timespec = struct.Struct("@ll")
+
+# Expiry checks are at least this many seconds apart, so neighbors with close deadlines are expired in one pass
+EXPIRY_RESOLUTION = 1.0
+
+# Seconds between sweeps of the string interner, releasing the strings of neighbors that were removed or changed
+STRINGS_SWEEP_INTERVAL = 60.0
+
+
+def kernel_timestamp(ancdata) -> int:
+    """Extract the SCM_TIMESTAMPNS receive timestamp from `recvmsg()` ancillary data
+
+    Returns the arrival time in nanoseconds since the epoch (comparable to `time.time_ns()`) or None if the ancillary
+    data carries no timestamp.
+    """
+    for level, kind, value in ancdata:
+        if level == socket.SOL_SOCKET and kind == SCM_TIMESTAMPNS and len(value) >= _timespec.size:
+            seconds, nanoseconds = _timespec.unpack_from(value)
+            return seconds * 1000000000 + nanoseconds
+    return None
 
 
 class StdoutLogger:
@@ -17,12 +51,15 @@ class LLDPAgent:
 
     The LLDP agent is the top-level component. It provides two functions.
 
-    It announces its presence on the network by sending LLDP frames in regular intervals.
+    It announces its presence on the network by sending LLDP frames in regular intervals (see `lldp.transmit`).
     At the same time it listens for LLDP frames from other network devices.
 
     If a frame is received and it is valid its contents will be logged for the administrator.
     """
-    def __init__(self, mac_address: bytes, interface_name: str = "", interval=1.0, sock=None, logger=None):
+    def __init__(self, mac_address: bytes, interface_name: str = "", interval=1.0, sock=None, logger=None,
+                 metrics=None, timer=None, timestamps=False, monitor=None, tap=None, snapshot=None,
+                 snapshot_interval=30.0, handoff=None, jitter=0.0, ttl=60, fast_interval=1.0, fast_count=4,
+                 tx_credit_max=5, sysinfo=None, scheduler=None, indexed=True):
         """LLDP Agent Constructor
 
         Sets up the network socket and LLDP agent state.
@@ -30,10 +67,34 @@ class LLDPAgent:
         Parameters:
             mac_address (bytes): The local MAC address
             interface_name (str): Name of the local interface
-            interval (float): Announce interval in seconds
+            interval (float): Announce interval in seconds (msgTxInterval)
+            jitter (float): Maximum random delay added to every announce, in seconds
+            ttl (int): TTL announced by the agent
+            fast_interval (float): Announce interval during fast start (msgFastTx)
+            fast_count (int): Number of announces sent at the fast interval when the agent starts or sees a new
+                neighbor (txFastInit)
+            tx_credit_max (int): Maximum number of announces sent in a burst (txCreditMax)
+            sysinfo (SystemInfo): Source of the optional TLVs describing the local system. Checked for changes every
+                `sysinfo.interval` seconds
+            scheduler (Scheduler): Scheduler of the agent's timers, shared by the agents of an `InterfaceManager`. A
+                private instance is created if omitted
+            indexed (bool): Keep secondary indexes of the neighbor table, so neighbors can be looked up by their
+                attributes with `lldp.query.query()`
             sock: A previously opened socket. Used for testing
             logger: A logger instance. Used for testing
-            
+            metrics (AgentMetrics): Metrics to update. A private instance is created if omitted
+            timer (StageTimer): Per-stage timing instrumentation. Disabled if omitted
+            timestamps (bool): Enable kernel receive timestamps (SO_TIMESTAMPNS) and record the latency from frame
+                arrival to decoded LLDPDU and to neighbor update
+            monitor (PacketSocketMonitor): Periodically reads kernel drop statistics and tunes the receive buffer
+            tap (CaptureTap): Receives a copy of every LLDP frame received from neighbors and sent by the agent. It is
+                closed when the agent stops
+            snapshot (str): Path of a neighbor snapshot file. Unexpired neighbors are restored from it when the agent
+                starts, and the neighbor table is written to it every `snapshot_interval` seconds and when the agent
+                stops
+            snapshot_interval (float): Seconds between snapshots
+            handoff (HandoffServer): Listener for a new agent process taking over the socket and the agent state (hot
+                restart). It is closed when the agent stops
         """
         if sock is None:
             # Open a socket suitable for transmitting LLDP frames.
@@ -45,7 +106,37 @@ class LLDPAgent:
         self.interface_name = interface_name
         self.mac_address = mac_address
         self.announce_interval = interval  # in seconds
+        self.jitter = jitter
+        self.ttl = ttl
+        self.tlvs = []
+        self.sysinfo = sysinfo
+        self.tx = TransmitState(interval, fast_interval, fast_count, tx_credit_max)
+        self.scheduler = Scheduler() if scheduler is None else scheduler
         self.logger = StdoutLogger() if logger is None else logger
+        self.metrics = AgentMetrics() if metrics is None else metrics
+        self.indexed = indexed
+        self.neighbors = NeighborTable(indexed=indexed)
+        self.timer = timer
+        self.running = False
+
+        self.monitor = monitor
+        self.tap = tap
+        self.snapshot = snapshot
+        self.snapshot_interval = snapshot_interval
+        self.handoff = handoff
+        self.handed_off = False
+        self.last_announce = None  # time.monotonic() value
+        self._expiry = Timer(0.0, self.expire, ())
+        self._transmit_timer = Timer(0.0, self._transmit, ())
+        self._announce_frame = None
+        self._announce_key = None
+        self._probe_announce = None
+        self._tasks = []
+        self._neighbor_count = 0
+        self._wakeup = None
+        self.timestamps = timestamps
+        if timestamps:
+            self.socket.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
 
     def run(self, run_once: bool=False):
         """Agent Loop
@@ -59,60 +150,431 @@ class LLDPAgent:
         Valid LLDP frames have an ethertype of 0x88CC, are directed to one of the LLDP multicast addresses
         (01:80:c2:00:00:00, 01:80:c2:00:00:03 and 01:80:c2:00:00:0e) and have not been sent by the local agent.
 
-        After processing received frames, the agent announces itself by calling `LLDPAgent.announce()` if a sufficient
-        amount of time has passed.
+        Announces (`LLDPAgent.announce()`, see `lldp.transmit` for their timing), neighbor expiry
+        (`LLDPAgent.expire()`) and periodic tasks are timers of `LLDPAgent.scheduler`. The loop waits for frames until
+        the next timer is due and runs the due timers between frames.
 
         Parameters:
             run_once (bool): Stop the main loop after the first pass
         """
         received = False
-        t_previous = time.time()
+        self.running = True
+        scheduler = self.scheduler
+        handoff = self.handoff
+        readable = [self.socket] if handoff is None else [self.socket, handoff]
+        # stop() writes to this socket pair to interrupt select()
+        wakeup, self._wakeup = socket.socketpair()
+        wakeup.setblocking(False)
+        self._wakeup.setblocking(False)
+        readable.append(wakeup)
+
+        timer = self.timer
+        if timer is not None:
+            clock = timer.clock
+            probe_select = timer.probe("select")
+
+        self.start()
+        receive = self.receiver()
         try:
-            while not run_once or not received:
-                r, _, _ = select.select([self.socket], [], [], self.announce_interval)
+            while self.running and (not run_once or not received):
+                # Run the timers that are due, then wait for frames until the next deadline
+                scheduler.run_due()
+                if timer is not None:
+                    t0 = clock()
+                r, _, _ = select.select(readable, [], [], scheduler.timeout())
+                if timer is not None:
+                    probe_select(t0)
+                if wakeup in r:
+                    wakeup.recv(64)
+                    r.remove(wakeup)
+                if handoff is not None and handoff in r:
+                    # A new agent process takes over, everything read so far has been processed
+                    if self.hand_off():
+                        break
+                    r.remove(handoff)
                 if len(r) > 0:
                     # Frames have been received by the network card
+                    if receive(r[0]):
+                        received = True
+                # Publish a new view of the neighbor table if a reader asked for one
+                self.neighbors.publish_pending()
 
-                    # Get the next frame
-                    data = r[0].recv(4096)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Clean up
+            self.running = False
+            # after a handoff the new process owns the neighbors and the snapshot
+            self.close(shutdown=not self.handed_off)
+            self._wakeup.close()
+            self._wakeup = None
+            wakeup.close()
+            if self.tap is not None:
+                self.tap.close()
+            if handoff is not None:
+                handoff.close()
+
+    def start(self, sweep_strings: bool = True):
+        """Restore the snapshot and schedule the announces, the neighbor expiry and the periodic tasks
+
+        Called by `LLDPAgent.run()`. Agents sharing the scheduler of an `InterfaceManager` are started by the manager
+        instead of running their own loop.
 
-                    # Check format and extract LLDPDU (raw bytes)
-                    is_lldp = True
+        Parameters:
+            sweep_strings (bool): Sweep the string interner every `STRINGS_SWEEP_INTERVAL` seconds. The interner is
+                shared by all agents of a process, so a manager sweeps it once instead of once per agent
+        """
+        scheduler = self.scheduler
+        # readers of the neighbor table wake up the loop to get a current view
+        self.neighbors.on_request = self._wake
+        if self.snapshot is not None:
+            self.restore_snapshot()
+        if self.timer is not None:
+            self._probe_announce = self.timer.probe("announce")
+
+        if self.last_announce is None:
+            # link up: announce right away, followed by a fast start
+            self.tx.start_fast()
+            scheduler.reschedule(self._transmit_timer, scheduler.clock())
+        else:
+            # continue the announce schedule of the previous agent process
+            scheduler.reschedule(self._transmit_timer, self.last_announce + self.announce_interval)
+
+        # Periodic tasks
+        tasks = self._tasks
+        if self.sysinfo is not None:
+            self.sysinfo.refresh()
+            self.tlvs = self.sysinfo.tlvs()
+            tasks.append(scheduler.call_every(self.sysinfo.interval, self.refresh_sysinfo))
+        if self.snapshot is not None:
+            tasks.append(scheduler.call_every(self.snapshot_interval, self.save_snapshot))
+        if self.monitor is not None:
+            tasks.append(scheduler.call_every(self.monitor.interval, self.monitor.poll, self.socket, self.metrics))
+        if sweep_strings:
+            tasks.append(scheduler.call_every(STRINGS_SWEEP_INTERVAL, self.sweep_strings))
+        # expire restored neighbors and schedule the first expiry check
+        self.expire()
+
+    def close(self, shutdown: bool = True):
+        """Cancel the timers of the agent and close its socket
 
-                    # check destination address
-                    if data[0] != 1 or data[1] != 128 or data[2] != 194 or data[3] != 0 or data[4] != 0:
-                        is_lldp = False
-                    if not (data[5] == 14 or data[5] == 3 or data[5] == 0):
-                        is_lldp = False
-                    if data[12] != 136 or data[13] != 204:
-                        is_lldp = False
+        Parameters:
+            shutdown (bool): Send the shutdown LLDPDU and write the snapshot. Disabled after a handoff
+        """
+        scheduler = self.scheduler
+        if shutdown:
+            self.shutdown()
+        for task in self._tasks:
+            scheduler.cancel(task)
+        self._tasks = []
+        scheduler.cancel(self._expiry)
+        scheduler.cancel(self._transmit_timer)
+        self.socket.close()
+        if self.snapshot is not None and shutdown:
+            self.save_snapshot()
+
+    def receiver(self):
+        """Build the frame handler of the agent loop
+
+        Returns a function `receive(sock)` that reads one frame from `sock` and processes it. It returns True if the
+        frame was a valid LLDP frame. Metrics, probes and settings are bound once here, the handler runs per frame.
+        """
+        # Bind metrics once, the handler runs per frame
+        metrics = self.metrics
+        count_received = metrics.frames_received.inc
+        count_dropped = metrics.frames_dropped.inc
+        count_decode_error = metrics.decode_errors.inc
+        observe_decode = metrics.decode_latency.observe
+        count_neighbors = self.count_neighbors
+        perf_counter = time.perf_counter
+        mac_address = self.mac_address
+        interface_name = self.interface_name
+        tap = self.tap
+        time_ns = time.time_ns
+        expiry = self._expiry
+        log = self.logger.log
+
+        # Kernel timestamps are delivered as ancillary data, which requires recvmsg()
+        timestamps = self.timestamps
+        if timestamps:
+            ancbufsize = socket.CMSG_SPACE(_timespec.size)
+            observe_arrival_decoded = metrics.arrival_to_decoded.observe
+            observe_arrival_neighbor = metrics.arrival_to_neighbor.observe
+
+        # Stage probes are only set up if instrumentation is enabled
+        timer = self.timer
+        if timer is not None:
+            clock = timer.clock
+            probe_recv = timer.probe("recv")
+            probe_classify = timer.probe("classify")
+            probe_decode = timer.probe("decode")
+            probe_update = timer.probe("neighbor_update")
+            probe_log = timer.probe("log")
+
+        def receive(sock) -> bool:
+            # Get the next frame
+            if timer is not None:
+                t0 = clock()
+            if timestamps:
+                data, ancdata, _, _ = sock.recvmsg(4096, ancbufsize)
+                t_arrival = kernel_timestamp(ancdata)
+            else:
+                data = sock.recv(4096)
+            if timer is not None:
+                probe_recv(t0)
+                t0 = clock()
+            count_received()
+
+            # Check format and extract LLDPDU (raw bytes)
+            is_lldp = is_lldp_frame(data, mac_address)
+            if timer is not None:
+                probe_classify(t0)
+
+            if not is_lldp:
+                count_dropped()
+                return False
+
+            if tap is not None:
+                tap.received(t_arrival if timestamps and t_arrival is not None else time_ns(), data)
+
+            # Instantiate LLDPDU object from raw bytes
+            t_decode = perf_counter()
+            if timer is not None:
+                t0 = clock()
+            neighbors = self.neighbors
+            try:
+                lldpdu = LLDPDU.from_bytes(data[14:], timer)
+                if timer is not None:
+                    probe_decode(t0)
+                    t0 = clock()
+                if timestamps and t_arrival is not None:
+                    observe_arrival_decoded((time_ns() - t_arrival) / 1e9)
+                known = len(neighbors)
+                neighbor = neighbors.update(lldpdu, interface_name)
+            except (ValueError, IndexError):
+                count_decode_error()
+                return False
+            if timestamps and t_arrival is not None:
+                observe_arrival_neighbor((time_ns() - t_arrival) / 1e9)
+            if timer is not None:
+                probe_update(t0)
+            observe_decode(perf_counter() - t_decode)
+            count = len(neighbors)
+            if count != known:
+                count_neighbors(count)
+            if neighbor is not None and (not expiry.pending or neighbor.deadline < expiry.deadline):
+                self._schedule_expiry(neighbor.deadline)
+            if count > known:
+                self.fast_start()
+
+            # Log contents
+            if timer is not None:
+                t0 = clock()
+            log(str(lldpdu))
+            if timer is not None:
+                probe_log(t0)
+            return True
+
+        return receive
+
+    def stop(self):
+        """Stop the main loop
+
+        May be called from another thread or a signal handler. The loop exits right away.
+        """
+        self.running = False
+        self._wake()
+
+    def _wake(self, table=None):
+        """Interrupt the wait of the main loop, e.g. to publish a view of the neighbor table requested by a reader"""
+        wakeup = self._wakeup
+        if wakeup is not None:
+            try:
+                wakeup.send(b"\x00")
+            except OSError:
+                pass
+
+    def expire(self) -> list:
+        """Remove the neighbors whose TTL has run out and schedule the next expiry check
+
+        Returns the removed neighbors.
+        """
+        expired = self.neighbors.expire(self.scheduler.clock())
+        if expired:
+            # release the strings of the expired neighbors
+            STRINGS.sweep()
+        self.count_neighbors()
+        self.count_strings()
+
+        deadline = self.neighbors.next_deadline()
+        if deadline is not None:
+            self._schedule_expiry(deadline)
+        return expired
+
+    def sweep_strings(self) -> int:
+        """Release the TLV strings no neighbor refers to anymore. Returns the number of released strings
+
+        Expiries sweep right away, this periodic sweep catches the strings of neighbors that shut down, were dropped
+        with their interface or changed their TLVs. Without it the interner fills up and stops interning.
+        """
+        removed = STRINGS.sweep()
+        self.count_strings()
+        return removed
+
+    def count_strings(self):
+        """Update the string interner gauges"""
+        metrics = self.metrics
+        metrics.intern_entries.set(len(STRINGS))
+        metrics.intern_hit_ratio.set(STRINGS.hit_rate)
+        metrics.intern_saved_bytes.set(STRINGS.saved_bytes)
+
+    def count_neighbors(self, count: int = None):
+        """Update the neighbors gauge with the number of neighbors, `len(LLDPAgent.neighbors)` by default
+
+        The agents of an `InterfaceManager` share their metrics, so each agent adds the change of its own count to the
+        gauge instead of setting it.
+        """
+        if count is None:
+            count = len(self.neighbors)
+        self.metrics.neighbors.inc(count - self._neighbor_count)
+        self._neighbor_count = count
 
-                    # check source address
-                    dst_mac = (data[6] << 40) + (data[7] << 32) + (data[8] << 24) + (data[9] << 16) + (data[10] << 8) + data[11]
-                    dst_mac = dst_mac.to_bytes(6, 'big')
+    def _schedule_expiry(self, deadline: float):
+        expiry = self._expiry
+        deadline = max(deadline, self.scheduler.clock() + EXPIRY_RESOLUTION)
+        if not expiry.pending or deadline < expiry.deadline:
+            self.scheduler.reschedule(expiry, deadline)
 
-                    if is_lldp and (dst_mac != self.mac_address):
+    def hand_off(self) -> bool:
+        """Hand the socket and the agent state over to the process connecting to the handoff listener
 
-                        # Instantiate LLDPDU object from raw bytes
-                        lldpdu = LLDPDU.from_bytes(data[14:])
+        Returns True if the new process took over. The caller must then stop using the socket.
+        """
+        try:
+            connection = self.handoff.accept()
+        except OSError as e:
+            self.logger.log("Accepting handoff connection failed: {}".format(e))
+            return False
+        try:
+            last_announce = self.scheduler.clock() if self.last_announce is None else self.last_announce
+            self.handed_off = handoffs.send_state(connection, [self.socket], self.interface_name, last_announce,
+                                                  self.neighbors)
+        except OSError as e:
+            self.logger.log("Handoff failed: {}".format(e))
+        finally:
+            connection.close()
+        return self.handed_off
 
-                        # Log contents
-                        self.logger.log(str(lldpdu))
-                        received = True
-                    else:
-                        continue
+    def take_over(self, state):
+        """Continue with the neighbor table and announce schedule received from the previous agent process
+
+        The socket of the state has to be passed to the constructor (`sock`).
+        """
+        self.neighbors = state.neighbors
+        if self.indexed:
+            self.neighbors.add_index()
+        self.last_announce = state.last_announce
+        self.count_neighbors()
 
-                # Announce if the time is right
-                t_now = time.time()
-                if t_now - t_previous > self.announce_interval:
-                    self.announce()
-                    t_previous = t_now
+    def restore_snapshot(self) -> int:
+        """Restore the unexpired neighbors of the snapshot file. Returns the number of restored neighbors
 
-        except KeyboardInterrupt:
+        A missing snapshot is not an error; an unreadable one is logged and ignored.
+        """
+        try:
+            restored = snapshots.load(self.neighbors, self.snapshot)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            self.logger.log("Ignoring neighbor snapshot {}: {}".format(self.snapshot, e))
+            return 0
+        self.count_neighbors()
+        return restored
+
+    def save_snapshot(self):
+        """Write the neighbor table to the snapshot file. Errors are logged"""
+        try:
+            snapshots.save(self.neighbors, self.snapshot)
+        except OSError as e:
+            self.logger.log("Writing neighbor snapshot {} failed: {}".format(self.snapshot, e))
+
+    def set_tlvs(self, tlvs):
+        """Set the optional TLVs announced after the mandatory ones
+
+        If they differ from the current ones, the agent announces right away (txNow).
+        """
+        tlvs = list(tlvs)
+        if [bytes(tlv) for tlv in tlvs] != [bytes(tlv) for tlv in self.tlvs]:
+            self.tlvs = tlvs
+            self.announce_now()
+
+    def refresh_sysinfo(self):
+        """Check the local system information for changes and announce right away if it changed"""
+        if self.sysinfo.refresh():
+            self.set_tlvs(self.sysinfo.tlvs())
+
+    def fast_start(self):
+        """Announce right away and continue at the fast interval, e.g. on link up or when a new neighbor was seen"""
+        self.tx.start_fast()
+        self.announce_now()
+
+    def announce_now(self):
+        """Announce as soon as the transmit credit allows (txNow)"""
+        timer = self._transmit_timer
+        now = self.scheduler.clock()
+        if not timer.pending or timer.deadline > now:
+            self.scheduler.reschedule(timer, now)
+
+    def _transmit(self):
+        """Transmit timer: announce if there is transmit credit, then schedule the next announce"""
+        scheduler = self.scheduler
+        now = scheduler.clock()
+        tx = self.tx
+        if tx.take(now):
+            self.metrics.announce_jitter.observe(now - self._transmit_timer.deadline)
+            probe = self._probe_announce
+            if probe is not None:
+                t0 = self.timer.clock()
+            self.announce()
+            if probe is not None:
+                probe(t0)
+            self.last_announce = now
+            delay = tx.next_interval()
+            if self.jitter:
+                delay += scheduler.random.uniform(0, self.jitter)
+        else:
+            # out of credit, retry as soon as one credit is available
+            self.metrics.announces_deferred.inc()
+            delay = tx.wait(now)
+        scheduler.reschedule(self._transmit_timer, now + delay)
+
+    def shutdown(self):
+        """Send a shutdown LLDPDU (TTL 0), so that neighbors remove the agent right away
+
+        Errors are ignored, the agent is going away anyway.
+        """
+        try:
+            self._send(self._frame(self._lldpdu(0, [])))
+        except OSError:
             pass
-        finally:
-            # Clean up
-            self.socket.close()
+
+    def _lldpdu(self, ttl: int, tlvs: list) -> LLDPDU:
+        lldpdu = LLDPDU()
+        lldpdu.append(ChassisIdTLV(subtype=ChassisIdTLV.Subtype.MAC_ADDRESS, id=self.mac_address))
+        lldpdu.append(PortIdTLV(PortIdTLV.Subtype.INTERFACE_NAME, id=self.interface_name))
+        lldpdu.append(TTLTLV(ttl))
+        for tlv in tlvs:
+            lldpdu.append(tlv)
+        return lldpdu
+
+    def _frame(self, lldpdu: LLDPDU) -> bytes:
+        return b"\x01\x80\xc2\x00\x00\x0e" + self.mac_address + b'\x88\xCC' + bytes(lldpdu)
+
+    def _send(self, frame: bytes):
+        self.socket.send(frame)
+        self.metrics.frames_sent.inc()
+        if self.tap is not None:
+            self.tap.sent(time.time_ns(), frame)
 
     def announce(self):
         """Announce the agent
@@ -122,19 +584,20 @@ class LLDPAgent:
         Sends an LLDP frame with an LLDPDU containing:
             * the agent's MAC address as its chassis id
             * the agent's interface name as port id
-            * a TTL of 60 seconds
+            * the agent's TTL, 60 seconds by default
+            * the optional TLVs set with `LLDPAgent.set_tlvs()`
+
+        The frame is built once and reused until one of its parts changes.
         """
+        key = (self.mac_address, self.interface_name, self.ttl, self.tlvs)
+        if self._announce_frame is not None and key == self._announce_key:
+            self._send(self._announce_frame)
+            return
 
         # Construct LLDPDU
-        mac_tlv = ChassisIdTLV(subtype=ChassisIdTLV.Subtype.MAC_ADDRESS, id=self.mac_address)
-        interface_tlv = PortIdTLV(PortIdTLV.Subtype.INTERFACE_NAME, id=self.interface_name)
-        ttl_tlv = TTLTLV(60)
+        lldpdu = self._lldpdu(self.ttl, self.tlvs)
 
         end_tlv = EndOfLLDPDUTLV()
-        lldpdu = LLDPDU()
-        lldpdu.append(mac_tlv)
-        lldpdu.append(interface_tlv)
-        lldpdu.append(ttl_tlv)
 
         # IMPORTANT REMARK!!!!
         # Both announce tests explicitly expect the LLDP frame to not end with the END_OF_LLDP TLV!!!
@@ -145,9 +608,8 @@ class LLDPAgent:
         # I decided to stick to this solution because the slides also state that this TLV is optional
         #lldpdu.append(end_tlv)
 
-        # Construct Ethernet Frame
-        # TODO: Implement
-        frame = b"\x01\x80\xc2\x00\x00\x0e" + self.mac_address + b'\x88\xCC' + bytes(lldpdu)
-
-        # Send frame
-        self.socket.send(frame)
+        # Construct Ethernet Frame and send it
+        self._announce_frame = self._frame(lldpdu)
+        # copy the TLV list, so changing it in place also invalidates the frame
+        self._announce_key = key[:3] + (list(self.tlvs),)
+        self._send(self._announce_frame)
@@ -0,0 +1,329 @@
+"""Parallel topology analysis of LLDP captures
+
+Decodes the LLDP frames of many pcap and pcapng files in worker processes and merges the results into a topology
+summary:
+
+    python3 -m lldp.analyze captures/*.pcapng --workers 8 --json topology.json
+
+Work is split into tasks: one per classic pcap file, and block-aligned chunks of about `--chunk-size` bytes for pcapng
+files. Every task memory-maps its file and only touches its own byte range, so the tasks are independent and the
+analysis scales with the number of cores. The parent process walks the pcapng block headers once to find the chunk
+boundaries and the interface description blocks each chunk depends on.
+
+The summary lists, per link (capture file, capture interface, remote chassis ID, remote port ID), when the neighbor was
+first and last seen, how many LLDPDUs it sent and the following TTL anomalies:
+
+    ttl_changes   the announced TTL changed between two consecutive LLDPDUs
+    expirations   the gap between two LLDPDUs was longer than the TTL, i.e. the neighbor expired in between
+    shutdowns     LLDPDUs with a TTL of 0 (the neighbor announced it is going away)
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import sys
+
+from lldp.pcap import (PCAPNG_IDB, PCAPNG_SHB, capture_format, decode_lldpdus, lldp_records, map_capture,
+                       pcapng_blocks, read_interface, read_pcap, read_pcapng)
+from lldp.tlv import SystemNameTLV
+
+
+def format_id(value) -> str:
+    """Format a chassis or port ID value: MAC addresses as aa:bb:cc:dd:ee:ff, everything else as string"""
+    if isinstance(value, (bytes, bytearray)):
+        return ":".join("{:02x}".format(b) for b in value)
+    return str(value)
+
+
+class Link:
+    """What was seen of one remote port on one interface of one capture file
+
+    The interface is the pcapng interface name (or index), None for classic pcap files, which do not record it.
+    Timestamps are nanoseconds since the epoch or None if the capture records did not carry any.
+    """
+    __slots__ = ("capture", "interface", "chassis", "port", "system_name", "first_seen", "last_seen", "first_ttl",
+                 "ttl", "lldpdus", "ttl_changes", "expirations", "shutdowns")
+
+    def __init__(self, capture, interface, chassis: str, port: str):
+        self.capture = capture
+        self.interface = interface
+        self.chassis = chassis
+        self.port = port
+        self.system_name = None
+        self.first_seen = None
+        self.last_seen = None
+        self.first_ttl = None
+        self.ttl = None
+        self.lldpdus = 0
+        self.ttl_changes = 0
+        self.expirations = 0
+        self.shutdowns = 0
+
+    @property
+    def key(self) -> tuple:
+        return self.capture, self.interface, self.chassis, self.port
+
+    def add(self, timestamp: int, ttl: int, system_name: str = None):
+        """Account for an LLDPDU. LLDPDUs have to be added in capture order"""
+        if self.lldpdus == 0:
+            self.first_ttl = ttl
+            self.first_seen = timestamp
+        else:
+            if ttl != self.ttl:
+                self.ttl_changes += 1
+            if timestamp is not None and self.last_seen is not None and \
+                    timestamp - self.last_seen > self.ttl * 1000000000:
+                self.expirations += 1
+        if ttl == 0:
+            self.shutdowns += 1
+        if system_name is not None:
+            self.system_name = system_name
+        if timestamp is not None:
+            self.last_seen = timestamp
+        self.ttl = ttl
+        self.lldpdus += 1
+
+    def merge(self, other: "Link"):
+        """Merge the observations of the same link from another part of the captures"""
+        earlier, later = self, other
+        if self.first_seen is not None and other.first_seen is not None and other.first_seen < self.first_seen:
+            earlier, later = other, self
+
+        ttl_changes = earlier.ttl_changes + later.ttl_changes + (later.first_ttl != earlier.ttl)
+        expirations = earlier.expirations + later.expirations
+        if earlier.last_seen is not None and later.first_seen is not None and \
+                later.first_seen - earlier.last_seen > earlier.ttl * 1000000000:
+            expirations += 1
+
+        self.system_name = later.system_name or earlier.system_name
+        self.first_seen = earlier.first_seen if earlier.first_seen is not None else later.first_seen
+        self.last_seen = later.last_seen if later.last_seen is not None else earlier.last_seen
+        self.first_ttl = earlier.first_ttl
+        self.ttl = later.ttl
+        self.lldpdus = earlier.lldpdus + later.lldpdus
+        self.ttl_changes = ttl_changes
+        self.expirations = expirations
+        self.shutdowns = earlier.shutdowns + later.shutdowns
+
+    def anomalous(self) -> bool:
+        return bool(self.ttl_changes or self.expirations or self.shutdowns)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TopologySummary:
+    """Links seen in a set of captures plus frame counters
+
+    Attributes:
+        links (dict): `Link` objects by (capture, interface, chassis, port)
+        frames (int): Number of LLDP frames
+        errors (int): Number of LLDP frames that could not be decoded
+    """
+
+    def __init__(self):
+        self.links = {}
+        self.frames = 0
+        self.errors = 0
+
+    def add(self, timestamp: int, capture, interface, lldpdu):
+        chassis = format_id(lldpdu[0].value)
+        port = format_id(lldpdu[1].value)
+        system_name = None
+        for tlv in lldpdu:
+            if isinstance(tlv, SystemNameTLV):
+                system_name = tlv.value
+                break
+        # interface names are only unique within a capture, e.g. every host has an eth0
+        key = (capture, interface, chassis, port)
+        link = self.links.get(key)
+        if link is None:
+            link = self.links[key] = Link(capture, interface, chassis, port)
+        link.add(timestamp, lldpdu[2].value, system_name)
+
+    def merge(self, other: "TopologySummary"):
+        self.frames += other.frames
+        self.errors += other.errors
+        for key, link in other.links.items():
+            existing = self.links.get(key)
+            if existing is None:
+                self.links[key] = link
+            else:
+                existing.merge(link)
+
+    def chassis(self) -> dict:
+        """Summarize the links by remote chassis
+
+        Returns a dict mapping chassis IDs to dicts with the system name, the sorted list of (capture, interface, port)
+        tuples and the first and last time the chassis was seen.
+        """
+        result = {}
+        for link in self.links.values():
+            entry = result.setdefault(link.chassis, {"system_name": None, "ports": [], "first_seen": None,
+                                                     "last_seen": None})
+            entry["system_name"] = entry["system_name"] or link.system_name
+            entry["ports"].append((link.capture, link.interface, link.port))
+            if link.first_seen is not None and (entry["first_seen"] is None or link.first_seen < entry["first_seen"]):
+                entry["first_seen"] = link.first_seen
+            if link.last_seen is not None and (entry["last_seen"] is None or link.last_seen > entry["last_seen"]):
+                entry["last_seen"] = link.last_seen
+        for entry in result.values():
+            entry["ports"].sort(key=lambda port: tuple(map(str, port)))
+        return result
+
+    def anomalies(self) -> list:
+        return [link for link in self.links.values() if link.anomalous()]
+
+    def to_dict(self) -> dict:
+        return {
+            "frames": self.frames,
+            "errors": self.errors,
+            "chassis": self.chassis(),
+            "links": [link.to_dict() for link in sorted(self.links.values(), key=lambda l: tuple(map(str, l.key)))],
+        }
+
+
+def plan(paths: list, chunk_size: int = 64 * 1024 * 1024) -> list:
+    """Split captures into independent tasks
+
+    Returns a list of (path, start, end, byteorder, interface blocks) tuples. For classic pcap files start, end and
+    byteorder are None and the task covers the whole file. For pcapng files [start, end) is a block-aligned byte range
+    and interface blocks are the offsets of the interface description blocks of the section that precede `start`.
+    """
+    tasks = []
+    for path in paths:
+        with map_capture(path) as view:
+            if view is None:
+                continue
+            kind, _ = capture_format(view)
+            if kind == "pcap":
+                tasks.append((path, None, None, None, None))
+                continue
+
+            interfaces = []
+            start = None
+            for offset, block_type, length, byteorder in pcapng_blocks(view):
+                if block_type == PCAPNG_SHB:
+                    interfaces = []
+                if start is None:
+                    start, start_byteorder, start_interfaces = offset, byteorder, list(interfaces)
+                if block_type == PCAPNG_IDB:
+                    interfaces.append(offset)
+                end = offset + length
+                if end - start >= chunk_size:
+                    tasks.append((path, start, end, start_byteorder, start_interfaces))
+                    start = None
+            if start is not None:
+                tasks.append((path, start, end, start_byteorder, start_interfaces))
+    return tasks
+
+
+def analyze_task(task: tuple) -> TopologySummary:
+    """Decode the LLDP frames of one task returned by `plan()`"""
+    path, start, end, byteorder, interface_blocks = task
+    summary = TopologySummary()
+    with map_capture(path) as view:
+        if view is None:
+            return summary
+        if start is None:
+            _, byteorder = capture_format(view)
+            # classic pcap does not record the interface
+            records = ((timestamp, None, frame) for timestamp, _, frame in read_pcap(view, byteorder))
+        else:
+            interfaces = [read_interface(view, offset, byteorder, index)
+                          for index, offset in enumerate(interface_blocks)]
+            records = read_pcapng(view, start, end, interfaces, byteorder)
+
+        errors = []
+        for timestamp, interface, lldpdu in decode_lldpdus(_count(lldp_records(records), summary), errors):
+            summary.add(timestamp, path, interface, lldpdu)
+        summary.errors = len(errors)
+    return summary
+
+
+def _count(records, summary: TopologySummary):
+    for record in records:
+        summary.frames += 1
+        yield record
+
+
+def analyze(paths: list, workers: int = None, chunk_size: int = 64 * 1024 * 1024) -> TopologySummary:
+    """Analyze captures in `workers` processes (default: one per CPU) and return the merged `TopologySummary`
+
+    With `workers=1` the captures are analyzed in the calling process.
+    """
+    tasks = plan(paths, chunk_size)
+    summary = TopologySummary()
+    if workers == 1:
+        for result in map(analyze_task, tasks):
+            summary.merge(result)
+        return summary
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        # Results arrive in task order, which keeps the chunks of a file in capture order for `Link.merge()`
+        for result in executor.map(analyze_task, tasks):
+            summary.merge(result)
+    return summary
+
+
+def _format_time(timestamp) -> str:
+    if timestamp is None:
+        return "-"
+    return datetime.datetime.fromtimestamp(timestamp / 1e9, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _format_interface(interface) -> str:
+    return "-" if interface is None else str(interface)
+
+
+def format_summary(summary: TopologySummary, out=None):
+    out = sys.stdout if out is None else out
+    chassis = summary.chassis()
+    print("{} LLDP frames, {} decode errors, {} chassis, {} links".format(
+        summary.frames, summary.errors, len(chassis), len(summary.links)), file=out)
+    print("", file=out)
+    print("{:<20} {:<24} {:<24} {:<16} {:<20} {:<26} {:<26}".format(
+        "chassis", "system name", "capture", "interface", "port", "first seen", "last seen"), file=out)
+    for chassis_id, entry in sorted(chassis.items()):
+        for capture, interface, port in entry["ports"]:
+            link = summary.links[(capture, interface, chassis_id, port)]
+            print("{:<20} {:<24} {:<24} {:<16} {:<20} {:<26} {:<26}".format(
+                chassis_id, str(entry["system_name"] or "-"), capture, _format_interface(interface), port,
+                _format_time(link.first_seen), _format_time(link.last_seen)), file=out)
+
+    anomalies = summary.anomalies()
+    if anomalies:
+        print("", file=out)
+        print("TTL anomalies:", file=out)
+        for link in anomalies:
+            print("  {} {} {} {}: {} TTL changes, {} expirations, {} shutdowns (last TTL {})".format(
+                link.capture, _format_interface(link.interface), link.chassis, link.port, link.ttl_changes,
+                link.expirations, link.shutdowns, link.ttl), file=out)
+
+
+def _size(value: str) -> int:
+    units = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+    if value and value[-1].lower() in units:
+        return int(value[:-1]) * units[value[-1].lower()]
+    return int(value)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lldp.analyze",
+                                     description="Summarize the LLDP topology seen in pcap/pcapng captures.")
+    parser.add_argument("captures", nargs="+", help="pcap or pcapng files")
+    parser.add_argument("-j", "--workers", type=int, help="Number of worker processes (default: number of CPUs).")
+    parser.add_argument("--chunk-size", type=_size, default=64 * 1024 * 1024,
+                        help="Approximate size of the pcapng chunks handed to the workers, e.g. 64M (default: 64M).")
+    parser.add_argument("--json", help="Write the summary as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    summary = analyze(args.captures, args.workers, args.chunk_size)
+    format_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary.to_dict(), f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
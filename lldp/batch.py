@@ -0,0 +1,212 @@
+"""Batch classification and header extraction for many frames at once
+
+The agent classifies frames one at a time. Offline and bulk paths (captures, collectors) see many frames at once and
+can do better: `FrameBatch` holds frames packed back to back in a single buffer plus an array of offsets, classifies
+all of them in one vectorized pass and extracts the fields needed to pick the interesting frames into columns. Only
+the selected rows are fully decoded into `LLDPDU` objects:
+
+    batch = FrameBatch.pack(frames)
+    rows = batch.classify(local_mac)
+    headers = batch.headers(rows)
+    # e.g. only decode the frames of chassis that are not known yet
+    lldpdus = batch.decode(row for row, mac in zip(headers.rows, headers.src_mac) if bytes(mac) not in known)
+
+NumPy is used if it is installed. Without it, the same API is implemented in pure Python with the `array` module;
+results are equal, only the column types differ (see `Headers`).
+"""
+import array
+
+from lldp.frame import LLDP_ETHERTYPE, NEAREST_BRIDGE, NEAREST_CUSTOMER_BRIDGE, NEAREST_NON_TPMR_BRIDGE
+from lldp.lldpdu import LLDPDU
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_DESTINATIONS = frozenset((NEAREST_BRIDGE, NEAREST_NON_TPMR_BRIDGE, NEAREST_CUSTOMER_BRIDGE))
+
+MISSING = 255
+"""TLV type reported for TLVs that lie (partially) beyond the end of the frame"""
+
+
+class Headers:
+    """Columnar header fields of a set of frames
+
+    Row i describes frame `rows[i]` of the batch.
+
+    Attributes:
+        rows: Indices of the described frames within the batch
+        src_mac: Source MAC addresses. An (n, 6) uint8 array with NumPy, otherwise a list of bytes
+        tlv_types: Types of the first three TLVs of the LLDPDU, `MISSING` if the frame is too short. An (n, 3) uint8
+            array with NumPy, otherwise a list of 3-tuples
+        ttl: Value of the TTL TLV or -1 if the third TLV is not a well-formed TTL TLV. An int32 array with NumPy,
+            otherwise an `array.array("i")`
+    """
+
+    def __init__(self, rows, src_mac, tlv_types, ttl):
+        self.rows = rows
+        self.src_mac = src_mac
+        self.tlv_types = tlv_types
+        self.ttl = ttl
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class FrameBatch:
+    """Frames packed back to back in one buffer
+
+    Frame i is `buffer[offsets[i]:offsets[i + 1]]`, i.e. `offsets` has one entry more than there are frames.
+
+    Parameters:
+        buffer (bytes, bytearray, memoryview or mmap): The packed frames
+        offsets: Sequence of n + 1 frame boundaries (list, `array.array` or NumPy array)
+    """
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        if numpy is not None:
+            self.offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        else:
+            self.offsets = array.array("q", offsets)
+        if len(self.offsets) == 0:
+            raise ValueError("offsets needs at least one entry")
+
+    @classmethod
+    def pack(cls, frames) -> "FrameBatch":
+        """Pack an iterable of frames into a new batch"""
+        buffer = bytearray()
+        offsets = [0]
+        for frame in frames:
+            buffer += frame
+            offsets.append(len(buffer))
+        return cls(bytes(buffer), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def frame(self, index: int):
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def classify(self, local_mac: bytes = None):
+        """Select the LLDP frames
+
+        Applies the agent's classification (see `lldp.frame.is_lldp_frame()`) to all frames and returns the indices of
+        the LLDP frames, an int64 array with NumPy, otherwise an `array.array("q")`.
+        """
+        if numpy is None:
+            # Same checks as is_lldp_frame(), but on the packed buffer without slicing out every frame
+            data = self.buffer
+            offsets = self.offsets
+            return array.array("q", (
+                i for i, (start, end) in enumerate(zip(offsets, offsets[1:]))
+                if end - start > 14 and bytes(data[start:start + 6]) in _DESTINATIONS and
+                data[start + 12:start + 14] == LLDP_ETHERTYPE and
+                (local_mac is None or data[start + 6:start + 12] != local_mac)))
+
+        data = self._array()
+        starts = self.offsets[:-1]
+        at = self._gather(data, starts)
+        mask = (self.offsets[1:] - starts) > 14
+        mask &= (at(0) == 1) & (at(1) == 0x80) & (at(2) == 0xc2) & (at(3) == 0) & (at(4) == 0)
+        last = at(5)
+        mask &= (last == 14) | (last == 3) | (last == 0)
+        mask &= (at(12) == 0x88) & (at(13) == 0xcc)
+        if local_mac is not None:
+            own = numpy.ones(len(starts), dtype=bool)
+            for i, byte in enumerate(local_mac):
+                own &= at(6 + i) == byte
+            mask &= ~own
+        return numpy.flatnonzero(mask)
+
+    def headers(self, rows=None) -> Headers:
+        """Extract source MAC, the types of the first three TLVs and the TTL of the frames `rows` (default: all)
+
+        The frames are not validated beyond what is needed to locate the fields; use `FrameBatch.classify()` first.
+        """
+        if rows is None:
+            rows = range(len(self))
+        if numpy is None:
+            return self._headers_python(rows)
+
+        rows = numpy.asarray(rows, dtype=numpy.int64)
+        data = self._array()
+        starts = self.offsets[rows]
+        ends = self.offsets[rows + 1]
+        at = self._gather(data, starts)
+        src_mac = numpy.stack([at(i) for i in range(6, 12)], axis=1).astype(numpy.uint8) if len(rows) else \
+            numpy.zeros((0, 6), dtype=numpy.uint8)
+
+        # Walk the first three TLV headers of all frames in lockstep
+        types = numpy.full((len(rows), 3), MISSING, dtype=numpy.uint8)
+        position = numpy.full(len(rows), 14, dtype=numpy.int64)
+        for column in range(3):
+            present = starts + position + 2 <= ends
+            first, second = at(position), at(position + 1)
+            types[:, column] = numpy.where(present, first >> 1, MISSING)
+            length = ((first & 1) << 8) | second
+            if column == 2:
+                ttl = (at(position + 2) << 8) | at(position + 3)
+                valid = present & (first >> 1 == 3) & (length == 2) & (starts + position + 4 <= ends)
+                ttl = numpy.where(valid, ttl, -1).astype(numpy.int32)
+            position = numpy.where(present, position + 2 + length, position)
+        return Headers(rows, src_mac, types, ttl)
+
+    def _headers_python(self, rows) -> Headers:
+        rows = array.array("q", rows)
+        src_mac = []
+        tlv_types = []
+        ttls = array.array("i")
+        for row in rows:
+            frame = self.frame(row)
+            end = len(frame)
+            src_mac.append(bytes(frame[6:12]))
+            types = []
+            ttl = -1
+            position = 14
+            for column in range(3):
+                if position + 2 > end:
+                    types.append(MISSING)
+                    continue
+                tlv_type = frame[position] >> 1
+                length = ((frame[position] & 1) << 8) | frame[position + 1]
+                types.append(tlv_type)
+                if column == 2 and tlv_type == 3 and length == 2 and position + 4 <= end:
+                    ttl = (frame[position + 2] << 8) | frame[position + 3]
+                position += 2 + length
+            tlv_types.append(tuple(types))
+            ttls.append(ttl)
+        return Headers(rows, src_mac, tlv_types, ttls)
+
+    def decode(self, rows) -> list:
+        """Decode the LLDPDUs of the frames `rows`
+
+        Returns a list with one entry per row, the `LLDPDU` or None if the frame could not be decoded.
+        """
+        lldpdus = []
+        for row in rows:
+            try:
+                lldpdus.append(LLDPDU.from_bytes(bytes(self.frame(int(row))[14:])))
+            except (ValueError, IndexError):
+                lldpdus.append(None)
+        return lldpdus
+
+    def _array(self):
+        data = numpy.frombuffer(self.buffer, dtype=numpy.uint8)
+        if len(data) == 0:
+            # keep index arithmetic valid for empty buffers
+            data = numpy.zeros(1, dtype=numpy.uint8)
+        return data
+
+    @staticmethod
+    def _gather(data, starts):
+        """Return a function reading the byte at `starts + offset` of every frame
+
+        Reads past the end of the buffer are clamped, callers mask them out with the frame lengths.
+        """
+        last = len(data) - 1
+
+        def at(offset):
+            return data[numpy.minimum(starts + offset, last)].astype(numpy.int64)
+        return at
@@ -0,0 +1,95 @@
+"""Benchmarks for the LLDP agent
+
+Run with `python -m lldp.bench --help`. Every suite returns a dictionary mapping benchmark names to results of the
+form
+
+    {"value": float, "unit": str, "better": "lower" or "higher", ...}
+
+where `value` is the number compared against a baseline. Suites may add further keys for information.
+"""
+import json
+import platform
+import sys
+import time
+import timeit
+
+
+def measure(func, min_time: float = 0.2, repeat: int = 5) -> dict:
+    """Measure the time per call of `func`
+
+    The number of calls per round is chosen such that a round takes at least `min_time` seconds. Of `repeat` rounds
+    the fastest one is reported, as slower rounds are usually caused by interference rather than the code itself.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / elapsed * 1.1)) if elapsed > 0 else number * 10
+    best = min([elapsed] + timer.repeat(repeat - 1, number)) if repeat > 1 else elapsed
+    ns_per_op = best / number * 1e9
+    return {"value": ns_per_op, "unit": "ns/op", "better": "lower", "ops_per_sec": 1e9 / ns_per_op}
+
+
+def report(results: dict, suite: str = None) -> dict:
+    """Wrap benchmark results with information about the environment"""
+    return {
+        "meta": {
+            "suite": suite,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def save(path: str, data: dict):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.1) -> list:
+    """Compare two result dictionaries
+
+    Returns a list of (name, baseline value, current value, relative change, regressed) tuples for every benchmark
+    present in both. The relative change is positive if the current result is worse. A benchmark counts as regressed
+    if it got worse by more than `threshold` (0.1 = 10 %).
+    """
+    rows = []
+    for name in sorted(current):
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], current[name]["value"]
+        if old == 0:
+            continue
+        change = (new - old) / old
+        if current[name].get("better", "lower") == "higher":
+            change = -change
+        rows.append((name, old, new, change, change > threshold))
+    return rows
+
+
+def format_results(results: dict, out=None):
+    out = sys.stdout if out is None else out
+    width = max([len(name) for name in results] + [10])
+    for name in sorted(results):
+        result = results[name]
+        print("{:<{}} {:>14.1f} {}".format(name, width, result["value"], result["unit"]), file=out)
+
+
+def format_comparison(rows: list, out=None):
+    out = sys.stdout if out is None else out
+    width = max([len(row[0]) for row in rows] + [10])
+    for name, old, new, change, regressed in rows:
+        print("{:<{}} {:>14.1f} {:>14.1f} {:>+8.1%}{}".format(name, width, old, new, change,
+                                                            "  REGRESSION" if regressed else ""), file=out)
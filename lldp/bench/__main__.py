@@ -0,0 +1,55 @@
+import argparse
+import sys
+
+from lldp.bench import agent, batch, codec, memory, query, views, compare, format_comparison, format_results, load, report, save
+
+SUITES = {
+    "codec": codec,
+    "agent": agent,
+    "batch": batch,
+    "memory": memory,
+    "views": views,
+    "query": query,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lldp.bench", description="Run LLDP agent benchmarks.")
+    parser.add_argument("suites", help="Suites to run (default: all). Available: " + ", ".join(SUITES), nargs="*")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    parser.add_argument("-b", "--baseline", help="Compare the results against this previously saved JSON file.")
+    parser.add_argument("-t", "--threshold", help="Relative slowdown counted as regression (default: 0.1).",
+                        type=float, default=0.1)
+    parser.add_argument("-k", "--filter", help="Only run benchmarks whose name contains this string.")
+    parser.add_argument("--min-time", help="Minimum duration of a timing round in seconds (default: 0.2).",
+                        type=float, default=0.2)
+    parser.add_argument("--repeat", help="Number of timing rounds, the best is reported (default: 5).",
+                        type=int, default=5)
+    args = parser.parse_args(argv)
+
+    suites = args.suites or list(SUITES)
+    for suite in suites:
+        if suite not in SUITES:
+            parser.error("unknown suite '{}'".format(suite))
+
+    results = {}
+    for suite in suites:
+        results.update(SUITES[suite].run(min_time=args.min_time, repeat=args.repeat, filter=args.filter))
+    format_results(results)
+
+    if args.output:
+        save(args.output, report(results, ",".join(suites)))
+
+    if args.baseline:
+        rows = compare(results, load(args.baseline)["results"], args.threshold)
+        print()
+        format_comparison(rows)
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            print("\n{} regression(s) beyond {:.0%}".format(len(regressions), args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""Per-frame cost of classifying and extracting headers in batches
+
+Compares `lldp.batch.FrameBatch` against classifying the same frames one at a time with `lldp.frame.is_lldp_frame()`,
+as the agent does. The batch results use NumPy if it is installed, otherwise the pure-Python fallback. Values are
+nanoseconds per frame.
+"""
+from lldp import batch
+from lldp.bench import measure
+from lldp.frame import is_lldp_frame
+from lldp.traffic import TrafficMix
+
+LOCAL_MAC = b"\x02\xaa\xbb\xcc\xdd\xee"
+
+
+def _per_frame(result: dict, frames: int) -> dict:
+    value = result["value"] / frames
+    return {"value": value, "unit": "ns/frame", "better": "lower", "frames_per_sec": 1e9 / value}
+
+
+def run(min_time: float = 0.2, repeat: int = 5, filter: str = None, frames: int = 10000) -> dict:
+    traffic = [frame for _, frame in TrafficMix(LOCAL_MAC).frames(frames)]
+    frame_batch = batch.FrameBatch.pack(traffic)
+    rows = frame_batch.classify(LOCAL_MAC)
+    implementation = "python" if batch.numpy is None else "numpy"
+    results = {}
+
+    def add(name, func):
+        if filter is None or filter in name:
+            results[name] = _per_frame(measure(func, min_time, repeat), frames)
+
+    add("batch.classify.scalar", lambda: [i for i, frame in enumerate(traffic) if is_lldp_frame(frame, LOCAL_MAC)])
+    add("batch.classify.{}".format(implementation), lambda: frame_batch.classify(LOCAL_MAC))
+    add("batch.headers.{}".format(implementation), lambda: frame_batch.headers(rows))
+    return results
@@ -0,0 +1,93 @@
+"""Encode/decode throughput of the TLVs and LLDPDUs
+
+For every TLV class and subtype both `bytes(tlv)` and `TLV.from_bytes()` are measured, once with a realistic value and
+once with the largest value the TLV accepts. For LLDPDUs `LLDPDU.from_bytes()`, `bytes(LLDPDU)` and building an LLDPDU
+with `LLDPDU.append()` are measured.
+"""
+from ipaddress import ip_address
+
+from lldp.bench import measure
+from lldp.lldpdu import LLDPDU
+from lldp.tlv import ChassisIdTLV, PortIdTLV, TTLTLV, EndOfLLDPDUTLV, PortDescriptionTLV, SystemNameTLV, \
+    SystemDescriptionTLV, SystemCapabilitiesTLV, ManagementAddressTLV, OrganizationallySpecificTLV
+
+MAC = b"\x02\x04\xdf\x88\xa2\xb4"
+IPV4 = ip_address("192.0.2.100")
+IPV6 = ip_address("2001:db8::c0a8:164")
+OID = b"\x2b\x06\x01\x04\x01\x82\x37\x15\x14"
+
+
+def tlv_cases() -> dict:
+    """Return a dictionary mapping case names to TLV instances"""
+    caps = SystemCapabilitiesTLV.Capability
+    return {
+        "chassis_id.mac": ChassisIdTLV(ChassisIdTLV.Subtype.MAC_ADDRESS, MAC),
+        "chassis_id.ipv4": ChassisIdTLV(ChassisIdTLV.Subtype.NETWORK_ADDRESS, IPV4),
+        "chassis_id.ipv6": ChassisIdTLV(ChassisIdTLV.Subtype.NETWORK_ADDRESS, IPV6),
+        "chassis_id.string": ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "leaf-17.rack3.dc1.example.net"),
+        "chassis_id.string_max": ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "c" * 255),
+        "port_id.mac": PortIdTLV(PortIdTLV.Subtype.MAC_ADDRESS, MAC),
+        "port_id.ipv4": PortIdTLV(PortIdTLV.Subtype.NETWORK_ADDRESS, IPV4),
+        "port_id.ipv6": PortIdTLV(PortIdTLV.Subtype.NETWORK_ADDRESS, IPV6),
+        "port_id.string": PortIdTLV(PortIdTLV.Subtype.INTERFACE_NAME, "Ethernet1/49"),
+        "port_id.string_max": PortIdTLV(PortIdTLV.Subtype.LOCAL, "p" * 255),
+        "ttl": TTLTLV(120),
+        "end_of_lldpdu": EndOfLLDPDUTLV(),
+        "port_description": PortDescriptionTLV("Uplink to spine-2 Ethernet3/1"),
+        "port_description.max": PortDescriptionTLV("d" * 255),
+        "system_name": SystemNameTLV("leaf-17"),
+        "system_name.max": SystemNameTLV("n" * 255),
+        "system_description": SystemDescriptionTLV("Arista Networks EOS version 4.28.3M running on an Arista "
+                                                   "Networks DCS-7050SX3-48YC8"),
+        "system_description.max": SystemDescriptionTLV("s" * 255),
+        "system_capabilities": SystemCapabilitiesTLV(caps.BRIDGE | caps.ROUTER, caps.BRIDGE),
+        "management_address.ipv4": ManagementAddressTLV(IPV4, 5, ManagementAddressTLV.IFNumberingSubtype.IF_INDEX),
+        "management_address.ipv6": ManagementAddressTLV(IPV6, 5, ManagementAddressTLV.IFNumberingSubtype.IF_INDEX),
+        "management_address.ipv6_oid": ManagementAddressTLV(IPV6, 5, ManagementAddressTLV.IFNumberingSubtype.IF_INDEX,
+                                                            OID),
+        "organizationally_specific": OrganizationallySpecificTLV(b"\x00\x12\x0f", b"\x01", "x" * 5),
+        "organizationally_specific.max": OrganizationallySpecificTLV(b"\x00\x12\x0f", b"\x01", "x" * 507),
+    }
+
+
+def lldpdu_cases() -> dict:
+    """Return a dictionary mapping case names to lists of TLVs forming an LLDPDU"""
+    tlvs = tlv_cases()
+    mandatory = [tlvs["chassis_id.mac"], tlvs["port_id.string"], tlvs["ttl"]]
+    realistic = mandatory + [tlvs["port_description"], tlvs["system_name"], tlvs["system_description"],
+                             tlvs["system_capabilities"], tlvs["management_address.ipv4"], tlvs["end_of_lldpdu"]]
+    maximum = list(mandatory)
+    size = sum(len(bytes(tlv)) for tlv in maximum)
+    while size + 257 + 2 <= 1500:
+        maximum.append(tlvs["system_description.max"])
+        size += 257
+    maximum.append(tlvs["end_of_lldpdu"])
+    return {"mandatory": mandatory, "realistic": realistic, "max": maximum}
+
+
+def run(min_time: float = 0.2, repeat: int = 5, filter: str = None) -> dict:
+    results = {}
+
+    def add(name, func):
+        if filter is None or filter in name:
+            results[name] = measure(func, min_time, repeat)
+
+    for name, tlv in tlv_cases().items():
+        raw = bytes(tlv)
+        from_bytes = type(tlv).from_bytes
+        add("codec.tlv.{}.encode".format(name), lambda tlv=tlv: bytes(tlv))
+        add("codec.tlv.{}.decode".format(name), lambda raw=raw, from_bytes=from_bytes: from_bytes(raw))
+
+    for name, tlvs in lldpdu_cases().items():
+        lldpdu = LLDPDU(*tlvs)
+        raw = bytes(lldpdu)
+        add("codec.lldpdu.{}.decode".format(name), lambda raw=raw: LLDPDU.from_bytes(raw))
+        add("codec.lldpdu.{}.encode".format(name), lambda lldpdu=lldpdu: bytes(lldpdu))
+
+        def build(tlvs=tlvs):
+            lldpdu = LLDPDU()
+            for tlv in tlvs:
+                lldpdu.append(tlv)
+        add("codec.lldpdu.{}.append".format(name), build)
+
+    return results
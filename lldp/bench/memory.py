@@ -0,0 +1,83 @@
+"""Memory used per neighbor by `NeighborTable` (with and without secondary indexes) and `NeighborStore`
+
+Both are filled with the decoded LLDPDUs of `neighbors` synthetic neighbors (see `lldp.traffic.neighbor_lldpdu()`)
+and the memory allocated while doing so is measured with `tracemalloc`. The packed LLDPDUs are prepared up front and
+not counted.
+
+Run standalone to choose the number of neighbors:
+
+    python -m lldp.bench.memory --neighbors 1000000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from lldp.bench import format_results, report, save
+from lldp.lldpdu import LLDPDU
+from lldp.neighbors import NeighborTable
+from lldp.store import NeighborStore
+from lldp.traffic import neighbor_lldpdu
+
+
+def fill_table(packed: list, indexed: bool = False):
+    table = NeighborTable(indexed=indexed)
+    for raw in packed:
+        table.update(LLDPDU.from_bytes(raw), "eth0", now=0.0)
+    return table
+
+
+def fill_indexed_table(packed: list):
+    return fill_table(packed, indexed=True)
+
+
+def fill_store(packed: list):
+    store = NeighborStore()
+    for raw in packed:
+        store.update(LLDPDU.from_bytes(raw), 1, now=0.0)
+    return store
+
+
+def allocated(fill, packed: list) -> int:
+    """Return the number of bytes still allocated by the object `fill(packed)` returns"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        container = fill(packed)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del container
+    return size
+
+
+def run(min_time: float = 0.2, repeat: int = 5, filter: str = None, neighbors: int = 10000) -> dict:
+    packed = [bytes(neighbor_lldpdu(i)) for i in range(neighbors)]
+    results = {}
+    for name, fill in (("memory.neighbor_table", fill_table), ("memory.indexed_neighbor_table", fill_indexed_table),
+                       ("memory.neighbor_store", fill_store)):
+        if filter is None or filter in name:
+            size = allocated(fill, packed)
+            results[name] = {"value": size / neighbors, "unit": "B/neighbor", "better": "lower",
+                             "neighbors": neighbors, "total_bytes": size}
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lldp.bench.memory",
+                                     description="Compare the memory used per neighbor by the neighbor containers.")
+    parser.add_argument("--neighbors", type=int, default=10000, help="Number of neighbors (default: 10000).")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    results = run(neighbors=args.neighbors)
+    format_results(results)
+    if args.output:
+        save(args.output, report(results, "memory"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Secondary index maintenance and neighbor queries
+
+A `NeighborTable` with and without indexes is filled with `neighbors` synthetic neighbors (see
+`lldp.traffic.neighbor_lldpdu()`). Reported are
+
+    query.update.{plain,indexed}        time per refresh of an unchanged neighbor, the common case in the agent loop
+    query.lookup.*                      time per query on a published view: by system name, by management address,
+                                        by capability (all synthetic neighbors are bridges) with a page of 50, and
+                                        the next page of a result sorted by system name
+    query.scan.system_name              the lookup by system name on a view without indexes, for comparison
+
+The sort order of a view is computed by the first sorted query and cached in the view; `query.lookup.sorted_page`
+measures the following pages.
+
+Run standalone to choose the number of neighbors:
+
+    python -m lldp.bench.query --neighbors 100000
+"""
+import argparse
+import sys
+
+from lldp.bench import format_results, measure, report, save
+from lldp.neighbors import NeighborTable
+from lldp.query import query
+from lldp.tlv import SystemCapabilitiesTLV
+from lldp.traffic import neighbor_lldpdu
+
+Capability = SystemCapabilitiesTLV.Capability
+
+
+def fill(lldpdus: list, indexed: bool) -> NeighborTable:
+    table = NeighborTable(indexed=indexed)
+    for lldpdu in lldpdus:
+        table.update(lldpdu, "eth0", now=0.0)
+    return table
+
+
+def _refresh(table: NeighborTable, lldpdus: list):
+    position = [0]
+    count = len(lldpdus)
+    update = table.update
+
+    def refresh():
+        i = position[0]
+        update(lldpdus[i], "eth0", now=1.0)
+        position[0] = (i + 1) % count
+    return refresh
+
+
+def run(min_time: float = 0.2, repeat: int = 5, filter: str = None, neighbors: int = 10000) -> dict:
+    lldpdus = [neighbor_lldpdu(i) for i in range(neighbors)]
+    middle = neighbors // 2
+    results = {}
+    tables = {}
+    for indexed in (False, True):
+        tables[indexed] = table = fill(lldpdus, indexed)
+        name = "query.update.{}".format("indexed" if indexed else "plain")
+        if filter is None or filter in name:
+            results[name] = measure(_refresh(table, lldpdus), min_time, repeat)
+
+    view = tables[True].publish()
+    query(view, sort="system_name")
+    cases = {
+        "query.lookup.system_name": lambda: query(view, system_name="sw-{:05d}".format(middle)),
+        "query.lookup.management_address": lambda: query(view, management_address=0x0a000000 + middle),
+        "query.lookup.capability_page": lambda: query(view, enabled=Capability.BRIDGE, limit=50),
+        "query.lookup.sorted_page": lambda: query(view, sort="system_name", offset=middle, limit=50),
+        "query.scan.system_name": lambda: query(tables[False].publish(), system_name="sw-{:05d}".format(middle)),
+    }
+    for name, func in cases.items():
+        if filter is None or filter in name:
+            results[name] = measure(func, min_time, repeat)
+            results[name]["neighbors"] = neighbors
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lldp.bench.query",
+                                     description="Measure index maintenance and neighbor queries.")
+    parser.add_argument("--neighbors", type=int, default=10000, help="Number of neighbors (default: 10000).")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    results = run(neighbors=args.neighbors)
+    format_results(results)
+    if args.output:
+        save(args.output, report(results, "query"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
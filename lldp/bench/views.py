@@ -0,0 +1,130 @@
+"""The neighbor table under concurrent readers
+
+A writer thread refreshes the neighbors of a `NeighborTable` as fast as it can, like the agent loop receiving their
+LLDPDUs, while reader threads repeatedly take a view of the table and walk all of its entries, like an exporter or a
+query server. The writer publishes a requested view after every batch of 64 updates (one loop pass).
+
+Two ways of sharing the table are compared:
+
+    views       readers use `NeighborTable.snapshot()` (copy-on-write views, no lock)
+    locked      readers and the writer share one lock, readers hold it while walking the table
+
+For each number of readers the time per update and the longest stall of the writer (the longest gap between two
+consecutive updates) are reported. Readers and writer share the GIL, so some slowdown is expected either way; with a
+lock the writer additionally stalls for as long as a reader walks the table.
+
+Run standalone to choose the table size and the number of readers:
+
+    python -m lldp.bench.views --neighbors 100000 --readers 0 1 4
+"""
+import argparse
+import sys
+import threading
+import time
+
+from lldp.bench import format_results, report, save
+from lldp.neighbors import NeighborTable
+from lldp.traffic import neighbor_lldpdu
+
+BATCH = 64
+
+
+def _walk(entries) -> int:
+    # the work of a reader: look at every entry
+    now = time.monotonic()
+    return sum(1 for neighbor in entries if neighbor.deadline > now)
+
+
+def run_scenario(lldpdus: list, readers: int, locked: bool, duration: float) -> dict:
+    """Run the writer for `duration` seconds with `readers` reader threads
+
+    Returns the number of updates, the time per update, the longest writer stall and the number of views the readers
+    walked.
+    """
+    table = NeighborTable()
+    for lldpdu in lldpdus:
+        table.update(lldpdu, "eth0")
+    lock = threading.Lock()
+    stop = threading.Event()
+    views = [0] * readers
+
+    def reader(number):
+        while not stop.is_set():
+            if locked:
+                with lock:
+                    _walk(table)
+            else:
+                _walk(table.snapshot())
+            views[number] += 1
+
+    threads = [threading.Thread(target=reader, args=(number,), daemon=True) for number in range(readers)]
+    for thread in threads:
+        thread.start()
+
+    update = table.update
+    clock = time.perf_counter
+    updates = 0
+    stall = 0.0
+    count = len(lldpdus)
+    start = last = clock()
+    end = start + duration
+    while last < end:
+        if locked:
+            with lock:
+                for i in range(updates, updates + BATCH):
+                    update(lldpdus[i % count], "eth0")
+        else:
+            for i in range(updates, updates + BATCH):
+                update(lldpdus[i % count], "eth0")
+            table.publish_pending()
+        updates += BATCH
+        now = clock()
+        stall = max(stall, now - last)
+        last = now
+    elapsed = last - start
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {"updates": updates, "ns_per_update": elapsed / updates * 1e9, "max_stall": stall, "views": sum(views)}
+
+
+def run(min_time: float = 0.2, repeat: int = 5, filter: str = None, neighbors: int = 10000,
+        readers=(0, 1, 4)) -> dict:
+    lldpdus = [neighbor_lldpdu(i) for i in range(neighbors)]
+    duration = min_time * repeat
+    results = {}
+    for count in readers:
+        for mode in ("views", "locked"):
+            if count == 0 and mode == "locked":
+                continue
+            name = "views.{}.readers_{}".format(mode, count)
+            if filter is not None and filter not in name:
+                continue
+            result = run_scenario(lldpdus, count, mode == "locked", duration)
+            results[name + ".update"] = {"value": result["ns_per_update"], "unit": "ns/update", "better": "lower",
+                                         "neighbors": neighbors, "views": result["views"]}
+            results[name + ".max_stall"] = {"value": result["max_stall"] * 1e6, "unit": "us", "better": "lower",
+                                            "neighbors": neighbors}
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lldp.bench.views",
+                                     description="Measure neighbor table updates under concurrent readers.")
+    parser.add_argument("--neighbors", type=int, default=10000, help="Number of neighbors (default: 10000).")
+    parser.add_argument("--readers", type=int, nargs="+", default=[0, 1, 4],
+                        help="Numbers of reader threads to measure (default: 0 1 4).")
+    parser.add_argument("--duration", type=float, default=1.0, help="Seconds per measurement (default: 1).")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    results = run(min_time=args.duration, repeat=1, neighbors=args.neighbors, readers=args.readers)
+    format_results(results)
+    if args.output:
+        save(args.output, report(results, "views"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Capture LLDP frames to pcap files
+
+`CaptureTap` tees the frames an `LLDPAgent` receives and/or sends into one or more sinks:
+
+    PcapWriter          buffered pcap writer with size and time based rotation
+    AsyncCaptureWriter  runs a `PcapWriter` in a background thread, the agent loop never waits for the disk
+    FrameRing           keeps the last N frames in memory and writes them to a pcap file on demand (e.g. on SIGUSR2)
+
+The files use the nanosecond pcap format and can be read with `lldp.pcap.read_capture()`, Wireshark or tcpdump.
+"""
+import collections
+import os
+import queue
+import signal
+import struct
+import threading
+import time
+
+from lldp.pcap import LINKTYPE_ETHERNET, PCAP_MAGIC_NS
+
+_file_header = struct.Struct("=IHHiIII")
+_record_header = struct.Struct("=IIII")
+
+
+class PcapWriter:
+    """Buffered pcap writer with size and time based rotation
+
+    Frames are written in the classic pcap format with nanosecond timestamps. Writes go through a file buffer of
+    `buffer_size` bytes, so most calls do not result in a system call.
+
+    If `max_bytes` or `max_seconds` is set, the writer starts a new file once the current one has grown beyond
+    `max_bytes` or has been open for longer than `max_seconds`. Rotated files are numbered, e.g. `lldp.pcap` is written
+    as `lldp.000000.pcap`, `lldp.000001.pcap` and so on. With `max_files` only the newest files are kept.
+
+    Parameters:
+        path (str): The capture file
+        max_bytes (int): Rotate after this many bytes. None disables size based rotation
+        max_seconds (float): Rotate after this many seconds. None disables time based rotation
+        max_files (int): Number of rotated files to keep. None keeps all files
+        buffer_size (int): Size of the write buffer in bytes
+        snaplen (int): Frames are truncated to this length
+    """
+
+    def __init__(self, path: str, max_bytes: int = None, max_seconds: float = None, max_files: int = None,
+                 buffer_size: int = 65536, snaplen: int = 65535):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.max_files = max_files
+        self.buffer_size = buffer_size
+        self.snaplen = snaplen
+        self.rotating = max_bytes is not None or max_seconds is not None
+        self.index = 0
+        self.files = collections.deque()
+        self.frames = 0
+        self.file = None
+        self._open()
+
+    def _filename(self) -> str:
+        if not self.rotating:
+            return self.path
+        root, ext = os.path.splitext(self.path)
+        return "{}.{:06d}{}".format(root, self.index, ext)
+
+    def _open(self):
+        filename = self._filename()
+        self.file = open(filename, "wb", buffering=self.buffer_size)
+        self.file.write(_file_header.pack(PCAP_MAGIC_NS, 2, 4, 0, 0, self.snaplen, LINKTYPE_ETHERNET))
+        self.size = _file_header.size
+        self.opened = time.monotonic()
+        self.files.append(filename)
+        if self.max_files is not None:
+            while len(self.files) > self.max_files:
+                try:
+                    os.remove(self.files.popleft())
+                except OSError:
+                    pass
+
+    def rotate(self):
+        """Close the current file and start the next one"""
+        self.file.close()
+        self.index += 1
+        self._open()
+
+    def write(self, timestamp: int, frame):
+        """Write a frame captured at `timestamp` (nanoseconds since the epoch)"""
+        if self.rotating and ((self.max_bytes is not None and self.size >= self.max_bytes) or
+                              (self.max_seconds is not None and time.monotonic() - self.opened >= self.max_seconds)):
+            self.rotate()
+        length = len(frame)
+        captured = min(length, self.snaplen)
+        seconds, nanoseconds = divmod(timestamp, 1000000000)
+        self.file.write(_record_header.pack(seconds, nanoseconds, captured, length))
+        self.file.write(frame[:captured])
+        self.size += _record_header.size + captured
+        self.frames += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class AsyncCaptureWriter:
+    """Hand frames to a `PcapWriter` running in a background thread
+
+    `AsyncCaptureWriter.write()` only appends to a bounded queue and never blocks. If the writer thread cannot keep up
+    and the queue is full, frames are dropped and counted in `dropped` instead of stalling the caller.
+
+    If the `PcapWriter` fails, e.g. with ENOSPC or when a rotated file cannot be created, the thread closes it and
+    stops. The error is kept in `error` and all further frames are counted as dropped.
+    """
+
+    _STOP = object()
+
+    def __init__(self, writer: PcapWriter, queue_size: int = 10000):
+        self.writer = writer
+        self.queue = queue.Queue(queue_size)
+        self.dropped = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="lldp-capture", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        get = self.queue.get
+        write = self.writer.write
+        try:
+            while True:
+                item = get()
+                if item is self._STOP:
+                    break
+                write(*item)
+                if self.queue.empty():
+                    self.writer.flush()
+        except Exception as e:
+            self.error = e
+        finally:
+            try:
+                self.writer.close()
+            except Exception as e:
+                if self.error is None:
+                    self.error = e
+
+    def write(self, timestamp: int, frame):
+        if self.error is not None:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait((timestamp, frame))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Write all queued frames and close the file
+
+        Waits at most `timeout` seconds for the writer thread. Frames left in the queue by a failed writer are counted
+        as dropped.
+        """
+        if self.thread.is_alive():
+            try:
+                self.queue.put(self._STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self.thread.join(timeout)
+        if not self.thread.is_alive():
+            self.dropped += self.queue.qsize()
+
+
+class FrameRing:
+    """In-memory ring buffer of the last `size` frames
+
+    The ring can be written to a pcap file at any time, e.g. from a signal handler, to see what happened right before
+    a problem occurred.
+    """
+
+    def __init__(self, size: int = 1000):
+        self.frames = collections.deque(maxlen=size)
+
+    def write(self, timestamp: int, frame):
+        self.frames.append((timestamp, bytes(frame)))
+
+    def dump(self, path: str) -> int:
+        """Write the buffered frames to `path`. Returns the number of frames written"""
+        frames = list(self.frames)
+        writer = PcapWriter(path)
+        try:
+            for timestamp, frame in frames:
+                writer.write(timestamp, frame)
+        finally:
+            writer.close()
+        return len(frames)
+
+    def install_signal_handler(self, path_prefix: str, signum=signal.SIGUSR2):
+        """Dump the ring to `<path_prefix>-<unix time>.pcap` whenever the process receives `signum`"""
+        def handler(signum, frame):
+            self.dump("{}-{}.pcap".format(path_prefix, int(time.time())))
+        signal.signal(signum, handler)
+
+
+class CaptureTap:
+    """Tee the frames received and/or sent by an `LLDPAgent`
+
+    Frames are passed to every configured sink, a writer (`PcapWriter` or `AsyncCaptureWriter`) and/or a `FrameRing`.
+    The agent uses the kernel receive timestamp for received frames if kernel timestamps are enabled.
+
+    Parameters:
+        writer: Object with `write(timestamp, frame)` and `close()` methods, or None
+        ring (FrameRing): Ring buffer of recent frames, or None
+        received (bool): Capture received LLDP frames
+        sent (bool): Capture sent LLDP frames
+    """
+
+    def __init__(self, writer=None, ring: FrameRing = None, received: bool = True, sent: bool = True):
+        self.sinks = [sink.write for sink in (writer, ring) if sink is not None]
+        self.writer = writer
+        self.ring = ring
+        self.capture_received = received
+        self.capture_sent = sent
+
+    def received(self, timestamp: int, frame):
+        if self.capture_received:
+            for write in self.sinks:
+                write(timestamp, frame)
+
+    def sent(self, timestamp: int, frame):
+        if self.capture_sent:
+            for write in self.sinks:
+                write(timestamp, frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
@@ -0,0 +1,38 @@
+LLDP_ETHERTYPE = b"\x88\xcc"
+
+NEAREST_BRIDGE = b"\x01\x80\xc2\x00\x00\x0e"
+NEAREST_NON_TPMR_BRIDGE = b"\x01\x80\xc2\x00\x00\x03"
+NEAREST_CUSTOMER_BRIDGE = b"\x01\x80\xc2\x00\x00\x00"
+
+
+def is_lldp_frame(data, local_mac: bytes = None) -> bool:
+    """Check if the Ethernet frame `data` carries an LLDPDU
+
+    Valid LLDP frames have an ethertype of 0x88CC, are directed to one of the LLDP multicast addresses
+    (01:80:c2:00:00:00, 01:80:c2:00:00:03 and 01:80:c2:00:00:0e) and, if `local_mac` is given, have not been sent
+    from that address.
+
+    Args:
+        data (bytes, bytearray or memoryview): The Ethernet frame
+        local_mac (bytes, optional): The MAC address of the local agent
+    """
+    if len(data) <= 14:
+        return False
+
+    # check destination address
+    if data[0] != 1 or data[1] != 128 or data[2] != 194 or data[3] != 0 or data[4] != 0:
+        return False
+    if not (data[5] == 14 or data[5] == 3 or data[5] == 0):
+        return False
+
+    # check ethertype
+    if data[12] != 136 or data[13] != 204:
+        return False
+
+    # check source address
+    return local_mac is None or data[6:12] != local_mac
+
+
+def lldp_frame(src_mac: bytes, lldpdu: bytes, destination: bytes = NEAREST_BRIDGE) -> bytes:
+    """Wrap a packed LLDPDU in an Ethernet frame"""
+    return destination + src_mac + LLDP_ETHERTYPE + lldpdu
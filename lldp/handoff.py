@@ -0,0 +1,203 @@
+"""Hot restart: hand the packet socket and the agent state over to a new process
+
+Restarting the agent normally closes its packet socket, dropping every frame that arrives until the new process has
+opened a new one, and starts with an empty neighbor table and a fresh announce schedule. For a hot restart the running
+agent listens on a Unix socket (`HandoffServer`). The new process connects (`take_over()`) and receives
+
+    * the packet socket file descriptors (SCM_RIGHTS), i.e. the very same kernel sockets with their receive queues,
+    * the interface name and the time of the last announce, so the announce schedule continues without a gap,
+    * the neighbor table, encoded as a neighbor batch (see `lldp.serialize`).
+
+The old agent hands over between two frames: everything it has read is fully processed, everything it has not read
+stays queued in the shared socket for the new process. Once the new process acknowledges, the old agent leaves its main
+loop, flushes its outputs and exits. If the handoff fails the old agent keeps running.
+
+Message format (little endian), sent by the old process:
+
+    offset  size  field
+    0       4     magic b"LLDH"
+    4       2     format version
+    6       2     number of file descriptors in the SCM_RIGHTS control message
+    8       8     time of the last announce (float, `time.monotonic()`)
+    16      2     length of the interface name
+    18      8     length of the neighbor batch
+    26      n     interface name (UTF-8)
+    26+n    m     neighbor batch
+
+The new process answers with a single acknowledgement byte, once it has set up everything it needs to continue (its own
+listener and agent). Until then the old agent keeps its state; if the new process closes the connection instead, the old
+agent continues.
+
+All times are `time.monotonic()` values, which are shared by all processes of a host.
+"""
+import array
+import os
+import socket
+import struct
+
+from lldp.neighbors import NeighborTable
+from lldp.serialize import decode_table, encode_neighbors
+
+MAGIC = b"LLDH"
+VERSION = 1
+MAX_FDS = 16
+
+_header = struct.Struct("<4sHHdHQ")
+_ACK = b"\x01"
+
+
+class HandoffState:
+    """State received from the previous agent process
+
+    Attributes:
+        sockets (list): The packet sockets of the previous process
+        interface_name (str): Name of the local interface
+        last_announce (float): `time.monotonic()` value of the last announce
+        neighbors (NeighborTable): The neighbor table
+    """
+
+    def __init__(self, sockets: list, interface_name: str, last_announce: float, neighbors: NeighborTable,
+                 connection: socket.socket = None):
+        self.sockets = sockets
+        self.interface_name = interface_name
+        self.last_announce = last_announce
+        self.neighbors = neighbors
+        self._connection = connection
+
+    def acknowledge(self):
+        """Tell the previous process that the handoff succeeded, it then stops. Raises an `OSError` if that fails"""
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            connection.sendall(_ACK)
+        finally:
+            connection.close()
+
+    def abort(self):
+        """Close the received sockets without acknowledging, so the previous process keeps running"""
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
+        for s in self.sockets:
+            s.close()
+
+
+class HandoffServer:
+    """Unix socket a new agent process connects to in order to take over
+
+    The socket is bound under a temporary name and renamed to `path`, so a new process can replace the listener of the
+    process it took over from without a window in which `path` does not exist. `HandoffServer.close()` only removes
+    `path` if it still refers to this listener.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        temporary = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            os.unlink(temporary)
+        except FileNotFoundError:
+            pass
+        try:
+            self.socket.bind(temporary)
+            self.socket.listen(1)
+            self._inode = os.stat(temporary).st_ino
+            os.replace(temporary, path)
+        except OSError:
+            self.socket.close()
+            raise
+
+    def fileno(self) -> int:
+        return self.socket.fileno()
+
+    def accept(self) -> socket.socket:
+        connection, _ = self.socket.accept()
+        connection.settimeout(self.timeout)
+        return connection
+
+    def close(self):
+        self.socket.close()
+        try:
+            if os.stat(self.path).st_ino == self._inode:
+                os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def send_state(connection: socket.socket, sockets: list, interface_name: str, last_announce: float,
+               neighbors: NeighborTable) -> bool:
+    """Send the sockets and the agent state over `connection` and wait for the acknowledgement
+
+    Returns True if the new process acknowledged the handoff. Raises an `OSError` if sending fails.
+    """
+    name = interface_name.encode("utf-8")
+    batch = encode_neighbors(neighbors)
+    fds = array.array("i", [s.fileno() for s in sockets])
+    header = _header.pack(MAGIC, VERSION, len(fds), last_announce, len(name), len(batch)) + name
+    connection.sendmsg([header], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds.tobytes())])
+    connection.sendall(batch)
+    try:
+        return _recv_exactly(connection, 1) == _ACK
+    except ValueError:
+        # the new process closed the connection without acknowledging
+        return False
+
+
+def take_over(path: str, interface_name: str = None, timeout: float = 5.0, acknowledge: bool = True) -> HandoffState:
+    """Connect to the agent listening on `path` and take over its sockets and state
+
+    Parameters:
+        interface_name (str): The interface the new agent runs on. A handoff of another interface is rejected without
+            acknowledging it
+        acknowledge (bool): Acknowledge the handoff right away. Otherwise the caller sets up its agent first and then
+            calls `HandoffState.acknowledge()`, or `HandoffState.abort()` if that fails; the previous process keeps
+            running until then (up to its `HandoffServer.timeout`)
+
+    Raises an `OSError` if the connection fails and a `ValueError` if the message is invalid or for another interface.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(timeout)
+    sockets = []
+    try:
+        connection.connect(path)
+        data, ancdata, _, _ = connection.recvmsg(_header.size, socket.CMSG_SPACE(MAX_FDS * array.array("i").itemsize))
+        fds = array.array("i")
+        for level, kind, value in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(value[:len(value) - len(value) % fds.itemsize])
+        # wrap the descriptors right away, so they are closed if anything below fails
+        sockets = [socket.socket(fileno=fd) for fd in fds]
+
+        data += _recv_exactly(connection, _header.size - len(data))
+        magic, version, count, last_announce, name_length, batch_length = _header.unpack(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not an LLDP agent handoff or unsupported version")
+        if count != len(sockets):
+            raise ValueError("Expected {} sockets, received {}".format(count, len(sockets)))
+        name = _recv_exactly(connection, name_length).decode("utf-8")
+        if interface_name is not None and name != interface_name:
+            raise ValueError("The running agent uses interface '{}'".format(name))
+        neighbors = decode_table(_recv_exactly(connection, batch_length))
+        state = HandoffState(sockets, name, last_announce, neighbors, connection)
+        if acknowledge:
+            state.acknowledge()
+    except BaseException:
+        for s in sockets:
+            s.close()
+        connection.close()
+        raise
+    return state
+
+
+def _recv_exactly(connection: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = connection.recv_into(view[received:])
+        if n == 0:
+            raise ValueError("Connection closed during handoff")
+        received += n
+    return bytes(buffer)
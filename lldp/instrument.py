@@ -0,0 +1,114 @@
+import signal
+import sys
+import time
+
+
+class LatencyHistogram:
+    """Latency histogram with fixed power-of-two nanosecond buckets
+
+    Bucket `i` counts durations `d` with `2**(i-1) <= d < 2**i` nanoseconds, i.e. the bucket index is simply
+    `d.bit_length()`. Recording a duration therefore needs no search and no allocation. Durations of 2**(BUCKETS-1) ns
+    (about 4.3 s) or more all end up in the last bucket.
+    """
+    __slots__ = ("counts", "total", "count", "max")
+
+    BUCKETS = 33
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self.count = 0
+        self.max = 0
+
+    def record(self, duration_ns: int):
+        """Record a duration given in nanoseconds"""
+        self.counts[min(duration_ns.bit_length(), self.BUCKETS - 1)] += 1
+        self.total += duration_ns
+        self.count += 1
+        if duration_ns > self.max:
+            self.max = duration_ns
+
+    def percentile(self, p: float) -> int:
+        """Return an upper bound (in ns) for the `p`-th percentile, 0 < p <= 100"""
+        if self.count == 0:
+            return 0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(1 << i, self.max) if i > 0 else 0
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self.count = 0
+        self.max = 0
+
+
+class StageTimer:
+    """Per-stage timing instrumentation
+
+    The agent marks the stages of its receive and announce paths (select, recv, classify, decode, the individual TLV
+    constructors, neighbor update, log and announce). For each stage a `LatencyHistogram` is kept.
+
+    Instrumentation is enabled by passing a `StageTimer` to the `LLDPAgent`. Without one the agent skips all timing
+    calls, so disabled instrumentation costs a single `is None` check per stage.
+
+    Example:
+        >>> timer = StageTimer()
+        >>> record = timer.probe("decode")
+        >>> t0 = timer.clock()
+        >>> ...
+        >>> record(t0)
+        >>> print(timer.dump())
+    """
+
+    clock = staticmethod(time.perf_counter_ns)
+
+    def __init__(self):
+        self.histograms = {}
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        """Get (or create) the histogram of `stage`"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        return histogram
+
+    def probe(self, stage: str):
+        """Return a callable `record(t0)` that records the time elapsed since `t0` for `stage`
+
+        `t0` has to be taken with `StageTimer.clock()`. Probes should be created once, outside of hot loops.
+        """
+        record = self.histogram(stage).record
+        clock = self.clock
+
+        def probe(t0):
+            record(clock() - t0)
+        return probe
+
+    def reset(self):
+        """Clear all recorded timings"""
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def dump(self) -> str:
+        """Return a table with count, mean, p50, p99 and maximum latency of every stage"""
+        lines = ["{:<32} {:>10} {:>12} {:>12} {:>12} {:>12}".format(
+            "stage", "count", "mean[us]", "p50[us]", "p99[us]", "max[us]")]
+        for stage in sorted(self.histograms):
+            h = self.histograms[stage]
+            if h.count == 0:
+                continue
+            lines.append("{:<32} {:>10} {:>12.2f} {:>12.2f} {:>12.2f} {:>12.2f}".format(
+                stage, h.count, h.total / h.count / 1000, h.percentile(50) / 1000, h.percentile(99) / 1000,
+                h.max / 1000))
+        return "\n".join(lines)
+
+    def install_signal_handler(self, signum=signal.SIGUSR1, out=None):
+        """Dump the timings to `out` (stderr by default) whenever the process receives `signum`"""
+        def handler(signum, frame):
+            print(self.dump(), file=sys.stderr if out is None else out, flush=True)
+        signal.signal(signum, handler)
@@ -0,0 +1,204 @@
+"""One agent per network interface, following the interfaces as they come and go
+
+`InterfaceManager` runs an `LLDPAgent` for every Ethernet interface that is up and whose name matches one of the
+configured patterns. The interfaces are taken from a `LinkMonitor` (see `lldp.netlink`): the manager starts with its
+dump and then follows its notifications, so
+
+    * an interface that appears or comes up gets an agent, which announces right away (fast start),
+    * an interface that goes down or disappears loses its agent, together with its neighbors,
+    * an agent whose interface changes its MAC address or name is replaced by a new one.
+
+All agents share the manager's scheduler and are driven by a single loop, which waits for frames on all agent sockets
+and the netlink socket at once. Sockets are registered with a `selectors` selector (epoll on Linux) when an agent is
+added, so the cost of a wakeup does not grow with the number of interfaces.
+"""
+import selectors
+import socket
+import zlib
+from collections import deque
+from fnmatch import fnmatch
+
+from .agent import STRINGS_SWEEP_INTERVAL, StdoutLogger
+from .query import QueryResult, query
+from .scheduler import Scheduler
+from .tlv.intern import STRINGS
+
+
+def partition_of(name: str, count: int) -> int:
+    """The partition out of `count` the interface named `name` belongs to. Stable across processes and restarts"""
+    return zlib.crc32(name.encode("utf-8")) % count
+
+
+class InterfaceManager:
+    """Runs and maintains the agents of all matching interfaces
+
+    Parameters:
+        factory: Called as `factory(link, scheduler)` to create the agent of a `Link`. It has to pass `scheduler` on
+            to the `LLDPAgent`
+        links (LinkMonitor): Source of the interfaces and their changes
+        patterns (sequence of str): Shell-style patterns of the interface names to run agents on, all Ethernet
+            interfaces by default
+        partition (tuple): `(number, count)` to only run agents on the interfaces whose name hashes to `number` out of
+            `count` partitions, so that several managers (see `lldp.supervisor`) split the interfaces between them
+        logger: A logger instance. Used for testing
+
+    Attributes:
+        agents (dict): The running agents by interface index
+    """
+
+    def __init__(self, factory, links, patterns=("*",), partition=None, logger=None):
+        self.factory = factory
+        self.links = links
+        self.patterns = tuple(patterns)
+        self.partition = partition
+        self.logger = StdoutLogger() if logger is None else logger
+        self.scheduler = Scheduler()
+        self.agents = {}
+        self.running = False
+        self._selector = selectors.DefaultSelector()
+        # neighbor tables a reader requested a new view of
+        self._pending = deque()
+        self._wakeup = None
+
+    def wanted(self, link) -> bool:
+        """True if `link` should have an agent"""
+        if not (link.ethernet and link.up and any(fnmatch(link.name, pattern) for pattern in self.patterns)):
+            return False
+        if self.partition is not None:
+            number, count = self.partition
+            return partition_of(link.name, count) == number
+        return True
+
+    def neighbors(self):
+        """Iterate the neighbors of all agents"""
+        for agent in list(self.agents.values()):
+            yield from agent.neighbors
+
+    def query(self, timeout: float = 0.0, **filters) -> QueryResult:
+        """Find neighbors of all agents by their attributes, see `lldp.query.query()` for the filters
+
+        Safe to call from any thread. Every agent's table is read through `NeighborTable.snapshot(timeout)`.
+        """
+        agents = list(self.agents.values())
+        interface = filters.get("interface")
+        if interface is not None:
+            # every agent only sees neighbors on its own interface
+            agents = [agent for agent in agents if agent.interface_name == interface]
+        return query([agent.neighbors.snapshot(timeout) for agent in agents], **filters)
+
+    def update(self, changes):
+        """Add, replace and remove agents according to a list of (old, new) `Link` changes"""
+        for old, new in changes:
+            index = old.index if new is None else new.index
+            agent = self.agents.get(index)
+            if new is None or not self.wanted(new):
+                if agent is not None:
+                    # the interface is gone or down, a shutdown LLDPDU is attempted anyway
+                    self.remove(index)
+            elif agent is None:
+                self.add(new)
+            elif agent.mac_address != new.mac or agent.interface_name != new.name:
+                # the MAC address and the interface name are part of every announce
+                self.remove(index)
+                self.add(new)
+
+    def add(self, link):
+        """Start an agent for `link`. Failures, e.g. for an interface that disappeared meanwhile, are logged"""
+        try:
+            agent = self.factory(link, self.scheduler)
+        except OSError as e:
+            self.logger.log("Cannot start agent on {}: {}".format(link.name, e))
+            return None
+        self.agents[link.index] = agent
+        agent.running = True
+        agent.start(sweep_strings=False)
+        agent.neighbors.on_request = self._request
+        self._selector.register(agent.socket, selectors.EVENT_READ, agent.receiver())
+        return agent
+
+    def remove(self, index: int):
+        """Stop the agent of the interface with index `index` and drop its neighbors"""
+        agent = self.agents.pop(index)
+        self._selector.unregister(agent.socket)
+        agent.running = False
+        agent.close()
+        agent.count_neighbors(0)
+        return agent
+
+    def run(self):
+        """Manager loop
+
+        Starts the agents of the interfaces found by a link dump and runs their timers and frame handlers until
+        `InterfaceManager.stop()` is called. All agents send their shutdown LLDPDU when the loop exits, and the link
+        monitor is closed.
+        """
+        self.running = True
+        scheduler = self.scheduler
+        links = self.links
+        selector = self._selector
+        wakeup, self._wakeup = socket.socketpair()
+        wakeup.setblocking(False)
+        self._wakeup.setblocking(False)
+        selector.register(wakeup, selectors.EVENT_READ, None)
+        selector.register(links, selectors.EVENT_READ, None)
+        # the agents share the string interner, sweep it once for all of them
+        sweep = scheduler.call_every(STRINGS_SWEEP_INTERVAL, self.sweep_strings)
+        try:
+            self.update(links.dump())
+            while self.running:
+                scheduler.run_due()
+                for key, _ in selector.select(scheduler.timeout()):
+                    sock = key.fileobj
+                    if sock is wakeup:
+                        wakeup.recv(64)
+                    elif sock is links:
+                        self.update(links.read())
+                    elif sock.fileno() >= 0:
+                        # the agent is gone if a link change handled before closed its socket
+                        try:
+                            key.data(sock)
+                        except OSError as e:
+                            # e.g. ENETDOWN, the link notification removing the agent follows
+                            self.logger.log("Receiving failed: {}".format(e))
+                pending = self._pending
+                while pending:
+                    pending.popleft().publish_pending()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.running = False
+            scheduler.cancel(sweep)
+            for index in list(self.agents):
+                self.remove(index)
+            selector.close()
+            links.close()
+            self._wakeup.close()
+            self._wakeup = None
+            wakeup.close()
+
+    def sweep_strings(self):
+        """Sweep the string interner shared by the agents and update their interner gauges"""
+        STRINGS.sweep()
+        for agent in self.agents.values():
+            agent.count_strings()
+
+    def stop(self):
+        """Stop the manager loop
+
+        May be called from another thread or a signal handler.
+        """
+        self.running = False
+        self._wake()
+
+    def _request(self, table):
+        """Called by a reader thread requesting a new view of `table`, see `NeighborTable.snapshot()`"""
+        self._pending.append(table)
+        self._wake()
+
+    def _wake(self):
+        wakeup = self._wakeup
+        if wakeup is not None:
+            try:
+                wakeup.send(b"\x00")
+            except OSError:
+                pass
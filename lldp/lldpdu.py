@@ -35,15 +35,16 @@ class LLDPDU:
 
     def __bytes__(self) -> bytes:
         """Get the byte representation of the LLDPDU"""
-        res = b""
-        for tlv in self.__tlvs:
-            res += bytes(tlv)
-        return res
+        return b"".join([bytes(tlv) for tlv in self.__tlvs])
 
     def __getitem__(self, item: int) -> TLV:
         """Get the TLV at position `item`"""
         return self.__tlvs[item]
 
+    def __iter__(self):
+        """Iterate over the TLVs of the LLDPDU"""
+        return iter(self.__tlvs)
+
     def __repr__(self):
         """Return a representation of the LLDPDU"""
         return "{}({})".format(self.__class__.__name__, repr(self.__tlvs))
@@ -52,6 +53,12 @@ class LLDPDU:
         """Return a printable representation of the LLDPDU"""
         return repr(self)
 
+    def __reduce__(self):
+        """Pickle the LLDPDU as its byte representation instead of the TLV objects"""
+        if not self.__tlvs:
+            return LLDPDU, ()
+        return LLDPDU.from_bytes, (bytes(self),)
+
     def append(self, tlv: TLV):
         """Append `tlv` to the LLDPDU
 
@@ -121,11 +128,13 @@ class LLDPDU:
             return False
 
     @staticmethod
-    def from_bytes(data: bytes):
+    def from_bytes(data: bytes, timer=None):
         """Create an LLDPDU instance from raw bytes.
 
         Args:
             data (bytes or bytearray): The packed LLDPDU
+            timer (StageTimer, optional): If given, the time spent in each TLV constructor is recorded under the stage
+                "tlv.<TLV class name>"
 
         Raises a value error if the provided TLV is of unknown type. Apart from that validity checks are left to the
         subclass.
@@ -145,6 +154,8 @@ class LLDPDU:
                 length += 256
             next_current_byte = current_byte + 2 + length
             tlv = None
+            if timer is not None:
+                t0 = timer.clock()
             # call TLV constructor depending on the TLV-type
             if type == TLV.Type.CHASSIS_ID:
                 tlv = ChassisIdTLV.from_bytes(data[current_byte:next_current_byte])
@@ -168,6 +179,8 @@ class LLDPDU:
                 tlv = PortDescriptionTLV.from_bytes(data[current_byte:next_current_byte])
             elif type == TLV.Type.SYSTEM_CAPABILITIES:
                 tlv = SystemCapabilitiesTLV.from_bytes(data[current_byte:next_current_byte])
+            if timer is not None and tlv is not None:
+                timer.histogram("tlv." + tlv.__class__.__name__).record(timer.clock() - t0)
 
             lldpu.append(tlv)
             current_byte = next_current_byte
@@ -0,0 +1,236 @@
+"""LLDP traffic load generator and capture replay tool
+
+Generate LLDP frames for a number of synthetic neighbors at a target rate:
+
+    sudo python3 -m lldp.loadgen generate --interface veth1 --neighbors 1000 --rate 5000 --duration 60
+
+Replay a recorded capture, at its original timing or time-compressed:
+
+    sudo python3 -m lldp.loadgen replay capture.pcap --interface veth1 --speed 10
+
+Instead of a network interface, `--inprocess` runs an `LLDPAgent` inside the tool and feeds it through a Unix socket
+pair. The agent's counters are printed at the end.
+"""
+import argparse
+import socket
+import sys
+import threading
+import time
+
+from lldp.agent import LLDPAgent
+from lldp.pcap import read_capture
+from lldp.traffic import lldp_frame, neighbor_lldpdu, synthetic_mac
+
+
+class RawSocketTransport:
+    """Send frames on a network interface (e.g. one end of a veth pair) through a packet socket"""
+
+    def __init__(self, interface: str):
+        self.socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(0x0003))
+        self.socket.bind((interface, 0x0003))
+
+    def send(self, frame):
+        self.socket.send(frame)
+
+    def close(self):
+        self.socket.close()
+
+
+class InProcessTransport:
+    """Deliver frames to an `LLDPAgent` running in a thread of this process
+
+    The agent reads from one end of a Unix datagram socket pair, frames are sent into the other end.
+    """
+
+    class _NullLogger:
+        def log(self, msg):
+            pass
+
+    def __init__(self, mac_address: bytes = b"\x02\xff\x00\x00\x00\x01"):
+        self.socket, agent_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.agent = LLDPAgent(mac_address, interface_name="loadgen0", sock=agent_socket, logger=self._NullLogger())
+        self.thread = threading.Thread(target=self.agent.run, name="lldp-agent", daemon=True)
+        self.thread.start()
+
+    def send(self, frame):
+        self.socket.send(frame)
+
+    def close(self):
+        # Let the agent catch up with the queued frames before stopping it
+        received = self.agent.metrics.frames_received
+        last = -1
+        while received.value != last:
+            last = received.value
+            time.sleep(0.1)
+        self.agent.stop()
+        self.thread.join()
+        self.socket.close()
+
+
+class LoadGenerator:
+    """Send LLDP frames for `neighbors` synthetic neighbors at `rate` frames per second
+
+    The frame of every neighbor is encoded once up front. Neighbors announce round-robin.
+
+    To simulate flapping links, a fraction of the neighbors can be silenced periodically: for every other
+    `flap_period` seconds the first `flap_fraction` of the neighbors do not send any frames. Combined with a short TTL,
+    this makes them expire and reappear at the receiving agent.
+
+    Parameters:
+        transport: Object with a `send(frame)` method
+        neighbors (int): Number of synthetic neighbors
+        rate (float): Target frame rate in frames per second
+        ttl (int): TTL announced by the neighbors
+        flap_fraction (float): Fraction of neighbors that flap, 0 disables flapping
+        flap_period (float): Seconds a flapping neighbor is up respectively down
+    """
+
+    def __init__(self, transport, neighbors: int = 100, rate: float = 100.0, ttl: int = 120,
+                 flap_fraction: float = 0.0, flap_period: float = 10.0):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        if neighbors <= 0:
+            raise ValueError("Number of neighbors must be positive")
+        self.transport = transport
+        self.rate = rate
+        self.templates = [lldp_frame(synthetic_mac(i), bytes(neighbor_lldpdu(i, ttl))) for i in range(neighbors)]
+        self.flapping = int(neighbors * flap_fraction)
+        self.flap_period = flap_period
+
+    def run(self, duration: float = None, count: int = None) -> int:
+        """Send frames until `duration` seconds have passed or `count` frames were sent (whichever is first)
+
+        Returns the number of frames sent.
+        """
+        send = self.transport.send
+        templates = self.templates
+        n = len(templates)
+        index = 0
+        # frame slots of the target rate that have passed, the slots of silenced neighbors are given to the others
+        # unless all neighbors are silenced
+        slots = 0
+        sent = 0
+        start = time.monotonic()
+        while True:
+            now = time.monotonic()
+            elapsed = now - start
+            if duration is not None and elapsed >= duration:
+                break
+            if count is not None and sent >= count:
+                break
+
+            # Send everything that is due according to the target rate, then sleep until the next frame is due
+            due = int(elapsed * self.rate) + 1 - slots
+            if count is not None:
+                due = min(due, count - sent)
+            flapped_down = self.flapping and int(elapsed / self.flap_period) % 2 == 1
+            if flapped_down and self.flapping >= n:
+                slots += due
+                due = 0
+            for _ in range(due):
+                if flapped_down and index < self.flapping:
+                    index = self.flapping
+                send(templates[index])
+                sent += 1
+                slots += 1
+                index = (index + 1) % n
+            delay = (slots / self.rate) - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(min(delay, 0.01))
+        return sent
+
+
+def replay(path: str, transport, speed: float = 1.0, lldp_only: bool = False) -> int:
+    """Replay the frames of a capture file
+
+    Parameters:
+        path (str): The capture file (pcap or pcapng)
+        transport: Object with a `send(frame)` method
+        speed (float): Time compression factor, e.g. 10 replays ten times faster than recorded. 0 sends as fast as
+            possible
+        lldp_only (bool): Skip frames that are not LLDP frames
+
+    Returns the number of frames sent.
+    """
+    sent = 0
+    first = None
+    start = time.monotonic()
+    for timestamp, _, frame in read_capture(path):
+        if lldp_only and frame[12:14] != b"\x88\xcc":
+            continue
+        if speed > 0:
+            if first is None:
+                first = timestamp
+            delay = (timestamp - first) / 1e9 / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        transport.send(bytes(frame))
+        sent += 1
+    return sent
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("must be positive: {}".format(value))
+    return number
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lldp.loadgen", description="LLDP load generator.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    generate = commands.add_parser("generate", help="Send frames of synthetic neighbors at a target rate.")
+    generate.add_argument("--neighbors", type=_positive_int, default=100,
+                          help="Number of synthetic neighbors (default: 100).")
+    generate.add_argument("--rate", type=float, default=100.0, help="Frames per second (default: 100).")
+    generate.add_argument("--duration", type=float, help="Stop after this many seconds.")
+    generate.add_argument("--count", type=int, help="Stop after this many frames.")
+    generate.add_argument("--ttl", type=int, default=120, help="TTL announced by the neighbors (default: 120).")
+    generate.add_argument("--flap-fraction", type=float, default=0.0,
+                          help="Fraction of neighbors that periodically go silent (default: 0).")
+    generate.add_argument("--flap-period", type=float, default=10.0,
+                          help="Seconds flapping neighbors stay up or down (default: 10).")
+
+    replay_parser = commands.add_parser("replay", help="Replay a pcap or pcapng capture.")
+    replay_parser.add_argument("capture", help="The capture file.")
+    replay_parser.add_argument("--speed", type=float, default=1.0,
+                               help="Time compression factor, 0 for as fast as possible (default: 1).")
+    replay_parser.add_argument("--lldp-only", action="store_true", help="Only replay LLDP frames.")
+
+    for sub in (generate, replay_parser):
+        target = sub.add_mutually_exclusive_group(required=True)
+        target.add_argument("--interface", help="Send on this network interface (e.g. a veth).")
+        target.add_argument("--inprocess", action="store_true", help="Feed an agent running in this process.")
+
+    args = parser.parse_args(argv)
+    if args.command == "generate" and args.duration is None and args.count is None:
+        parser.error("generate needs --duration or --count")
+
+    transport = InProcessTransport() if args.inprocess else RawSocketTransport(args.interface)
+    start = time.monotonic()
+    try:
+        if args.command == "generate":
+            sent = LoadGenerator(transport, args.neighbors, args.rate, args.ttl, args.flap_fraction,
+                                 args.flap_period).run(args.duration, args.count)
+        else:
+            sent = replay(args.capture, transport, args.speed, args.lldp_only)
+    except KeyboardInterrupt:
+        sent = None
+    finally:
+        elapsed = time.monotonic() - start
+        transport.close()
+
+    if sent is not None:
+        print("Sent {} frames in {:.2f}s ({:.0f} frames/s)".format(sent, elapsed, sent / elapsed if elapsed else 0))
+    if args.inprocess:
+        metrics = transport.agent.metrics
+        print("Agent: {} received, {} dropped, {} decode errors, {} neighbors".format(
+            metrics.frames_received.value, metrics.frames_dropped.value, metrics.decode_errors.value,
+            len(transport.agent.neighbors)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+class Counter:
+    """Monotonically increasing counter
+
+    Counters are meant to be bound once and then incremented on the hot path, e.g.
+
+        frames_received = metrics.frames_received.inc
+        ...
+        frames_received()
+
+    Incrementing a counter is a single attribute update, there are no lookups by name involved.
+    """
+    __slots__ = ("name", "help", "value")
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        """Increment the counter by `amount`"""
+        self.value += amount
+
+    def get(self):
+        """The value as a picklable object, e.g. to send it to another process"""
+        return self.value
+
+    def merge(self, values):
+        """Set the counter to the sum of `values` returned by `get()` of counters in other processes"""
+        self.value = sum(values)
+
+    def samples(self):
+        """Yield (suffix, labels, value) tuples for the exposition format"""
+        yield "_total", "", self.value
+
+
+class Gauge:
+    """A value that may go up and down, e.g. the number of known neighbors"""
+    __slots__ = ("name", "help", "value")
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def get(self):
+        return self.value
+
+    def merge(self, values):
+        self.value = sum(values)
+
+    def samples(self):
+        yield "", "", self.value
+
+
+class Histogram:
+    """Histogram with a fixed set of bucket upper bounds
+
+    Buckets are stored non-cumulatively, so an observation touches exactly one bucket. The cumulative counts required
+    by the Prometheus exposition format are only computed when rendering.
+
+    Parameters:
+        name (str): The metric name
+        help (str): Help text
+        buckets (sequence of float): Sorted upper bounds of the buckets. An implicit +Inf bucket is always added.
+    """
+    __slots__ = ("name", "help", "bounds", "counts", "sum", "count")
+
+    kind = "histogram"
+
+    DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                       0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self, name: str, help: str = "", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Record a single observation"""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get(self):
+        return self.counts[:], self.sum, self.count
+
+    def merge(self, values):
+        counts = [0] * len(self.counts)
+        total = 0.0
+        count = 0
+        for other_counts, other_sum, other_count in values:
+            for i, value in enumerate(other_counts):
+                counts[i] += value
+            total += other_sum
+            count += other_count
+        # replaced at once, rendering may happen concurrently
+        self.counts, self.sum, self.count = counts, total, count
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            yield "_bucket", 'le="{}"'.format(_format_value(bound)), cumulative
+        yield "_bucket", 'le="+Inf"', self.count
+        yield "_sum", "", self.sum
+        yield "_count", "", self.count
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class Registry:
+    """A collection of metrics that can be rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        """Add `metric` to the registry and return it"""
+        if any(m.name == metric.name for m in self.metrics):
+            raise ValueError("Duplicate metric name: {}".format(metric.name))
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self.register(Counter(name, help))
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self.register(Gauge(name, help))
+
+    def histogram(self, name: str, help: str = "", buckets=Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, buckets))
+
+    def values(self) -> list:
+        """The values of all metrics in registration order, see `Counter.get()`"""
+        return [metric.get() for metric in self.metrics]
+
+    def render(self) -> str:
+        """Render all registered metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            if metric.help:
+                lines.append("# HELP {} {}".format(metric.name, metric.help))
+            lines.append("# TYPE {} {}".format(metric.name, metric.kind))
+            for suffix, labels, value in metric.samples():
+                if labels:
+                    lines.append("{}{}{{{}}} {}".format(metric.name, suffix, labels, _format_value(value)))
+                else:
+                    lines.append("{}{} {}".format(metric.name, suffix, _format_value(value)))
+        return "\n".join(lines) + "\n"
+
+
+class AgentMetrics:
+    """The metrics maintained by an `LLDPAgent`
+
+    Each metric is available as an attribute so the agent can bind it once instead of looking it up per frame.
+
+    Attributes:
+        frames_received (Counter): Frames read from the socket
+        frames_dropped (Counter): Frames discarded by the LLDP destination/ethertype/source filter
+        decode_errors (Counter): LLDP frames that could not be decoded
+        frames_sent (Counter): LLDP frames sent by the agent
+        announces_deferred (Counter): Announces delayed because the transmit credit was used up
+        neighbors (Gauge): Number of currently known neighbors
+        decode_latency (Histogram): Time spent decoding an LLDPDU, in seconds
+        announce_jitter (Histogram): Deviation of the actual from the scheduled announce time, in seconds
+        arrival_to_decoded (Histogram): Time from kernel arrival of a frame to its decoded LLDPDU, in seconds.
+            Only recorded if kernel timestamps are enabled
+        arrival_to_neighbor (Histogram): Time from kernel arrival of a frame to the updated neighbor entry, in
+            seconds. Only recorded if kernel timestamps are enabled
+        kernel_packets (Counter): Frames the kernel accepted for the socket (PACKET_STATISTICS tp_packets)
+        kernel_drops (Counter): Frames the kernel dropped because the receive queue was full (tp_drops)
+        receive_buffer (Gauge): Current receive buffer size of the socket in bytes
+        receive_queue (Gauge): Bytes waiting in the socket's receive queue
+        intern_entries (Gauge): Number of distinct TLV strings in the string interner
+        intern_hit_ratio (Gauge): Fraction of decoded TLV strings found in the string interner
+        intern_saved_bytes (Gauge): Memory not allocated thanks to string interning, in bytes
+    """
+
+    FRAME_LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                             0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, registry: Registry = None):
+        self.registry = Registry() if registry is None else registry
+        r = self.registry
+        self.frames_received = r.counter("lldp_frames_received", "Frames received on the LLDP socket")
+        self.frames_dropped = r.counter("lldp_frames_dropped", "Frames dropped by the LLDP frame filter")
+        self.decode_errors = r.counter("lldp_decode_errors", "LLDP frames that failed to decode")
+        self.frames_sent = r.counter("lldp_frames_sent", "LLDP frames sent")
+        self.announces_deferred = r.counter("lldp_announces_deferred",
+                                            "Announces delayed because the transmit credit was used up")
+        self.neighbors = r.gauge("lldp_neighbors", "Number of known LLDP neighbors")
+        self.decode_latency = r.histogram("lldp_decode_latency_seconds", "Time spent decoding an LLDPDU",
+                                          (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                                           0.0025, 0.005, 0.01))
+        self.announce_jitter = r.histogram("lldp_announce_jitter_seconds",
+                                           "Deviation of the actual announce time from the scheduled one",
+                                           (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+        self.arrival_to_decoded = r.histogram("lldp_frame_arrival_to_decoded_seconds",
+                                              "Time from kernel arrival of a frame to the decoded LLDPDU",
+                                              self.FRAME_LATENCY_BUCKETS)
+        self.arrival_to_neighbor = r.histogram("lldp_frame_arrival_to_neighbor_seconds",
+                                               "Time from kernel arrival of a frame to the updated neighbor entry",
+                                               self.FRAME_LATENCY_BUCKETS)
+        self.kernel_packets = r.counter("lldp_kernel_packets", "Frames queued on the socket by the kernel")
+        self.kernel_drops = r.counter("lldp_kernel_drops", "Frames dropped by the kernel due to a full receive queue")
+        self.receive_buffer = r.gauge("lldp_socket_receive_buffer_bytes", "Receive buffer size of the socket")
+        self.receive_queue = r.gauge("lldp_socket_receive_queue_bytes", "Bytes waiting in the socket receive queue")
+        self.intern_entries = r.gauge("lldp_string_intern_entries", "Distinct TLV strings in the string interner")
+        self.intern_hit_ratio = r.gauge("lldp_string_intern_hit_ratio",
+                                        "Fraction of decoded TLV strings found in the string interner")
+        self.intern_saved_bytes = r.gauge("lldp_string_intern_saved_bytes",
+                                          "Memory not allocated thanks to string interning")
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """HTTP server exposing a `Registry` in the Prometheus text format
+
+    The server runs in a daemon thread and answers `GET /metrics`. Rendering happens in the server thread, so the
+    agent loop is never blocked by a scrape.
+
+    Parameters:
+        registry (Registry): The metrics to expose
+        host (str): Address to listen on. Defaults to localhost only
+        port (int): Port to listen on. 0 picks a free port, see `MetricsServer.address`
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, registry: Registry, host: str = "127.0.0.1", port: int = 9198):
+        self.registry = registry
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = server.registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", MetricsServer.CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = _ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def address(self):
+        """The (host, port) tuple the server is listening on"""
+        return self.httpd.server_address
+
+    def start(self):
+        """Start serving in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="lldp-metrics", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and close its socket"""
+        if self.thread is not None:
+            self.httpd.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.httpd.server_close()
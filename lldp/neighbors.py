@@ -0,0 +1,377 @@
+import heapq
+import threading
+import time
+
+from lldp.lldpdu import LLDPDU
+
+# Number of shards of a NeighborTable. A write after a view was published copies one shard, not the whole table
+SHARDS = 64
+
+# Width in seconds of the buckets of the expiry wheel of a NeighborTable
+EXPIRY_BUCKET = 1.0
+
+
+class Neighbor:
+    """A remote LLDP agent as seen by the local agent
+
+    A neighbor is identified by its MSAP (MAC service access point) identifier, i.e. the combination of its chassis ID
+    and port ID. The packed Chassis ID and Port ID TLVs are used as key.
+
+    Attributes:
+        key (bytes): The MSAP identifier
+        lldpdu (LLDPDU): The most recently received LLDPDU
+        interface (str): Name of the local interface the neighbor was seen on
+        ttl (int): The TTL announced in the most recent LLDPDU
+        deadline (float): `time.monotonic()` value after which the neighbor expires
+        first_seen (float): `time.monotonic()` value of the first LLDPDU
+        last_seen (float): `time.monotonic()` value of the most recent LLDPDU
+        generation (int): The `NeighborTable.generation` the entry was created in. Entries of earlier generations may
+            be part of a published `NeighborView` and are replaced rather than changed
+        attributes (lldp.query.Attributes): The indexed attributes, maintained by the `lldp.query.NeighborIndex` of the
+            table. None if the table is not indexed
+    """
+    __slots__ = ("key", "lldpdu", "interface", "ttl", "deadline", "first_seen", "last_seen", "generation", "attributes")
+
+    def __init__(self, key: bytes, lldpdu: LLDPDU, interface: str, ttl: int, now: float):
+        self.key = key
+        self.lldpdu = lldpdu
+        self.interface = interface
+        self.ttl = ttl
+        self.deadline = now + ttl
+        self.first_seen = now
+        self.last_seen = now
+        self.generation = 0
+        self.attributes = None
+
+    def __repr__(self):
+        return "Neighbor({}, {}, {})".format(repr(self.lldpdu), repr(self.interface), repr(self.ttl))
+
+    def __reduce__(self):
+        # lazy import, lldp.serialize depends on this module
+        from lldp.serialize import decode_neighbor, encode_neighbor
+        return decode_neighbor, (encode_neighbor(self),)
+
+
+class NeighborView:
+    """An immutable point-in-time view of a `NeighborTable`, see `NeighborTable.publish()`
+
+    Neither the view nor its `Neighbor` entries change after it was published, so it may be read by any thread while the
+    table is being updated.
+
+    Attributes:
+        version (int): `NeighborTable.version` at the time the view was published
+        shards (tuple): Dicts mapping MSAP identifiers to `Neighbor` entries, the entry of `key` is in shard
+            `hash(key) & (len(shards) - 1)`
+        index (tuple): The published `lldp.query.NeighborIndex` of the table, partitioned like `shards`. None if the
+            table is not indexed
+        cache (dict): Data derived from the view, e.g. sort orders computed by `lldp.query.query()`
+    """
+    __slots__ = ("version", "shards", "index", "cache", "_count")
+
+    def __init__(self, version: int, shards: tuple, count: int, index: tuple = None):
+        self.version = version
+        self.shards = shards
+        self.index = index
+        self.cache = {}
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        for shard in self.shards:
+            yield from shard.values()
+
+    def __contains__(self, key) -> bool:
+        return key in self.shards[hash(key) & (len(self.shards) - 1)]
+
+    def get(self, key: bytes):
+        """Get the neighbor with MSAP identifier `key` or None"""
+        return self.shards[hash(key) & (len(self.shards) - 1)].get(key)
+
+
+class NeighborTable:
+    """The set of currently known neighbors
+
+    Neighbors are added or refreshed with `NeighborTable.update()` whenever an LLDPDU is received and are removed once
+    their TTL has run out (see `NeighborTable.expire()`). The table keeps the keys of its neighbors in a wheel of
+    `EXPIRY_BUCKET` seconds wide buckets by deadline, so expiring and finding the next deadline only touch the
+    neighbors that are due next instead of all of them.
+
+    The table is changed by one thread, the agent loop. Other threads (query servers, exporters) read it through
+    immutable views (read-copy-update): `NeighborTable.snapshot()` returns the most recently published `NeighborView`
+    in O(1) without taking a lock. Publishing (`NeighborTable.publish()`, by the writer) is O(shards) as well, the
+    entries are only copied when they are changed afterwards: the first write to a shard after a publish copies that
+    shard, and refreshed neighbors of earlier generations are replaced instead of changed in place. Readers therefore
+    never block the writer and the writer never blocks readers.
+
+    If a reader finds the published view out of date it requests a new one. The writer publishes it at its next
+    `NeighborTable.publish_pending()` call, `on_request` lets it know that it should make that call soon.
+
+    Attributes:
+        journal (set): If set, the keys of all neighbors added, refreshed or removed by `NeighborTable.update()`,
+            `NeighborTable.remove()` and `NeighborTable.expire()` are added to it, e.g. to stream the changes to another
+            process. None by default
+        on_request: Called as `on_request(table)` from the reader thread when a reader requests a new view, e.g. to
+            wake up the agent loop. None by default
+        index (lldp.query.NeighborIndex): Secondary indexes of the neighbors, published with every view, see
+            `NeighborTable.add_index()`. None by default
+        version (int): Incremented by every change
+        generation (int): Incremented by every publish
+
+    Parameters:
+        shards (int): Number of shards, a power of two
+        indexed (bool): Maintain secondary indexes, see `NeighborTable.add_index()`
+    """
+
+    def __init__(self, shards: int = SHARDS, indexed: bool = False):
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError("The number of shards must be a power of two")
+        self._shards = [{} for _ in range(shards)]
+        # generation each shard was copied in, shards of earlier generations are shared with a published view
+        self._copied = [0] * shards
+        self._mask = shards - 1
+        self._count = 0
+        # expiry wheel: bucket number -> keys of the neighbors whose deadline falls into the bucket, and a heap of the
+        # bucket numbers. Private to the writer, views do not need it
+        self._wheel = {}
+        self._buckets = []
+        self.journal = None
+        self.on_request = None
+        self.index = None
+        self.version = 0
+        self.generation = 0
+        self._requested = False
+        self._published = threading.Event()
+        self._view = None
+        if indexed:
+            self.add_index()
+        self.publish()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        return iter([neighbor for shard in self._shards for neighbor in shard.values()])
+
+    def __contains__(self, key) -> bool:
+        return key in self._shards[hash(key) & self._mask]
+
+    def __reduce__(self):
+        # lazy import, lldp.serialize depends on this module
+        from lldp.serialize import decode_table, encode_neighbors
+        return decode_table, (encode_neighbors(self),)
+
+    def get(self, key: bytes):
+        """Get the neighbor with MSAP identifier `key` or None"""
+        return self._shards[hash(key) & self._mask].get(key)
+
+    @staticmethod
+    def key_of(lldpdu: LLDPDU) -> bytes:
+        """Get the MSAP identifier of an LLDPDU"""
+        return bytes(lldpdu[0]) + bytes(lldpdu[1])
+
+    def _writable(self, key: bytes) -> dict:
+        """The shard of `key`, copied first if it is shared with a published view"""
+        index = hash(key) & self._mask
+        if self._copied[index] != self.generation:
+            self._shards[index] = dict(self._shards[index])
+            self._copied[index] = self.generation
+        return self._shards[index]
+
+    def _schedule(self, key: bytes, deadline: float):
+        bucket = int(deadline // EXPIRY_BUCKET)
+        keys = self._wheel.get(bucket)
+        if keys is None:
+            keys = self._wheel[bucket] = set()
+            heapq.heappush(self._buckets, bucket)
+        keys.add(key)
+
+    def _unschedule(self, key: bytes, deadline: float):
+        self._wheel[int(deadline // EXPIRY_BUCKET)].discard(key)
+
+    def update(self, lldpdu: LLDPDU, interface: str = "", now: float = None):
+        """Add or refresh the neighbor that sent `lldpdu`
+
+        An LLDPDU with a TTL of 0 (shutdown LLDPDU) removes the neighbor.
+
+        Raises a `ValueError` if the LLDPDU lacks one of the mandatory TLVs.
+
+        Returns the `Neighbor` entry, None for shutdown LLDPDUs.
+        """
+        if not lldpdu.complete():
+            raise ValueError("Incomplete LLDPDU")
+        if now is None:
+            now = time.monotonic()
+
+        key = self.key_of(lldpdu)
+        ttl = lldpdu[2].value
+        if self.journal is not None:
+            self.journal.add(key)
+        self.version += 1
+        shard = self._writable(key)
+        if ttl == 0:
+            neighbor = shard.pop(key, None)
+            if neighbor is not None:
+                self._count -= 1
+                self._unschedule(key, neighbor.deadline)
+                if self.index is not None:
+                    self.index.discard(neighbor)
+            return None
+        neighbor = shard.get(key)
+        if neighbor is None:
+            neighbor = Neighbor(key, lldpdu, interface, ttl, now)
+            neighbor.generation = self.generation
+            shard[key] = neighbor
+            self._count += 1
+            self._schedule(key, neighbor.deadline)
+        else:
+            previous_deadline = neighbor.deadline
+            if neighbor.generation != self.generation:
+                # the entry may be part of a published view, replace it
+                previous = neighbor
+                neighbor = Neighbor(key, lldpdu, interface, ttl, now)
+                neighbor.first_seen = previous.first_seen
+                neighbor.attributes = previous.attributes
+                neighbor.generation = self.generation
+                shard[key] = neighbor
+            else:
+                neighbor.lldpdu = lldpdu
+                neighbor.interface = interface
+                neighbor.ttl = ttl
+                neighbor.deadline = now + ttl
+                neighbor.last_seen = now
+            if previous_deadline // EXPIRY_BUCKET != neighbor.deadline // EXPIRY_BUCKET:
+                self._unschedule(key, previous_deadline)
+                self._schedule(key, neighbor.deadline)
+        if self.index is not None:
+            self.index.add(neighbor)
+        return neighbor
+
+    def insert(self, neighbor: Neighbor):
+        """Add a `Neighbor` entry, e.g. one decoded from a snapshot. An entry with the same key is replaced"""
+        self.version += 1
+        neighbor.generation = self.generation
+        shard = self._writable(neighbor.key)
+        previous = shard.get(neighbor.key)
+        if previous is None:
+            self._count += 1
+        else:
+            self._unschedule(previous.key, previous.deadline)
+        shard[neighbor.key] = neighbor
+        self._schedule(neighbor.key, neighbor.deadline)
+        if self.index is not None:
+            if previous is not None:
+                self.index.discard(previous)
+            neighbor.attributes = None
+            self.index.add(neighbor)
+
+    def remove(self, key: bytes):
+        """Remove the neighbor with MSAP identifier `key`. Returns the removed entry or None"""
+        if self.journal is not None:
+            self.journal.add(key)
+        if key not in self:
+            return None
+        self.version += 1
+        self._count -= 1
+        neighbor = self._writable(key).pop(key)
+        self._unschedule(key, neighbor.deadline)
+        if self.index is not None:
+            self.index.discard(neighbor)
+        return neighbor
+
+    def expire(self, now: float = None) -> list:
+        """Remove all neighbors whose TTL has run out and return them"""
+        if now is None:
+            now = time.monotonic()
+        expired = []
+        kept = None
+        wheel, buckets, shards, mask = self._wheel, self._buckets, self._shards, self._mask
+        last = int(now // EXPIRY_BUCKET)
+        while buckets and buckets[0] <= last:
+            bucket = heapq.heappop(buckets)
+            for key in wheel.pop(bucket):
+                neighbor = shards[hash(key) & mask][key]
+                if neighbor.deadline <= now:
+                    expired.append(neighbor)
+                else:
+                    # the current bucket is only partly due
+                    if kept is None:
+                        kept = set()
+                    kept.add(key)
+        if kept:
+            wheel[last] = kept
+            heapq.heappush(buckets, last)
+        if expired:
+            self.version += 1
+            self._count -= len(expired)
+            for neighbor in expired:
+                del self._writable(neighbor.key)[neighbor.key]
+            if self.index is not None:
+                for neighbor in expired:
+                    self.index.discard(neighbor)
+        if self.journal is not None:
+            self.journal.update(neighbor.key for neighbor in expired)
+        return expired
+
+    def next_deadline(self):
+        """The earliest deadline of all neighbors or None if the table is empty"""
+        wheel, buckets, shards, mask = self._wheel, self._buckets, self._shards, self._mask
+        while buckets:
+            keys = wheel[buckets[0]]
+            if keys:
+                return min(shards[hash(key) & mask][key].deadline for key in keys)
+            del wheel[heapq.heappop(buckets)]
+        return None
+
+    def add_index(self):
+        """Maintain secondary indexes of the neighbors from now on, see `lldp.query.NeighborIndex`
+
+        Must be called by the thread changing the table. The index is part of the views published afterwards.
+        """
+        # lazy import, lldp.query depends on this module
+        from lldp.query import NeighborIndex
+        if self.index is not None:
+            return self.index
+        index = NeighborIndex(len(self._shards))
+        for neighbor in self:
+            neighbor.attributes = None
+            index.add(neighbor)
+        self.index = index
+        self.version += 1
+        return index
+
+    def publish(self) -> NeighborView:
+        """Publish the current state as a `NeighborView`. Must be called by the thread changing the table"""
+        index = self.index.publish() if self.index is not None else None
+        view = NeighborView(self.version, tuple(self._shards), self._count, index)
+        # shards and entries of the previous generations now belong to the view
+        self.generation += 1
+        self._requested = False
+        self._view = view
+        published, self._published = self._published, threading.Event()
+        published.set()
+        return view
+
+    def publish_pending(self):
+        """Publish a new view if a reader requested one. Must be called by the thread changing the table"""
+        if self._requested:
+            self.publish()
+
+    def snapshot(self, timeout: float = 0.0) -> NeighborView:
+        """The most recently published view. Safe to call from any thread
+
+        If the table changed since, a new view is requested. With a `timeout` the caller waits up to `timeout` seconds
+        for the writer to publish it, otherwise the published (older, but consistent) view is returned right away.
+        """
+        view = self._view
+        if view.version == self.version:
+            return view
+        published = self._published
+        self._requested = True
+        on_request = self.on_request
+        if on_request is not None:
+            on_request(self)
+        if timeout:
+            published.wait(timeout)
+        return self._view
@@ -0,0 +1,242 @@
+"""Network interfaces as reported by rtnetlink
+
+`LinkMonitor` keeps a cache of all network interfaces (links) of the host. It is filled by one RTM_GETLINK dump
+request, which returns every link in a few multipart messages no matter how many interfaces there are, and is then
+kept up to date by the RTM_NEWLINK and RTM_DELLINK notifications of the RTMGRP_LINK multicast group. MAC addresses,
+interface indexes and operational states are taken from the cache, no per-interface ioctls are needed.
+
+If the kernel had to drop notifications because they were not read fast enough (ENOBUFS), the cache is rebuilt with
+another dump.
+"""
+import errno
+import os
+import select
+import socket
+import struct
+
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+
+IFF_UP = 0x1
+IFF_LOOPBACK = 0x8
+IFF_RUNNING = 0x40
+
+ARPHRD_ETHER = 1
+
+_nlmsghdr = struct.Struct("=IHHII")
+_ifinfomsg = struct.Struct("=BxHiII")
+_rtattr = struct.Struct("=HH")
+_nlmsgerr = struct.Struct("=i")
+
+
+class Link:
+    """A network interface
+
+    Attributes:
+        index (int): Interface index
+        name (str): Interface name
+        mac (bytes): Hardware address, empty if the link has none
+        type (int): ARPHRD_* hardware type, `ARPHRD_ETHER` for Ethernet
+        flags (int): IFF_* interface flags
+    """
+    __slots__ = ("index", "name", "mac", "type", "flags")
+
+    def __init__(self, index: int, name: str, mac: bytes = b"", type: int = ARPHRD_ETHER, flags: int = 0):
+        self.index = index
+        self.name = name
+        self.mac = mac
+        self.type = type
+        self.flags = flags
+
+    @property
+    def up(self) -> bool:
+        """True if the link is administratively and operationally up"""
+        return self.flags & (IFF_UP | IFF_RUNNING) == IFF_UP | IFF_RUNNING
+
+    @property
+    def ethernet(self) -> bool:
+        """True for Ethernet links, excluding loopback"""
+        return self.type == ARPHRD_ETHER and not self.flags & IFF_LOOPBACK and len(self.mac) == 6
+
+    def __eq__(self, other):
+        return isinstance(other, Link) and (self.index, self.name, self.mac, self.type, self.flags) == \
+            (other.index, other.name, other.mac, other.type, other.flags)
+
+    def __repr__(self):
+        mac = ":".join("{:02x}".format(b) for b in self.mac)
+        return "Link({}, {}, {}, up={})".format(self.index, repr(self.name), mac, self.up)
+
+
+def parse_messages(data: bytes) -> list:
+    """Parse the netlink messages in `data`
+
+    Returns a list of (message type, sequence number, payload) tuples. For RTM_NEWLINK and RTM_DELLINK messages the
+    payload is a `Link`, for NLMSG_ERROR the (negative) error number, otherwise None.
+    """
+    messages = []
+    view = memoryview(data)
+    offset = 0
+    while offset + _nlmsghdr.size <= len(data):
+        length, kind, _, seq, _ = _nlmsghdr.unpack_from(data, offset)
+        if length < _nlmsghdr.size or offset + length > len(data):
+            break
+        payload = None
+        if kind in (RTM_NEWLINK, RTM_DELLINK):
+            payload = _parse_link(view[offset + _nlmsghdr.size:offset + length])
+        elif kind == NLMSG_ERROR:
+            payload = _nlmsgerr.unpack_from(data, offset + _nlmsghdr.size)[0]
+        messages.append((kind, seq, payload))
+        # messages are aligned to 4 bytes
+        offset += (length + 3) & ~3
+    return messages
+
+
+def _parse_link(view) -> Link:
+    _, type, index, flags, _ = _ifinfomsg.unpack_from(view)
+    link = Link(index, "", b"", type, flags)
+    offset = _ifinfomsg.size
+    while offset + _rtattr.size <= len(view):
+        length, kind = _rtattr.unpack_from(view, offset)
+        if length < _rtattr.size:
+            break
+        value = view[offset + _rtattr.size:offset + length]
+        if kind == IFLA_IFNAME:
+            link.name = bytes(value).rstrip(b"\x00").decode("utf-8", "replace")
+        elif kind == IFLA_ADDRESS:
+            link.mac = bytes(value)
+        offset += (length + 3) & ~3
+    return link
+
+
+class LinkMonitor:
+    """Cache of the host's network interfaces, updated by rtnetlink notifications
+
+    `LinkMonitor.dump()` fills the cache, afterwards `LinkMonitor.read()` applies the notifications whenever the
+    monitor (it has a `fileno()`) is readable. Both return the changes as (old, new) tuples of `Link`s, where `old` is
+    None for new links and `new` is None for removed links.
+
+    Parameters:
+        sock: A netlink socket subscribed to RTMGRP_LINK. Used for testing
+        rcvbuf (int): Receive buffer size, large enough for the notification bursts of many interfaces changing at once
+    """
+
+    def __init__(self, sock=None, rcvbuf: int = 1024 * 1024):
+        if sock is None:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+                sock.bind((0, RTMGRP_LINK))
+            except OSError:
+                sock.close()
+                raise
+        sock.setblocking(False)
+        self.socket = sock
+        self.links = {}
+        self._seq = 0
+
+    def fileno(self) -> int:
+        return self.socket.fileno()
+
+    def close(self):
+        self.socket.close()
+
+    def by_name(self, name: str):
+        """The cached link named `name` or None"""
+        for link in self.links.values():
+            if link.name == name:
+                return link
+        return None
+
+    def dump(self, timeout: float = 5.0) -> list:
+        """Query all links with a single dump request and replace the cache. Returns the changes
+
+        Notifications received while waiting for the dump are applied as well.
+
+        Raises an OSError if the request fails or times out.
+        """
+        self._seq += 1
+        seq = self._seq
+        request = _nlmsghdr.pack(_nlmsghdr.size + _ifinfomsg.size, RTM_GETLINK, NLM_F_REQUEST | NLM_F_DUMP, seq, 0)
+        self.socket.send(request + _ifinfomsg.pack(socket.AF_UNSPEC, 0, 0, 0, 0))
+
+        links = {}
+        notifications = []
+        done = False
+        while not done:
+            r, _, _ = select.select([self.socket], [], [], timeout)
+            if not r:
+                raise OSError(errno.ETIMEDOUT, "Link dump timed out")
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                continue
+            for kind, message_seq, payload in parse_messages(data):
+                if message_seq != seq:
+                    if kind in (RTM_NEWLINK, RTM_DELLINK):
+                        notifications.append((kind, payload))
+                elif kind == RTM_NEWLINK:
+                    links[payload.index] = payload
+                elif kind == NLMSG_DONE:
+                    done = True
+                elif kind == NLMSG_ERROR and payload:
+                    raise OSError(-payload, os.strerror(-payload))
+
+        changes = self._replace(links)
+        for kind, link in notifications:
+            changes.extend(self._apply(kind, link))
+        return changes
+
+    def read(self) -> list:
+        """Apply the pending notifications. Returns the changes
+
+        Rebuilds the cache with a dump if notifications were lost.
+        """
+        changes = []
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                return changes
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                # the kernel dropped notifications, the cache may be stale
+                changes.extend(self.dump())
+                continue
+            for kind, _, payload in parse_messages(data):
+                if kind in (RTM_NEWLINK, RTM_DELLINK):
+                    changes.extend(self._apply(kind, payload))
+
+    def _apply(self, kind: int, link: Link) -> list:
+        old = self.links.get(link.index)
+        if kind == RTM_DELLINK:
+            if old is None:
+                return []
+            del self.links[link.index]
+            return [(old, None)]
+        if link == old:
+            return []
+        self.links[link.index] = link
+        return [(old, link)]
+
+    def _replace(self, links: dict) -> list:
+        old_links = self.links
+        self.links = links
+        changes = [(old, None) for index, old in old_links.items() if index not in links]
+        for index, link in links.items():
+            old = old_links.get(index)
+            if link != old:
+                changes.append((old, link))
+        return changes
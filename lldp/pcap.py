@@ -0,0 +1,295 @@
+"""Streaming reader for pcap and pcapng captures
+
+Captures are memory-mapped and parsed in place. Frames are handed out as memoryviews into the mapping, so reading a
+capture does not copy frame data and the memory used by the reader does not grow with the size of the file; the kernel
+pages the file in and out as needed.
+
+Every record is yielded as a (timestamp, interface, frame) tuple:
+
+    timestamp   capture time in nanoseconds since the epoch, or None if the record has no timestamp
+    interface   name of the capturing interface if the capture records it (pcapng if_name option), otherwise the
+                interface index for pcapng and None for classic pcap
+    frame       memoryview of the captured Ethernet frame
+
+The pipeline functions `lldp_records()` and `decode_lldpdus()` apply the agent's frame classification and decode the
+remaining frames lazily:
+
+    for timestamp, interface, lldpdu in decode_lldpdus(lldp_records(read_capture("capture.pcapng"))):
+        ...
+
+For reading parts of a capture, e.g. one chunk of a pcapng file per worker process, `map_capture()`, `read_pcap()`,
+`read_pcapng()` and `read_interface()` give access to the mapped file and the format readers.
+
+Run `python -m lldp.pcap <capture>` to print the LLDPDUs contained in a capture.
+"""
+import argparse
+import contextlib
+import mmap
+import struct
+import sys
+
+from lldp.frame import is_lldp_frame
+from lldp.lldpdu import LLDPDU
+
+LINKTYPE_ETHERNET = 1
+
+PCAP_MAGIC_US = 0xa1b2c3d4
+PCAP_MAGIC_NS = 0xa1b23c4d
+
+PCAPNG_SHB = 0x0a0d0d0a
+PCAPNG_IDB = 0x00000001
+PCAPNG_OPB = 0x00000002
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1a2b3c4d
+
+PCAPNG_OPT_ENDOFOPT = 0
+PCAPNG_IF_NAME = 2
+PCAPNG_IF_TSRESOL = 9
+
+
+def _map(path: str):
+    """Memory-map `path` read-only. Returns None for empty files"""
+    with open(path, "rb") as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return None
+    if hasattr(mapping, "madvise"):
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+    return mapping
+
+
+def _release(mapping, view):
+    try:
+        view.release()
+        mapping.close()
+    except BufferError:
+        # The consumer still holds frames, the mapping is closed once they are garbage collected
+        pass
+
+
+@contextlib.contextmanager
+def map_capture(path: str):
+    """Memory-map a capture read-only
+
+    Yields a memoryview of the whole file, or None if the file is empty. Frames read from the view may be kept after
+    the block, the mapping is then closed once they are garbage collected.
+    """
+    mapping = _map(path)
+    if mapping is None:
+        yield None
+        return
+    view = memoryview(mapping)
+    try:
+        yield view
+    finally:
+        _release(mapping, view)
+
+
+def capture_format(data) -> tuple:
+    """Detect the format of a capture from its first bytes
+
+    Returns a tuple (format, byteorder) with format being "pcap" or "pcapng" and byteorder "<" or ">".
+    Raises a `ValueError` for unknown formats.
+    """
+    if len(data) >= 12 and struct.unpack_from("<I", data)[0] == PCAPNG_SHB:
+        for byteorder in ("<", ">"):
+            if struct.unpack_from(byteorder + "I", data, 8)[0] == PCAPNG_BYTE_ORDER_MAGIC:
+                return "pcapng", byteorder
+    if len(data) >= 24:
+        for byteorder in ("<", ">"):
+            if struct.unpack_from(byteorder + "I", data)[0] in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+                return "pcap", byteorder
+    raise ValueError("Unknown capture format")
+
+
+def read_capture(path: str):
+    """Stream the records of a pcap or pcapng file
+
+    Yields (timestamp, interface, frame) tuples, see the module documentation. Frames that are not Ethernet frames are
+    skipped.
+
+    Raises a `ValueError` if the file is neither a pcap nor a pcapng file.
+    """
+    with map_capture(path) as view:
+        if view is None:
+            raise ValueError("Empty capture file: {}".format(path))
+        kind, byteorder = capture_format(view)
+        if kind == "pcap":
+            yield from read_pcap(view, byteorder)
+        else:
+            yield from read_pcapng(view)
+
+
+def read_pcap(view, byteorder: str):
+    """Stream the records of a classic pcap capture in `view`, see `capture_format()` for `byteorder`"""
+    magic, _, _, _, _, _, linktype = struct.unpack_from(byteorder + "IHHiIII", view)
+    if linktype != LINKTYPE_ETHERNET:
+        return
+    scale = 1000 if magic == PCAP_MAGIC_US else 1
+    record = struct.Struct(byteorder + "IIII")
+    unpack_from = record.unpack_from
+    offset = 24
+    end = len(view)
+    while offset + record.size <= end:
+        seconds, fraction, captured, _ = unpack_from(view, offset)
+        offset += record.size
+        if offset + captured > end:
+            return
+        yield seconds * 1000000000 + fraction * scale, None, view[offset:offset + captured]
+        offset += captured
+
+
+class PcapngInterface:
+    """Interface description of a pcapng section
+
+    Attributes:
+        name: The if_name option, or the interface index if the option is missing
+        linktype (int): The link type of the interface
+    """
+    __slots__ = ("name", "linktype", "ts_multiplier", "ts_divisor")
+
+    def __init__(self, name, linktype):
+        self.name = name
+        self.linktype = linktype
+        # default resolution is microseconds
+        self.ts_multiplier = 1000
+        self.ts_divisor = 1
+
+    def timestamp(self, high: int, low: int) -> int:
+        return ((high << 32) | low) * self.ts_multiplier // self.ts_divisor
+
+
+def read_interface(view, offset: int, byteorder: str, index: int) -> PcapngInterface:
+    """Parse the interface description block at `offset`, the `index`th one of its section"""
+    length, linktype = struct.unpack_from(byteorder + "IH", view, offset + 4)
+    interface = PcapngInterface(index, linktype)
+    option = offset + 16
+    end = offset + length - 4
+    while option + 4 <= end:
+        code, size = struct.unpack_from(byteorder + "HH", view, option)
+        if code == PCAPNG_OPT_ENDOFOPT:
+            break
+        value = view[option + 4:option + 4 + size]
+        if code == PCAPNG_IF_NAME:
+            interface.name = bytes(value).rstrip(b"\x00").decode("utf-8", "replace")
+        elif code == PCAPNG_IF_TSRESOL and size >= 1:
+            resolution = value[0]
+            if resolution & 0x80:
+                interface.ts_multiplier, interface.ts_divisor = 1000000000, 1 << (resolution & 0x7f)
+            elif resolution <= 9:
+                interface.ts_multiplier, interface.ts_divisor = 10 ** (9 - resolution), 1
+            else:
+                interface.ts_multiplier, interface.ts_divisor = 1, 10 ** (resolution - 9)
+        option += 4 + ((size + 3) & ~3)
+    return interface
+
+
+def pcapng_blocks(view, start: int = 0, end: int = None, byteorder: str = "<"):
+    """Iterate over the blocks of a pcapng capture
+
+    Iteration starts at offset `start`, which has to be the beginning of a block, and stops before `end` or at the
+    first truncated block. `byteorder` is the byte order of the section `start` lies in.
+
+    Yields (offset, block type, block length, byteorder) tuples.
+    """
+    end = len(view) if end is None else end
+    offset = start
+    while offset + 12 <= end:
+        block_type = struct.unpack_from(byteorder + "I", view, offset)[0]
+        if block_type == PCAPNG_SHB:
+            # The byte order may change with every section
+            for byteorder in ("<", ">"):
+                if struct.unpack_from(byteorder + "I", view, offset + 8)[0] == PCAPNG_BYTE_ORDER_MAGIC:
+                    break
+            else:
+                raise ValueError("Invalid pcapng section header at offset {}".format(offset))
+        length = struct.unpack_from(byteorder + "I", view, offset + 4)[0]
+        if length < 12 or offset + length > end:
+            return
+        yield offset, block_type, length, byteorder
+        offset += length
+
+
+def _interface(interfaces: list, interface_id: int, offset: int) -> PcapngInterface:
+    if interface_id >= len(interfaces):
+        raise ValueError("Invalid pcapng interface id {} at offset {}".format(interface_id, offset))
+    return interfaces[interface_id]
+
+
+def read_pcapng(view, start: int = 0, end: int = None, interfaces: list = None, byteorder: str = "<"):
+    """Stream the records of the pcapng blocks in `view` from `start` to `end`
+
+    `start` has to be the beginning of a block and `byteorder` the byte order of its section. `interfaces` are the
+    `PcapngInterface`s of that section described before `start`, the list is extended by the blocks read.
+
+    Raises a `ValueError` for a packet block of an undescribed interface.
+    """
+    interfaces = [] if interfaces is None else interfaces
+    for offset, block_type, length, byteorder in pcapng_blocks(view, start, end, byteorder):
+        if block_type == PCAPNG_EPB:
+            interface_id, high, low, captured = struct.unpack_from(byteorder + "IIII", view, offset + 8)
+            interface = _interface(interfaces, interface_id, offset)
+            if interface.linktype == LINKTYPE_ETHERNET:
+                # a corrupt captured length must not run into the following blocks
+                captured = min(captured, length - 32)
+                yield interface.timestamp(high, low), interface.name, view[offset + 28:offset + 28 + captured]
+        elif block_type == PCAPNG_SPB:
+            if interfaces and interfaces[0].linktype == LINKTYPE_ETHERNET:
+                original = struct.unpack_from(byteorder + "I", view, offset + 8)[0]
+                captured = min(original, length - 16)
+                yield None, interfaces[0].name, view[offset + 12:offset + 12 + captured]
+        elif block_type == PCAPNG_OPB:
+            interface_id, _, high, low, captured = struct.unpack_from(byteorder + "HHIII", view, offset + 8)
+            interface = _interface(interfaces, interface_id, offset)
+            if interface.linktype == LINKTYPE_ETHERNET:
+                captured = min(captured, length - 32)
+                yield interface.timestamp(high, low), interface.name, view[offset + 28:offset + 28 + captured]
+        elif block_type == PCAPNG_IDB:
+            interfaces.append(read_interface(view, offset, byteorder, len(interfaces)))
+        elif block_type == PCAPNG_SHB:
+            # interface ids are local to a section
+            del interfaces[:]
+
+
+def lldp_records(records, local_mac: bytes = None):
+    """Filter capture records down to LLDP frames, using the same classification as the agent"""
+    for record in records:
+        if is_lldp_frame(record[2], local_mac):
+            yield record
+
+
+def decode_lldpdus(records, errors: list = None):
+    """Decode the LLDPDUs of LLDP frame records
+
+    Yields (timestamp, interface, LLDPDU) tuples. Frames that fail to decode are skipped; if `errors` is a list, their
+    (timestamp, interface, frame) records are appended to it.
+    """
+    for timestamp, interface, frame in records:
+        try:
+            lldpdu = LLDPDU.from_bytes(bytes(frame[14:]))
+        except (ValueError, IndexError):
+            if errors is not None:
+                errors.append((timestamp, interface, bytes(frame)))
+            continue
+        yield timestamp, interface, lldpdu
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m lldp.pcap", description="Print the LLDPDUs of a capture.")
+    parser.add_argument("capture", help="pcap or pcapng file")
+    args = parser.parse_args(argv)
+
+    errors = []
+    count = 0
+    for timestamp, interface, lldpdu in decode_lldpdus(lldp_records(read_capture(args.capture)), errors):
+        print("{} {} {}".format(timestamp, interface, lldpdu))
+        count += 1
+    print("{} LLDPDUs, {} decode errors".format(count, len(errors)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
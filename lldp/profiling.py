@@ -0,0 +1,143 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from lldp.agent import LLDPAgent
+from lldp.lldpdu import LLDPDU
+from lldp.tlv import ChassisIdTLV, PortIdTLV, TTLTLV, EndOfLLDPDUTLV, PortDescriptionTLV, SystemNameTLV, \
+    SystemDescriptionTLV, SystemCapabilitiesTLV, ManagementAddressTLV, OrganizationallySpecificTLV
+
+TLV_CLASSES = (ChassisIdTLV, PortIdTLV, TTLTLV, EndOfLLDPDUTLV, PortDescriptionTLV, SystemNameTLV,
+               SystemDescriptionTLV, SystemCapabilitiesTLV, ManagementAddressTLV, OrganizationallySpecificTLV)
+
+
+def agent_stages(agent) -> dict:
+    """Map the code objects of the agent's hot functions to stage labels
+
+    `agent` is an `LLDPAgent` or an `InterfaceManager`. The labels are used as root frames of the collapsed stacks:
+
+        receive                 waiting for and reading frames in `LLDPAgent.run()` or `InterfaceManager.run()`
+        decode                  `LLDPDU.from_bytes()` outside of any TLV constructor
+        decode;<TLV class>      the `from_bytes()` method of the respective TLV
+        announce                `LLDPAgent.announce()`
+        log                     the agent's logger
+    """
+    stages = {
+        type(agent).run.__code__: "receive",
+        LLDPDU.from_bytes.__code__: "decode",
+        LLDPAgent.announce.__code__: "announce",
+    }
+    log = getattr(type(agent.logger), "log", None)
+    if log is not None and hasattr(log, "__code__"):
+        stages[log.__code__] = "log"
+    for cls in TLV_CLASSES:
+        stages[cls.from_bytes.__code__] = "decode;" + cls.__name__
+    return stages
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the Python stack of one thread
+
+    A background thread periodically captures the stack of the target thread using `sys._current_frames()`. Stacks are
+    aggregated and can be written in the collapsed format understood by flamegraph.pl, speedscope and similar tools:
+
+        stage;outermost frame;...;innermost frame count
+
+    The first element of every stack is the stage the innermost recognized function belongs to (see `agent_stages()`),
+    or "other" if the stack does not pass through any of them.
+
+    Parameters:
+        thread_id (int): Identifier of the thread to sample. Defaults to the thread creating the profiler
+        interval (float): Sampling interval in seconds
+        stages (dict): Mapping of code objects to stage labels
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = 0.001, stages: dict = None):
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.stages = {} if stages is None else stages
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="lldp-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self):
+        stages = self.stages
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            stage = None
+            while frame is not None:
+                code = frame.f_code
+                if stage is None:
+                    stage = stages.get(code)
+                stack.append("{} ({}:{})".format(code.co_name, os.path.basename(code.co_filename),
+                                                 code.co_firstlineno))
+                frame = frame.f_back
+            stack.append(stage or "other")
+            stack.reverse()
+            self.samples[tuple(stack)] += 1
+
+    def stage_totals(self) -> Counter:
+        """Number of samples per stage"""
+        totals = Counter()
+        for stack, count in self.samples.items():
+            totals[stack[0]] += count
+        return totals
+
+    def write_collapsed(self, path: str):
+        """Write the samples in the collapsed stack format"""
+        with open(path, "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write("{} {}\n".format(";".join(stack), count))
+
+
+def profile_agent(agent, duration: float, output_prefix: str, interval: float = 0.001) -> dict:
+    """Run `agent` for `duration` seconds under cProfile and the sampling profiler
+
+    Writes `<output_prefix>.pstats` (load with `python -m pstats`) and `<output_prefix>.collapsed` (feed to
+    flamegraph.pl). The agent is stopped once the window has passed.
+
+    Returns a dictionary of sample counts per stage.
+    """
+    sampler = SamplingProfiler(interval=interval, stages=agent_stages(agent))
+    stopper = threading.Timer(duration, agent.stop)
+    profiler = cProfile.Profile()
+
+    sampler.start()
+    stopper.start()
+    t_start = time.monotonic()
+    profiler.enable()
+    try:
+        agent.run()
+    finally:
+        profiler.disable()
+        stopper.cancel()
+        sampler.stop()
+
+    profiler.dump_stats(output_prefix + ".pstats")
+    sampler.write_collapsed(output_prefix + ".collapsed")
+
+    totals = sampler.stage_totals()
+    total = sum(totals.values())
+    agent.logger.log("Profiled {:.1f}s, {} samples written to {}.pstats and {}.collapsed".format(
+        time.monotonic() - t_start, total, output_prefix, output_prefix))
+    for stage, count in totals.most_common():
+        agent.logger.log("  {:<40} {:>6.1f}%".format(stage, 100.0 * count / total))
+    return dict(totals)
@@ -0,0 +1,358 @@
+"""Secondary indexes and queries over neighbor tables
+
+Questions like "which neighbors have the router capability enabled", "who has management address X" or "which ports
+see system name Y" would otherwise need a walk over all neighbors. A `NeighborTable` created with `indexed=True` keeps
+a `NeighborIndex`: for every indexed value the set of MSAP identifiers (posting) of the neighbors that have it. The
+indexed attributes of a neighbor are:
+
+    interface           name of the local interface the neighbor was seen on
+    chassis_id          (subtype, value) of the Chassis ID TLV, with network addresses packed (see `chassis_key()`)
+    system_name         value of the System Name TLV
+    management_address  packed addresses (4 or 16 bytes) of all Management Address TLVs
+    supported, enabled  every capability bit of the System Capabilities TLV (see `SystemCapabilitiesTLV.Capability`)
+
+The index is partitioned like the table: index shard `i` holds the postings of the neighbors in table shard `i`. It
+is published together with every `NeighborView` and copied on write the same way: the first change of an index shard
+or a posting after a publish copies it, a refreshed neighbor whose attributes did not change costs one comparison.
+
+`query()` answers a question from one or more views, e.g. the views of all agents of an `InterfaceManager`:
+
+    view = table.snapshot()
+    result = query(view, enabled=Capability.ROUTER, sort="system_name", limit=50)
+    result.total, result.neighbors
+
+Filters on indexed attributes intersect postings, shard by shard starting with the smallest posting, so the cost
+depends on the number of candidates rather than the number of neighbors. Sort orders of whole views are computed once
+and cached in the view (views are immutable); a page of a sorted result then costs O(offset + limit).
+"""
+import heapq
+from collections import namedtuple
+from itertools import islice
+
+from lldp.neighbors import SHARDS, NeighborView
+from lldp.tlv import ChassisIdTLV, ManagementAddressTLV, SystemCapabilitiesTLV, SystemNameTLV
+from lldp.tlv.address import pack_address
+
+Attributes = namedtuple("Attributes", ("interface", "chassis_id", "system_name", "management_addresses",
+                                       "supported", "enabled"))
+Attributes.__doc__ = """The indexed attributes of a neighbor, see `attributes_of()`"""
+
+QueryResult = namedtuple("QueryResult", ("total", "neighbors"))
+QueryResult.__doc__ = """Result of `query()`: the number of matching neighbors and the requested page of them"""
+
+# Results smaller than this fraction of the view are sorted directly instead of using the cached sort order of the view
+_SORT_DIRECTLY = 0.125
+
+
+def chassis_key(tlv: ChassisIdTLV) -> tuple:
+    """The (subtype, value) pair a `ChassisIdTLV` is indexed by, with the packed address for network addresses"""
+    subtype = tlv.subtype
+    if subtype == ChassisIdTLV.Subtype.NETWORK_ADDRESS:
+        return subtype, tlv.packed
+    return subtype, tlv.value
+
+
+def attributes_of(neighbor) -> Attributes:
+    """Extract the indexed attributes of a `Neighbor`"""
+    lldpdu = neighbor.lldpdu
+    system_name = None
+    addresses = []
+    supported = enabled = 0
+    for tlv in lldpdu:
+        kind = type(tlv)
+        if kind is SystemNameTLV:
+            system_name = tlv.value
+        elif kind is SystemCapabilitiesTLV:
+            supported, enabled = tlv.value >> 16, tlv.value & 0xffff
+        elif kind is ManagementAddressTLV:
+            addresses.append(tlv.packed)
+    return Attributes(neighbor.interface, chassis_key(lldpdu[0]), system_name, tuple(addresses), supported, enabled)
+
+
+def _bits(mask: int):
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+def _terms(attributes: Attributes):
+    """The (attribute, value) pairs under which a neighbor is indexed"""
+    yield "interface", attributes.interface
+    yield "chassis_id", attributes.chassis_id
+    if attributes.system_name is not None:
+        yield "system_name", attributes.system_name
+    for address in attributes.management_addresses:
+        yield "management_address", address
+    for bit in _bits(attributes.supported):
+        yield "supported", bit
+    for bit in _bits(attributes.enabled):
+        yield "enabled", bit
+
+
+class _Posting(set):
+    """MSAP identifiers of the neighbors with one indexed value, stamped with the generation it was copied in"""
+    __slots__ = ("generation",)
+
+
+class NeighborIndex:
+    """Postings of the indexed attributes of the neighbors of a `NeighborTable`
+
+    Every shard maps the name of an attribute (see `FIELDS`) to a dict from its values to the set of MSAP identifiers
+    of the neighbors in the corresponding table shard that have the value, or to the MSAP identifier itself if only one
+    neighbor has it. Maintained by the table, see `NeighborTable.add_index()`.
+
+    Parameters:
+        shards (int): Number of shards, the same as the table's
+    """
+    FIELDS = ("interface", "chassis_id", "system_name", "management_address", "supported", "enabled")
+
+    def __init__(self, shards: int = SHARDS):
+        self._shards = [{field: {} for field in self.FIELDS} for _ in range(shards)]
+        self._copied = [0] * shards
+        self._mask = shards - 1
+        self.generation = 0
+
+    def __len__(self) -> int:
+        """Number of distinct indexed values"""
+        return sum(len(values) for shard in self._shards for values in shard.values())
+
+    def _writable(self, index: int) -> dict:
+        if self._copied[index] != self.generation:
+            self._shards[index] = {field: dict(values) for field, values in self._shards[index].items()}
+            self._copied[index] = self.generation
+        return self._shards[index]
+
+    def _add(self, index: int, key: bytes, terms):
+        shard = self._writable(index)
+        generation = self.generation
+        for field, value in terms:
+            values = shard[field]
+            posting = values.get(value)
+            if posting is None:
+                # most values (system names, addresses) belong to a single neighbor, its key is stored without a set
+                values[value] = key
+                continue
+            if type(posting) is bytes or posting.generation != generation:
+                # a single key, or shared with a published view
+                posting = values[value] = _Posting((posting,) if type(posting) is bytes else posting)
+                posting.generation = generation
+            posting.add(key)
+
+    def _remove(self, index: int, key: bytes, terms):
+        shard = self._writable(index)
+        generation = self.generation
+        for field, value in terms:
+            values = shard[field]
+            posting = values[value]
+            if type(posting) is bytes:
+                del values[value]
+            elif len(posting) == 2:
+                for other in posting:
+                    if other != key:
+                        values[value] = other
+            else:
+                if posting.generation != generation:
+                    posting = values[value] = _Posting(posting)
+                    posting.generation = generation
+                posting.discard(key)
+
+    def add(self, neighbor):
+        """Index a new or refreshed neighbor
+
+        `neighbor.attributes` holds the attributes it is currently indexed under (None for new neighbors); only the
+        postings of changed attributes are touched.
+        """
+        attributes = attributes_of(neighbor)
+        previous = neighbor.attributes
+        if attributes == previous:
+            return
+        neighbor.attributes = attributes
+        index = hash(neighbor.key) & self._mask
+        if previous is None:
+            self._add(index, neighbor.key, _terms(attributes))
+        else:
+            old, new = set(_terms(previous)), set(_terms(attributes))
+            self._remove(index, neighbor.key, old - new)
+            self._add(index, neighbor.key, new - old)
+
+    def discard(self, neighbor):
+        """Remove a neighbor from the index"""
+        if neighbor.attributes is not None:
+            self._remove(hash(neighbor.key) & self._mask, neighbor.key, _terms(neighbor.attributes))
+
+    def publish(self) -> tuple:
+        """The current shards, to be published with a `NeighborView`. Later changes copy them first"""
+        shards = tuple(self._shards)
+        self.generation += 1
+        return shards
+
+
+def _attributes(neighbor) -> Attributes:
+    # neighbors of unindexed tables have no attributes
+    attributes = neighbor.attributes
+    return attributes_of(neighbor) if attributes is None else attributes
+
+
+def _system_name_key(neighbor):
+    name = _attributes(neighbor).system_name
+    return name is None, name or "", neighbor.key
+
+
+def _management_address_key(neighbor):
+    addresses = _attributes(neighbor).management_addresses
+    if not addresses:
+        return True, 0, b"", neighbor.key
+    # IPv4 before IPv6
+    return False, len(addresses[0]), addresses[0], neighbor.key
+
+
+# Sort keys of `query()`, ties are broken by the MSAP identifier so pages do not overlap
+SORT_KEYS = {
+    "interface": lambda neighbor: (neighbor.interface, neighbor.key),
+    "chassis_id": lambda neighbor: neighbor.key,
+    "system_name": _system_name_key,
+    "management_address": _management_address_key,
+    "ttl": lambda neighbor: (neighbor.ttl, neighbor.key),
+    "first_seen": lambda neighbor: (neighbor.first_seen, neighbor.key),
+    "last_seen": lambda neighbor: (neighbor.last_seen, neighbor.key),
+    "deadline": lambda neighbor: (neighbor.deadline, neighbor.key),
+}
+
+
+def _filter_terms(interface, chassis_id, system_name, management_address, supported: int, enabled: int) -> list:
+    terms = []
+    if interface is not None:
+        terms.append(("interface", interface))
+    if chassis_id is not None:
+        if not isinstance(chassis_id, ChassisIdTLV):
+            if not isinstance(chassis_id, tuple) or len(chassis_id) != 2:
+                raise ValueError("Chassis ID filter must be a ChassisIdTLV or a (subtype, value) tuple")
+            chassis_id = ChassisIdTLV(*chassis_id)
+        terms.append(("chassis_id", chassis_key(chassis_id)))
+    if system_name is not None:
+        terms.append(("system_name", system_name))
+    if management_address is not None:
+        if isinstance(management_address, ManagementAddressTLV):
+            management_address = management_address.packed
+        elif not isinstance(management_address, bytes):
+            management_address = pack_address(management_address)[0]
+        terms.append(("management_address", management_address))
+    terms.extend(("supported", bit) for bit in _bits(supported))
+    terms.extend(("enabled", bit) for bit in _bits(enabled))
+    return terms
+
+
+def _select(view: NeighborView, terms: list, where) -> list:
+    """The MSAP identifiers of the neighbors of `view` that have all `terms`, a collection for every shard"""
+    if view.index is None or not terms:
+        wanted = set(terms)
+        selected = []
+        for shard in view.shards:
+            if wanted:
+                shard = {key: neighbor for key, neighbor in shard.items()
+                         if wanted.issubset(_terms(_attributes(neighbor)))}
+            selected.append({key for key, neighbor in shard.items() if where is None or where(neighbor)})
+        return selected
+    selected = []
+    for shard, index in zip(view.shards, view.index):
+        postings = []
+        for field, value in terms:
+            posting = index[field].get(value)
+            if posting is None:
+                break
+            postings.append((posting,) if type(posting) is bytes else posting)
+        else:
+            postings.sort(key=len)
+            first, rest = postings[0], postings[1:]
+            if type(first) is tuple:
+                keys = first if all(first[0] in posting for posting in rest) else ()
+            else:
+                keys = first.intersection(*rest) if rest else first
+            if where is not None:
+                keys = {key for key in keys if where(shard[key])}
+            selected.append(keys)
+            continue
+        selected.append(())
+    return selected
+
+
+def _ordered(view: NeighborView, sort: str) -> list:
+    """All neighbors of `view` sorted by `sort`, computed once per view"""
+    ordered = view.cache.get(("sorted", sort))
+    if ordered is None:
+        ordered = view.cache[("sorted", sort)] = sorted(view, key=SORT_KEYS[sort])
+    return ordered
+
+
+def _restrict(ordered, keys: list):
+    """The neighbors of `ordered` whose MSAP identifier is in `keys`, the selected identifiers of every shard"""
+    mask = len(keys) - 1
+    for neighbor in ordered:
+        if neighbor.key in keys[hash(neighbor.key) & mask]:
+            yield neighbor
+
+
+def query(views, interface: str = None, chassis_id=None, system_name: str = None, management_address=None,
+          supported: int = 0, enabled: int = 0, where=None, sort: str = None, reverse: bool = False, offset: int = 0,
+          limit: int = None) -> QueryResult:
+    """Find neighbors by their attributes
+
+    All given filters have to match. Views without an index (of unindexed tables) are scanned.
+
+    Parameters:
+        views: A `NeighborView` or a sequence of views, e.g. of the tables of several agents
+        interface (str): Name of the local interface
+        chassis_id: A `ChassisIdTLV` or a (subtype, value) tuple, e.g. `(ChassisIdTLV.Subtype.MAC_ADDRESS, mac)`
+        system_name (str): System name
+        management_address: A management address (`ipaddress` object, str, int, packed bytes or a
+            `ManagementAddressTLV`)
+        supported (int): Capabilities that have to be supported, ORed `SystemCapabilitiesTLV.Capability` values
+        enabled (int): Capabilities that have to be enabled
+        where: Called as `where(neighbor)` for every neighbor matching the other filters, only neighbors it returns a
+            true value for are part of the result
+        sort (str): Sort by one of `SORT_KEYS`. The order of unsorted results only stays the same for the same views
+        reverse (bool): Sort in descending order
+        offset (int): Number of matching neighbors to skip
+        limit (int): Maximum number of neighbors to return. All by default
+
+    Raises a `ValueError` for an unknown sort key, a negative offset or limit, or an invalid chassis ID or management
+    address.
+
+    Returns a `QueryResult` with the total number of matching neighbors and the requested page of them.
+    """
+    views = (views,) if isinstance(views, NeighborView) else list(views)
+    if sort is not None and sort not in SORT_KEYS:
+        raise ValueError("Unknown sort key '{}'".format(sort))
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("Offset and limit must not be negative")
+    terms = _filter_terms(interface, chassis_id, system_name, management_address, supported, enabled)
+    end = None if limit is None else offset + limit
+
+    # None selects all neighbors of a view
+    selected = [_select(view, terms, where) if terms or where is not None else None for view in views]
+    total = sum(len(view) if keys is None else sum(len(shard) for shard in keys) for view, keys in zip(views, selected))
+
+    if sort is None:
+        matches = (shard[key] for view, keys in zip(views, selected)
+                   for shard, shard_keys in zip(view.shards, view.shards if keys is None else keys)
+                   for key in shard_keys)
+        return QueryResult(total, list(islice(matches, offset, end)))
+
+    key = SORT_KEYS[sort]
+    streams = []
+    for view, keys in zip(views, selected):
+        count = len(view) if keys is None else sum(len(shard) for shard in keys)
+        if count < len(view) * _SORT_DIRECTLY:
+            # a small part of the view, cheaper to sort than to walk the order of the whole view
+            neighbors = [shard[k] for shard, shard_keys in zip(view.shards, keys) for k in shard_keys]
+            streams.append(sorted(neighbors, key=key, reverse=reverse))
+            continue
+        ordered = _ordered(view, sort)
+        if reverse:
+            ordered = reversed(ordered)
+        if keys is not None:
+            ordered = _restrict(ordered, keys)
+        streams.append(ordered)
+    matches = streams[0] if len(streams) == 1 else heapq.merge(*streams, key=key, reverse=reverse)
+    return QueryResult(total, list(islice(matches, offset, end)))
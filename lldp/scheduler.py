@@ -0,0 +1,197 @@
+"""Tickless timer scheduler
+
+The agent loop waits in `select()` for frames. Instead of waking up at a fixed interval and comparing timestamps, it
+asks the `Scheduler` for the time until the next deadline and uses that as `select()` timeout, then runs the timers
+that are due. An idle agent therefore only wakes up when there is something to do, and a busy one still fires timers
+on time.
+
+Timers are kept in a binary heap ordered by deadline, so scheduling and firing cost O(log n) even with timers for
+thousands of ports. All deadlines are `time.monotonic()` values and are not affected by wall clock jumps.
+
+Periodic timers are rescheduled relative to their previous deadline, not to the time the callback ran, so they do not
+drift. Each period can be delayed by a random jitter, and the first deadline can be staggered over one period, so
+that timers created at the same time (e.g. the announces of many ports) do not fire in bursts.
+"""
+import heapq
+import itertools
+import random
+import time
+
+
+class Timer:
+    """A scheduled callback, returned by the `Scheduler` methods
+
+    Attributes:
+        deadline (float): `time.monotonic()` value at which the callback is due
+        interval (float): Period of a periodic timer, None for one-shot timers
+        jitter (float): Maximum random delay added to each period
+        cancelled (bool): True once the timer has been cancelled
+    """
+    __slots__ = ("deadline", "callback", "args", "interval", "jitter", "base", "cancelled", "sequence")
+
+    def __init__(self, deadline: float, callback, args: tuple, interval: float = None, jitter: float = 0.0):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.jitter = jitter
+        # deadline without jitter, periods are counted from here
+        self.base = deadline
+        self.cancelled = False
+        # sequence number of the heap entry of this timer, None if it is not queued
+        self.sequence = None
+
+    @property
+    def pending(self) -> bool:
+        """True if the timer is scheduled to run"""
+        return self.sequence is not None
+
+    def __repr__(self):
+        return "Timer({}, {}, interval={})".format(self.deadline, getattr(self.callback, "__name__", self.callback),
+                                                   self.interval)
+
+
+class Scheduler:
+    """Heap of timers on `time.monotonic()`
+
+    Parameters:
+        clock: Time source, `time.monotonic` by default. Used for testing
+        random: Random number generator for jitter and staggering
+    """
+
+    def __init__(self, clock=time.monotonic, random=random):
+        self.clock = clock
+        self.random = random
+        self._heap = []
+        self._sequence = itertools.count()
+        # number of heap entries of cancelled or rescheduled timers
+        self._stale = 0
+
+    def __len__(self) -> int:
+        """Number of pending timers"""
+        return len(self._heap) - self._stale
+
+    def call_at(self, deadline: float, callback, *args) -> Timer:
+        """Run `callback(*args)` once at `deadline`"""
+        timer = Timer(deadline, callback, args)
+        self._push(timer)
+        return timer
+
+    def call_later(self, delay: float, callback, *args) -> Timer:
+        """Run `callback(*args)` once after `delay` seconds"""
+        return self.call_at(self.clock() + delay, callback, *args)
+
+    def call_every(self, interval: float, callback, *args, jitter: float = 0.0, start: float = None,
+                   stagger: bool = False) -> Timer:
+        """Run `callback(*args)` every `interval` seconds
+
+        Parameters:
+            interval (float): Period in seconds. 0 runs the callback on every `Scheduler.run_due()` call
+            jitter (float): Maximum random delay added to each period, in seconds
+            start (float): Deadline of the first run. Defaults to one interval from now
+            stagger (bool): Delay the first run by a random fraction of the interval
+        """
+        if interval < 0:
+            raise ValueError("interval must not be negative")
+        if start is None:
+            start = self.clock() + interval
+        if stagger:
+            start += self.random.uniform(0, interval)
+        timer = Timer(start, callback, args, interval, jitter)
+        if jitter:
+            timer.deadline = start + self.random.uniform(0, jitter)
+        self._push(timer)
+        return timer
+
+    def reschedule(self, timer: Timer, deadline: float):
+        """Move `timer` to `deadline`, also if it already fired or was cancelled
+
+        Periodic timers continue their period from there.
+        """
+        self._unqueue(timer)
+        timer.cancelled = False
+        timer.deadline = timer.base = deadline
+        self._push(timer)
+
+    def cancel(self, timer: Timer):
+        """Cancel `timer`. Cancelling a timer that already fired or was cancelled does nothing"""
+        timer.cancelled = True
+        self._unqueue(timer)
+
+    def _unqueue(self, timer: Timer):
+        if timer.sequence is None:
+            return
+        # the heap entry stays behind and is skipped when it reaches the top
+        timer.sequence = None
+        self._stale += 1
+        if self._stale > 64 and self._stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if entry[1] == entry[2].sequence]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def next_deadline(self):
+        """Deadline of the next pending timer or None"""
+        heap = self._heap
+        while heap and heap[0][1] != heap[0][2].sequence:
+            heapq.heappop(heap)
+            self._stale -= 1
+        return heap[0][0] if heap else None
+
+    def timeout(self, now: float = None, maximum: float = None):
+        """Seconds until the next deadline, 0 if a timer is due
+
+        Returns `maximum` (None: wait indefinitely) if no timer is pending or the next deadline is further away. The
+        result can be passed to `select.select()` directly.
+        """
+        deadline = self.next_deadline()
+        if deadline is None:
+            return maximum
+        if now is None:
+            now = self.clock()
+        timeout = max(deadline - now, 0.0)
+        if maximum is not None and timeout > maximum:
+            return maximum
+        return timeout
+
+    def run_due(self, now: float = None) -> int:
+        """Run the callbacks of all timers whose deadline has passed. Returns the number of callbacks run
+
+        Timers scheduled by the callbacks themselves run in a later call, even if they are already due.
+        """
+        if now is None:
+            now = self.clock()
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            _, sequence, timer = heapq.heappop(heap)
+            if sequence != timer.sequence:
+                self._stale -= 1
+            else:
+                timer.sequence = None
+                due.append(timer)
+
+        ran = 0
+        for timer in due:
+            if timer.cancelled or timer.sequence is not None:
+                # cancelled or rescheduled by one of the callbacks that ran before
+                continue
+            if timer.interval is not None:
+                # continue the period, skipping periods that were missed entirely
+                base = timer.base + timer.interval
+                if base <= now and timer.interval:
+                    base += timer.interval * ((now - base) // timer.interval + 1)
+                timer.base = base
+            timer.callback(*timer.args)
+            ran += 1
+
+        # push periodic timers back after all callbacks ran, so one call never runs a timer twice. Timers the
+        # callbacks cancelled or rescheduled themselves are left alone
+        for timer in due:
+            if timer.interval is not None and not timer.cancelled and timer.sequence is None:
+                timer.deadline = timer.base + (self.random.uniform(0, timer.jitter) if timer.jitter else 0.0)
+                self._push(timer)
+        return ran
+
+    def _push(self, timer: Timer):
+        timer.sequence = next(self._sequence)
+        heapq.heappush(self._heap, (timer.deadline, timer.sequence, timer))
@@ -0,0 +1,145 @@
+"""Compact binary serialization of neighbor entries
+
+Neighbor entries are serialized as the raw bytes of their LLDPDU plus a small fixed-size header, instead of pickling the
+nested TLV objects. Encoding is a few `bytes` concatenations; a batch of many entries is a single contiguous buffer that
+can be sent through a pipe or socket as is. The receiving side can walk the records without decoding anything
+(`iter_records()`) and only decode the LLDPDUs it needs.
+
+Record format (little endian):
+
+    offset  size  field
+    0       2     length of the LLDPDU
+    2       2     length of the MSAP key (a prefix of the LLDPDU: packed Chassis ID and Port ID TLV)
+    4       2     TTL
+    6       1     length of the interface name
+    7       8     deadline   (float, seconds)
+    15      8     first_seen (float, seconds)
+    23      8     last_seen  (float, seconds)
+    31      n     interface name (UTF-8)
+    31+n    m     LLDPDU
+
+A batch is an 10-byte header (magic b"LLDN", format version, number of records) followed by the records.
+
+`LLDPDU`, `Neighbor` and `NeighborTable` use this format when pickled.
+"""
+import struct
+
+from lldp.lldpdu import LLDPDU
+from lldp.neighbors import Neighbor, NeighborTable
+
+MAGIC = b"LLDN"
+VERSION = 1
+
+_record = struct.Struct("<HHHBddd")
+_batch = struct.Struct("<4sHI")
+
+BATCH_HEADER_SIZE = _batch.size
+
+
+def encode_neighbor(neighbor: Neighbor, clock_offset: float = 0.0) -> bytes:
+    """Encode a single neighbor entry
+
+    `clock_offset` is added to the deadline and the first/last seen times, e.g. `time.time() - time.monotonic()` to
+    store wall clock times.
+    """
+    raw = bytes(neighbor.lldpdu)
+    interface = neighbor.interface.encode("utf-8")
+    return _record.pack(len(raw), len(neighbor.key), neighbor.ttl, len(interface), neighbor.deadline + clock_offset,
+                        neighbor.first_seen + clock_offset, neighbor.last_seen + clock_offset) + interface + raw
+
+
+def encode_neighbors(neighbors, clock_offset: float = 0.0) -> bytes:
+    """Encode an iterable of neighbor entries into one batch, see `encode_neighbor()`"""
+    pack = _record.pack
+    parts = [b""]
+    for neighbor in neighbors:
+        raw = bytes(neighbor.lldpdu)
+        interface = neighbor.interface.encode("utf-8")
+        parts.append(pack(len(raw), len(neighbor.key), neighbor.ttl, len(interface), neighbor.deadline + clock_offset,
+                          neighbor.first_seen + clock_offset, neighbor.last_seen + clock_offset))
+        parts.append(interface)
+        parts.append(raw)
+    parts[0] = _batch.pack(MAGIC, VERSION, (len(parts) - 1) // 3)
+    return b"".join(parts)
+
+
+def read_record(view: memoryview, offset: int):
+    """Read the record at `offset` of `view`
+
+    Returns the record as (key, interface, ttl, deadline, first_seen, last_seen, lldpdu), where key and lldpdu are
+    slices of `view`, and the offset of the next record.
+
+    Raises a `ValueError` if the record is truncated.
+    """
+    end = offset + _record.size
+    if end > len(view):
+        raise ValueError("Truncated neighbor record at offset {}".format(offset))
+    length, key_length, ttl, interface_length, deadline, first_seen, last_seen = _record.unpack_from(view, offset)
+    start = end + interface_length
+    end = start + length
+    if end > len(view):
+        raise ValueError("Truncated neighbor record at offset {}".format(offset))
+    interface = str(view[start - interface_length:start], "utf-8")
+    return (view[start:start + key_length], interface, ttl, deadline, first_seen, last_seen, view[start:end]), end
+
+
+def iter_records(data, offset: int = 0, count: int = None):
+    """Walk encoded records without decoding the LLDPDUs
+
+    Yields the records (see `read_record()`) starting at `offset` until `count` records have been read or the end of
+    `data` is reached.
+
+    Raises a `ValueError` if a record is truncated.
+    """
+    view = memoryview(data)
+    end = len(view)
+    while offset < end and (count is None or count > 0):
+        record, offset = read_record(view, offset)
+        yield record
+        if count is not None:
+            count -= 1
+
+
+def decode_record(record, clock_offset: float = 0.0) -> Neighbor:
+    """Decode a record into a `Neighbor`, subtracting `clock_offset` from its times (see `encode_neighbor()`)"""
+    key, interface, ttl, deadline, first_seen, last_seen, raw = record
+    neighbor = Neighbor(bytes(key), LLDPDU.from_bytes(bytes(raw)), interface, ttl, first_seen - clock_offset)
+    neighbor.deadline = deadline - clock_offset
+    neighbor.last_seen = last_seen - clock_offset
+    return neighbor
+
+
+def decode_neighbor(data) -> Neighbor:
+    """Decode a single neighbor entry encoded with `encode_neighbor()`"""
+    return decode_record(next(iter_records(data, count=1)))
+
+
+def batch_header(data) -> int:
+    """Validate the header of a batch encoded with `encode_neighbors()` and return the number of records
+
+    Raises a `ValueError` if `data` is not a batch of a supported version.
+    """
+    if len(data) < _batch.size:
+        raise ValueError("Truncated neighbor batch")
+    magic, version, count = _batch.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a neighbor batch or unsupported version")
+    return count
+
+
+def batch_records(data):
+    """Walk the records of a batch encoded with `encode_neighbors()`, see `iter_records()`"""
+    return iter_records(data, _batch.size, batch_header(data))
+
+
+def decode_neighbors(data, clock_offset: float = 0.0) -> list:
+    """Decode a batch encoded with `encode_neighbors()` into a list of `Neighbor` objects"""
+    return [decode_record(record, clock_offset) for record in batch_records(data)]
+
+
+def decode_table(data) -> NeighborTable:
+    """Decode a batch encoded with `encode_neighbors()` into a `NeighborTable`"""
+    table = NeighborTable()
+    for neighbor in decode_neighbors(data):
+        table.insert(neighbor)
+    return table
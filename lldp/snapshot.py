@@ -0,0 +1,141 @@
+"""Persistent neighbor snapshots for warm restarts
+
+After a restart the neighbor table is empty until every neighbor has re-announced itself, which takes up to a full
+TTL and looks like a mass outage to anything consuming the table. The agent therefore periodically writes its table to
+a snapshot file and reloads it on startup.
+
+A snapshot is a neighbor batch (see `lldp.serialize`) whose deadline and first/last seen times have been converted
+from `time.monotonic()` to wall clock (`time.time()`) values, so they stay meaningful across processes and reboots.
+Files are replaced atomically, a crash while writing leaves the previous snapshot in place.
+
+`NeighborSnapshot` maps a snapshot into memory and indexes the entries that have not expired yet by reading their
+fixed-size record headers only. Keys, TTLs and times are available without decoding any LLDPDU; LLDPDUs are decoded
+when an entry is restored into a `NeighborTable`.
+"""
+import mmap
+import os
+import time
+
+from lldp.neighbors import NeighborTable
+from lldp.serialize import BATCH_HEADER_SIZE, batch_header, decode_record, encode_neighbors, read_record
+
+
+def clock_offset() -> float:
+    """Offset to add to `time.monotonic()` values to get wall clock times"""
+    return time.time() - time.monotonic()
+
+
+def save(table: NeighborTable, path: str) -> int:
+    """Write the neighbors of `table` to the snapshot file `path`. Returns the number of entries written"""
+    data = encode_neighbors(table, clock_offset())
+    temporary = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(temporary, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+    return len(table)
+
+
+class NeighborSnapshot:
+    """Memory-mapped, read-only view of a snapshot file
+
+    Only entries whose deadline lies after `now` (wall clock, default: the current time) are visible. Entries are
+    (key, interface, ttl, deadline, first_seen, last_seen, lldpdu) tuples as returned by `lldp.serialize.read_record()`
+    with wall clock times; key and lldpdu are memoryviews into the mapping. Entries may be held past
+    `NeighborSnapshot.close()`, the mapping is then closed once the last of them is garbage collected.
+
+    Raises a `ValueError` if the file is not a valid snapshot.
+    """
+
+    def __init__(self, path: str, now: float = None):
+        if now is None:
+            now = time.time()
+        self._map = None
+        self._view = None
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < BATCH_HEADER_SIZE:
+                raise ValueError("Truncated neighbor snapshot")
+            self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        try:
+            self._view = memoryview(self._map)
+            count = batch_header(self._view)
+            self._offsets = []
+            self.expired = 0
+            offset = BATCH_HEADER_SIZE
+            for _ in range(count):
+                record, next_offset = read_record(self._view, offset)
+                if record[3] > now:
+                    self._offsets.append(offset)
+                else:
+                    self.expired += 1
+                offset = next_offset
+                del record
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of unexpired entries"""
+        return len(self._offsets)
+
+    def __getitem__(self, index: int):
+        return read_record(self._view, self._offsets[index])[0]
+
+    def __iter__(self):
+        view = self._view
+        for offset in self._offsets:
+            yield read_record(view, offset)[0]
+
+    def restore(self, table: NeighborTable) -> int:
+        """Add the unexpired entries to `table`, converting their times back to `time.monotonic()` values
+
+        Entries that are already in the table (e.g. refreshed since the snapshot was written) are not overwritten.
+        Entries with an LLDPDU that cannot be decoded are skipped.
+
+        Returns the number of restored entries.
+        """
+        offset = clock_offset()
+        restored = 0
+        for record in self:
+            if bytes(record[0]) in table:
+                continue
+            try:
+                neighbor = decode_record(record, offset)
+            except (ValueError, IndexError):
+                continue
+            table.insert(neighbor)
+            restored += 1
+        return restored
+
+    def close(self):
+        view, self._view = self._view, None
+        mapping, self._map = self._map, None
+        try:
+            if view is not None:
+                view.release()
+            if mapping is not None:
+                mapping.close()
+        except BufferError:
+            # Entries are still held, the mapping is closed once they are garbage collected
+            pass
+
+
+def load(table: NeighborTable, path: str) -> int:
+    """Restore the unexpired entries of the snapshot file `path` into `table`. Returns the number of restored entries"""
+    with NeighborSnapshot(path) as snapshot:
+        return snapshot.restore(table)
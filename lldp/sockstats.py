@@ -0,0 +1,98 @@
+import os
+import socket
+import struct
+
+# Linux constants not exported by the socket module
+SOL_PACKET = getattr(socket, "SOL_PACKET", 263)
+PACKET_STATISTICS = 6
+SO_RCVBUFFORCE = getattr(socket, "SO_RCVBUFFORCE", 33)
+
+_tpacket_stats = struct.Struct("@II")
+
+
+def read_packet_statistics(sock) -> tuple:
+    """Read and reset the PACKET_STATISTICS of a packet socket
+
+    Returns a tuple (tp_packets, tp_drops). Note that the kernel resets both counters on every read and that
+    tp_packets includes the dropped frames.
+
+    Raises an `OSError` if `sock` is not a packet socket.
+    """
+    return _tpacket_stats.unpack(sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, _tpacket_stats.size))
+
+
+def receive_queue_bytes(sock, proc_path: str = "/proc/net/packet") -> int:
+    """Return the number of bytes waiting in the receive queue of packet socket `sock`
+
+    The value is taken from the Rmem column of /proc/net/packet. Returns None if the socket is not listed.
+    """
+    inode = os.fstat(sock.fileno()).st_ino
+    try:
+        with open(proc_path) as f:
+            header = f.readline().split()
+            rmem_col, inode_col = header.index("Rmem"), header.index("Inode")
+            for line in f:
+                fields = line.split()
+                if len(fields) > inode_col and int(fields[inode_col]) == inode:
+                    return int(fields[rmem_col])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class PacketSocketMonitor:
+    """Kernel drop accounting and receive buffer autotuning for a packet socket
+
+    When the agent does not read frames fast enough the kernel drops them once the socket's receive buffer is full.
+    `PacketSocketMonitor.poll()` reads the PACKET_STATISTICS of the socket, adds them to the agent's metrics and
+    reports the current receive queue depth. If drops occurred the receive buffer is doubled, up to `max_rcvbuf`.
+
+    Growing the buffer first tries SO_RCVBUFFORCE, which requires CAP_NET_ADMIN but is not limited by
+    net.core.rmem_max, and falls back to SO_RCVBUF.
+
+    Parameters:
+        interval (float): Seconds between two polls. Used by the agent loop
+        max_rcvbuf (int): Upper bound for the receive buffer size in bytes. 0 disables autotuning
+    """
+
+    def __init__(self, interval: float = 5.0, max_rcvbuf: int = 4 * 1024 * 1024):
+        self.interval = interval
+        self.max_rcvbuf = max_rcvbuf
+        self.supported = True
+
+    @staticmethod
+    def rcvbuf(sock) -> int:
+        """The receive buffer size requested for `sock`. The kernel reports (and reserves) twice this value"""
+        return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) // 2
+
+    def grow(self, sock) -> int:
+        """Double the receive buffer of `sock` without exceeding `max_rcvbuf`. Returns the new size"""
+        current = self.rcvbuf(sock)
+        size = min(current * 2, self.max_rcvbuf)
+        if size <= current:
+            return current
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, size)
+        except OSError:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+        return self.rcvbuf(sock)
+
+    def poll(self, sock, metrics):
+        """Update `metrics` with the socket's statistics and grow the receive buffer if frames were dropped"""
+        if not self.supported:
+            return
+        try:
+            packets, drops = read_packet_statistics(sock)
+        except OSError:
+            # Not a packet socket, e.g. in tests
+            self.supported = False
+            return
+
+        metrics.kernel_packets.inc(packets)
+        metrics.kernel_drops.inc(drops)
+        if drops > 0 and self.max_rcvbuf:
+            self.grow(sock)
+        metrics.receive_buffer.set(self.rcvbuf(sock))
+        queued = receive_queue_bytes(sock)
+        if queued is not None:
+            metrics.receive_queue.set(queued)
@@ -0,0 +1,300 @@
+"""Compact, column-oriented neighbor storage
+
+`NeighborTable` keeps the decoded `LLDPDU` of every neighbor, i.e. a dozen Python objects per entry, which adds up to
+kilobytes per neighbor. Collectors that hold the neighbors of a whole fabric need something smaller. `NeighborStore`
+keeps only the fields needed to answer topology questions, in parallel `array` columns indexed by slot:
+
+    ifindex            local interface index
+    chassis, port      ids of the packed Chassis ID and Port ID TLVs in the string table
+    ttl, deadline      announced TTL and `time.monotonic()` value after which the neighbor expires
+    last_seen          `time.monotonic()` value of the most recent LLDPDU
+    supported, enabled system capability bitmasks
+    address_family     family of the management address: 0 (none), 4 or 6
+    address            management address, 16 bytes per slot in a bytearray (IPv4 addresses use the first 4)
+    system_name,
+    system_description,
+    port_description   ids in the string table, 0 if the LLDPDU did not carry the TLV
+
+Variable length values are stored once in a reference counted `StringTable`, so e.g. the system description shared by
+all switches of a vendor costs one string instead of one per neighbor. Slots of removed neighbors are put on a free
+list and reused. Like `NeighborTable`, the store keeps its slots in an expiry wheel of `EXPIRY_BUCKET` seconds wide
+buckets, so `NeighborStore.expire()` only touches the neighbors that are due instead of all slots.
+
+Run `python -m lldp.bench memory` to compare the memory used per neighbor with `NeighborTable`.
+"""
+import array
+import heapq
+import time
+from ipaddress import IPv4Address, IPv6Address
+
+from lldp.lldpdu import LLDPDU
+from lldp.neighbors import EXPIRY_BUCKET
+from lldp.tlv import ChassisIdTLV, ManagementAddressTLV, PortDescriptionTLV, PortIdTLV, SystemCapabilitiesTLV, \
+    SystemDescriptionTLV, SystemNameTLV
+
+_ADDRESS_SIZE = 16
+
+
+class StringTable:
+    """Reference counted table of interned values (str or bytes)
+
+    Id 0 is reserved for "no value". Ids of values whose reference count drops to zero are reused.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._values = [None]
+        self._refs = array.array("I", [0])
+        self._free = []
+
+    def __len__(self) -> int:
+        """Number of distinct values in the table"""
+        return len(self._ids)
+
+    def __getitem__(self, id: int):
+        return self._values[id]
+
+    def intern(self, value) -> int:
+        """Add a reference to `value` and return its id. None is mapped to 0"""
+        if value is None:
+            return 0
+        id = self._ids.get(value)
+        if id is None:
+            if self._free:
+                id = self._free.pop()
+                self._values[id] = value
+            else:
+                id = len(self._values)
+                self._values.append(value)
+                self._refs.append(0)
+            self._ids[value] = id
+        self._refs[id] += 1
+        return id
+
+    def find(self, value) -> int:
+        """Return the id of `value` without adding a reference, 0 if it is not in the table"""
+        return self._ids.get(value, 0)
+
+    def release(self, id: int):
+        """Drop a reference to the value with id `id`"""
+        if id == 0:
+            return
+        self._refs[id] -= 1
+        if self._refs[id] == 0:
+            del self._ids[self._values[id]]
+            self._values[id] = None
+            self._free.append(id)
+
+    def refcount(self, id: int) -> int:
+        return self._refs[id]
+
+
+class NeighborStore:
+    """Neighbors stored in parallel columns
+
+    Neighbors are identified by their MSAP identifier (chassis ID and port ID), like in `NeighborTable`. Rows are
+    addressed by slot number; `NeighborStore.entry()` materializes a row as a dict.
+    """
+
+    def __init__(self):
+        self.strings = StringTable()
+        self._slots = {}
+        self._free = []
+        self.used = bytearray()
+        self.ifindex = array.array("I")
+        self.chassis = array.array("I")
+        self.port = array.array("I")
+        self.ttl = array.array("H")
+        self.deadline = array.array("d")
+        self.last_seen = array.array("d")
+        self.supported = array.array("H")
+        self.enabled = array.array("H")
+        self.address_family = array.array("B")
+        self.address = bytearray()
+        self.system_name = array.array("I")
+        self.system_description = array.array("I")
+        self.port_description = array.array("I")
+        # expiry wheel: bucket number -> slots whose deadline falls into the bucket, and a heap of the bucket numbers
+        self._wheel = {}
+        self._buckets = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __iter__(self):
+        """Iterate over the slots of all neighbors"""
+        return iter(list(self._slots.values()))
+
+    def __contains__(self, key) -> bool:
+        return self.slot(*key) is not None
+
+    def slot(self, chassis: bytes, port: bytes):
+        """Get the slot of the neighbor with the packed Chassis ID TLV `chassis` and Port ID TLV `port` or None"""
+        chassis_id = self.strings.find(chassis)
+        port_id = self.strings.find(port)
+        if not chassis_id or not port_id:
+            return None
+        return self._slots.get((chassis_id << 32) | port_id)
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        slot = len(self.used)
+        self.used.append(0)
+        for column in (self.ifindex, self.chassis, self.port, self.ttl, self.deadline, self.last_seen, self.supported,
+                       self.enabled, self.address_family, self.system_name, self.system_description,
+                       self.port_description):
+            column.append(0)
+        self.address.extend(bytes(_ADDRESS_SIZE))
+        return slot
+
+    def _schedule(self, slot: int, deadline: float):
+        bucket = int(deadline // EXPIRY_BUCKET)
+        slots = self._wheel.get(bucket)
+        if slots is None:
+            slots = self._wheel[bucket] = set()
+            heapq.heappush(self._buckets, bucket)
+        slots.add(slot)
+
+    def _unschedule(self, slot: int, deadline: float):
+        self._wheel[int(deadline // EXPIRY_BUCKET)].discard(slot)
+
+    def update(self, lldpdu: LLDPDU, ifindex: int = 0, now: float = None) -> int:
+        """Add or refresh the neighbor that sent `lldpdu`
+
+        Raises a `ValueError` if the LLDPDU lacks one of the mandatory TLVs.
+
+        Returns the slot of the neighbor.
+        """
+        if not lldpdu.complete():
+            raise ValueError("Incomplete LLDPDU")
+        if now is None:
+            now = time.monotonic()
+
+        strings = self.strings
+        chassis = strings.intern(bytes(lldpdu[0]))
+        port = strings.intern(bytes(lldpdu[1]))
+        key = (chassis << 32) | port
+        ttl = lldpdu[2].value
+        deadline = now + ttl
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._allocate()
+            self._slots[key] = slot
+            self.used[slot] = 1
+            self.chassis[slot] = chassis
+            self.port[slot] = port
+            self._schedule(slot, deadline)
+        else:
+            # the row already holds a reference to chassis and port
+            strings.release(chassis)
+            strings.release(port)
+            if self.deadline[slot] // EXPIRY_BUCKET != deadline // EXPIRY_BUCKET:
+                self._unschedule(slot, self.deadline[slot])
+                self._schedule(slot, deadline)
+
+        self.ifindex[slot] = ifindex
+        self.ttl[slot] = ttl
+        self.deadline[slot] = deadline
+        self.last_seen[slot] = now
+
+        system_name = system_description = port_description = None
+        supported = enabled = family = 0
+        address = b""
+        for tlv in lldpdu:
+            if isinstance(tlv, SystemNameTLV):
+                system_name = tlv.value
+            elif isinstance(tlv, SystemDescriptionTLV):
+                system_description = tlv.value
+            elif isinstance(tlv, PortDescriptionTLV):
+                port_description = tlv.value
+            elif isinstance(tlv, SystemCapabilitiesTLV):
+                supported, enabled = tlv.value >> 16, tlv.value & 0xffff
+            elif isinstance(tlv, ManagementAddressTLV) and not family:
+                family = tlv.family
+                address = tlv.packed
+        self.supported[slot] = supported
+        self.enabled[slot] = enabled
+        self.address_family[slot] = family
+        offset = slot * _ADDRESS_SIZE
+        self.address[offset:offset + _ADDRESS_SIZE] = address.ljust(_ADDRESS_SIZE, b"\x00")
+
+        # intern the new values before releasing the old ones, so unchanged values are not dropped from the table
+        for column, value in ((self.system_name, system_name), (self.system_description, system_description),
+                              (self.port_description, port_description)):
+            old = column[slot]
+            column[slot] = strings.intern(value)
+            strings.release(old)
+        return slot
+
+    def remove(self, slot: int):
+        """Remove the neighbor in `slot`"""
+        if not self.used[slot]:
+            raise KeyError(slot)
+        self._unschedule(slot, self.deadline[slot])
+        self._release(slot)
+
+    def _release(self, slot: int):
+        strings = self.strings
+        chassis, port = self.chassis[slot], self.port[slot]
+        del self._slots[(chassis << 32) | port]
+        for id in (chassis, port, self.system_name[slot], self.system_description[slot], self.port_description[slot]):
+            strings.release(id)
+        self.used[slot] = 0
+        self.chassis[slot] = self.port[slot] = 0
+        self.system_name[slot] = self.system_description[slot] = self.port_description[slot] = 0
+        self._free.append(slot)
+
+    def expire(self, now: float = None) -> list:
+        """Remove all neighbors whose TTL has run out and return their slots"""
+        if now is None:
+            now = time.monotonic()
+        expired = []
+        kept = None
+        wheel, buckets, deadlines = self._wheel, self._buckets, self.deadline
+        last = int(now // EXPIRY_BUCKET)
+        while buckets and buckets[0] <= last:
+            bucket = heapq.heappop(buckets)
+            for slot in wheel.pop(bucket):
+                if deadlines[slot] <= now:
+                    expired.append(slot)
+                else:
+                    # the current bucket is only partly due
+                    if kept is None:
+                        kept = set()
+                    kept.add(slot)
+        if kept:
+            wheel[last] = kept
+            heapq.heappush(buckets, last)
+        for slot in expired:
+            self._release(slot)
+        return expired
+
+    def management_address(self, slot: int):
+        """Return the management address of the neighbor in `slot` as IPv4Address/IPv6Address or None"""
+        family = self.address_family[slot]
+        offset = slot * _ADDRESS_SIZE
+        if family == 4:
+            return IPv4Address(bytes(self.address[offset:offset + 4]))
+        if family == 6:
+            return IPv6Address(bytes(self.address[offset:offset + 16]))
+        return None
+
+    def entry(self, slot: int) -> dict:
+        """Materialize the neighbor in `slot`"""
+        if not self.used[slot]:
+            raise KeyError(slot)
+        strings = self.strings
+        return {
+            "ifindex": self.ifindex[slot],
+            "chassis_id": ChassisIdTLV.from_bytes(strings[self.chassis[slot]]),
+            "port_id": PortIdTLV.from_bytes(strings[self.port[slot]]),
+            "ttl": self.ttl[slot],
+            "deadline": self.deadline[slot],
+            "last_seen": self.last_seen[slot],
+            "system_name": strings[self.system_name[slot]],
+            "system_description": strings[self.system_description[slot]],
+            "port_description": strings[self.port_description[slot]],
+            "capabilities": (self.supported[slot], self.enabled[slot]),
+            "management_address": self.management_address(slot),
+        }
@@ -0,0 +1,366 @@
+"""Agents for groups of interfaces in separate worker processes
+
+`Supervisor` starts a number of worker processes. Every worker runs an `InterfaceManager` for its partition of the
+interfaces (see `lldp.interfaces.partition_of()`), so the load of many busy ports is spread across processes and
+cores, and a port that crashes its worker only takes down the agents of that worker. Workers may be pinned to CPUs.
+
+Workers stream the changes of their neighbor tables to the supervisor over a pipe (`DeltaStream`): every
+`sync_interval` seconds a worker sends the neighbors that were added or refreshed, the keys of the removed ones and the
+interfaces that went away. Only neighbors that changed are sent, tracked by the journal of their `NeighborTable`. The
+supervisor merges the deltas of all workers into one table, `Supervisor.neighbors()`. Deltas also carry the current
+values of the worker's `AgentMetrics`, which the supervisor sums up in `Supervisor.metrics`.
+
+A worker that exits is restarted after `restart_delay` seconds, doubled for every further crash in a row up to
+`max_restart_delay`. Its neighbors stay in the merged table until the new worker refreshes them or they expire.
+"""
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import time
+
+from .agent import EXPIRY_RESOLUTION, StdoutLogger
+from .interfaces import InterfaceManager
+from .metrics import AgentMetrics
+from .netlink import LinkMonitor
+from .scheduler import Scheduler, Timer
+from .serialize import decode_neighbors, encode_neighbors
+
+# A worker that ran at least this many seconds before exiting is restarted without delay backoff
+STABLE_RUNTIME = 60.0
+
+
+class DeltaStream:
+    """Sends the neighbor changes of the agents of `manager` over `connection`
+
+    Every delta is a tuple `(upserts, removals, gone, metrics)`: the added or refreshed neighbors encoded with
+    `lldp.serialize.encode_neighbors()`, a list of `(interface, key)` tuples of removed neighbors, the names of the
+    interfaces whose agent (and with it all its neighbors) is gone, and the values of the `registry` of the agents'
+    `AgentMetrics` (see `Registry.values()`) or None.
+    """
+
+    def __init__(self, manager: InterfaceManager, connection, registry=None):
+        self.manager = manager
+        self.connection = connection
+        self.registry = registry
+        self._tables = {}
+        self._metrics = None
+
+    def sync(self) -> bool:
+        """Send the changes since the last call. Returns False if there were none"""
+        upserts = []
+        removals = []
+        gone = []
+        agents = {agent.interface_name: agent for agent in self.manager.agents.values()}
+        tables = self._tables
+        for name in list(tables):
+            if name not in agents:
+                del tables[name]
+                gone.append(name)
+        for name, agent in agents.items():
+            table = agent.neighbors
+            if tables.get(name) is not table:
+                # a new agent, e.g. after a MAC address change, or a replaced table: send all of it
+                if name in tables:
+                    gone.append(name)
+                tables[name] = table
+                table.journal = set()
+                upserts.extend(table)
+                continue
+            journal = table.journal
+            for key in journal:
+                neighbor = table.get(key)
+                if neighbor is None:
+                    removals.append((name, key))
+                else:
+                    upserts.append(neighbor)
+            journal.clear()
+        metrics = self.registry.values() if self.registry is not None else None
+        if not (upserts or removals or gone) and metrics == self._metrics:
+            return False
+        self._metrics = metrics
+        self.connection.send((encode_neighbors(upserts), removals, gone, metrics))
+        return True
+
+
+def run_worker(factory, patterns, number: int, count: int, connection, sync_interval: float = 0.5, links=None,
+               registry=None):
+    """Worker process: run the agents of partition `number` out of `count` and stream their neighbor changes
+
+    Parameters:
+        factory: Creates the agents, see `InterfaceManager`
+        patterns (sequence of str): Interface name patterns
+        sync_interval (float): Seconds between two deltas
+        links (LinkMonitor): Source of the interfaces. A new `LinkMonitor` is opened if omitted
+        registry (Registry): Registry of the `AgentMetrics` used by the agents created by `factory`, streamed to the
+            supervisor along with the neighbor changes
+    """
+    manager = InterfaceManager(factory, LinkMonitor() if links is None else links, patterns, (number, count))
+    # the supervisor stops its workers with SIGTERM, the agents then send their shutdown LLDPDUs
+    signal.signal(signal.SIGTERM, lambda signum, frame: manager.stop())
+    stream = DeltaStream(manager, connection, registry)
+    manager.scheduler.call_every(sync_interval, stream.sync)
+    try:
+        manager.run()
+    finally:
+        connection.close()
+
+
+class Worker:
+    """A worker process of the supervisor"""
+    __slots__ = ("number", "process", "connection", "started", "failures", "restart", "metrics")
+
+    def __init__(self, number: int):
+        self.number = number
+        self.process = None
+        self.connection = None
+        self.started = None
+        self.failures = 0
+        self.restart = None
+        # latest values of the worker's AgentMetrics
+        self.metrics = None
+
+
+def _bootstrap(target, number: int, count: int, connection, cpu):
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    target(number, count, connection)
+
+
+class Supervisor:
+    """Runs `workers` worker processes and merges their neighbor tables
+
+    Parameters:
+        target: Called as `target(number, count, connection)` in worker process `number` out of `count`, e.g.
+            `functools.partial(run_worker, factory, patterns)`. It sends deltas (see `DeltaStream`) over `connection`
+        workers (int): Number of worker processes
+        cpus (sequence of int): Pin worker `i` to CPU `cpus[i % len(cpus)]`. Workers are not pinned if omitted
+        restart_delay (float): Seconds before a crashed worker is restarted
+        max_restart_delay (float): Upper bound for the restart delay of a worker crashing repeatedly
+        logger: A logger instance. Used for testing
+
+    Attributes:
+        metrics (AgentMetrics): The metrics of all workers summed up. Counters and histograms include those of exited
+            workers, `AgentMetrics.neighbors` is the size of the merged table
+        registry (Registry): Registry of `metrics` plus the worker restarts, to be exposed with a `MetricsServer`
+    """
+
+    def __init__(self, target, workers: int, cpus=None, restart_delay: float = 1.0, max_restart_delay: float = 30.0,
+                 logger=None):
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+        self.target = target
+        self.workers = [Worker(number) for number in range(workers)]
+        self.cpus = list(cpus) if cpus else None
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.logger = StdoutLogger() if logger is None else logger
+        self.scheduler = Scheduler()
+        self.running = False
+        self.metrics = AgentMetrics()
+        self.registry = self.metrics.registry
+        self._neighbor_gauge = self.metrics.neighbors
+        self._worker_metrics = list(self.registry.metrics)
+        # counters and histograms of exited workers
+        self._retired = [metric.get() for metric in self._worker_metrics]
+        self._restarts = self.registry.counter("lldp_worker_restarts", "Worker processes restarted after exiting")
+        # merged neighbor table: interface name -> {key: Neighbor}
+        self._interfaces = {}
+        self._count = 0
+        self._context = multiprocessing.get_context("fork")
+        self._wakeup = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def neighbors(self):
+        """Iterate the neighbors reported by all workers"""
+        for table in list(self._interfaces.values()):
+            yield from list(table.values())
+
+    def get(self, interface: str, key: bytes):
+        """Get the neighbor with MSAP identifier `key` seen on `interface` or None"""
+        return self._interfaces.get(interface, {}).get(key)
+
+    def apply(self, delta, worker: Worker = None):
+        """Merge a delta sent by `worker`"""
+        upserts, removals, gone, metrics = delta
+        interfaces = self._interfaces
+        for name in gone:
+            table = interfaces.pop(name, None)
+            if table is not None:
+                self._count -= len(table)
+        for name, key in removals:
+            table = interfaces.get(name)
+            if table is not None and table.pop(key, None) is not None:
+                self._count -= 1
+        for neighbor in decode_neighbors(upserts):
+            table = interfaces.get(neighbor.interface)
+            if table is None:
+                table = interfaces[neighbor.interface] = {}
+            if neighbor.key not in table:
+                self._count += 1
+            table[neighbor.key] = neighbor
+        self._neighbor_gauge.set(self._count)
+        if metrics is not None and worker is not None:
+            worker.metrics = metrics
+            self._merge_metrics()
+
+    def _merge_metrics(self):
+        workers = [worker.metrics for worker in self.workers if worker.metrics is not None]
+        for i, metric in enumerate(self._worker_metrics):
+            if metric is self._neighbor_gauge:
+                continue
+            values = [values[i] for values in workers]
+            if metric.kind != "gauge":
+                values.append(self._retired[i])
+            metric.merge(values)
+        if workers:
+            # a ratio, the mean is more meaningful than the sum
+            self.metrics.intern_hit_ratio.value /= len(workers)
+
+    def expire(self, now: float = None) -> int:
+        """Remove the neighbors whose TTL has run out, e.g. those of a crashed worker. Returns their number"""
+        if now is None:
+            now = self.scheduler.clock()
+        expired = 0
+        for name, table in list(self._interfaces.items()):
+            keys = [key for key, neighbor in table.items() if neighbor.deadline <= now]
+            for key in keys:
+                del table[key]
+            if not table:
+                del self._interfaces[name]
+            expired += len(keys)
+        self._count -= expired
+        self._neighbor_gauge.set(self._count)
+        return expired
+
+    def start(self, worker: Worker):
+        """Start the process of `worker`"""
+        receiver, sender = self._context.Pipe(duplex=False)
+        cpu = self.cpus[worker.number % len(self.cpus)] if self.cpus else None
+        process = self._context.Process(target=_bootstrap, name="lldp-worker-{}".format(worker.number),
+                                        args=(self.target, worker.number, len(self.workers), sender, cpu))
+        process.start()
+        # the worker holds the only sending end, so the pipe reports EOF once it exits
+        sender.close()
+        worker.process = process
+        worker.connection = receiver
+        worker.started = time.monotonic()
+        worker.restart = None
+
+    def _receive(self, worker: Worker):
+        """Apply the pending deltas of `worker`. Returns False once the worker closed the pipe"""
+        connection = worker.connection
+        try:
+            while connection.poll():
+                self.apply(connection.recv(), worker)
+        except (EOFError, OSError):
+            connection.close()
+            worker.connection = None
+            return False
+        return True
+
+    def _exited(self, worker: Worker):
+        if worker.connection is not None:
+            # deltas sent before the worker exited
+            self._receive(worker)
+            if worker.connection is not None:
+                worker.connection.close()
+                worker.connection = None
+        if worker.metrics is not None:
+            # a restarted worker counts from 0 again, keep the counts of this one
+            for i, metric in enumerate(self._worker_metrics):
+                if metric.kind != "gauge":
+                    metric.merge([self._retired[i], worker.metrics[i]])
+                    self._retired[i] = metric.get()
+            worker.metrics = None
+            self._merge_metrics()
+        process = worker.process
+        process.join()
+        worker.process = None
+        if not self.running:
+            return
+        if time.monotonic() - worker.started >= STABLE_RUNTIME:
+            worker.failures = 0
+        delay = min(self.restart_delay * 2 ** worker.failures, self.max_restart_delay)
+        worker.failures += 1
+        self.logger.log("Worker {} exited with status {}, restarting in {:.1f}s".format(
+            worker.number, process.exitcode, delay))
+        worker.restart = Timer(0.0, self._restart, (worker,))
+        self.scheduler.reschedule(worker.restart, self.scheduler.clock() + delay)
+
+    def _restart(self, worker: Worker):
+        self._restarts.inc()
+        self.start(worker)
+
+    def run(self):
+        """Supervisor loop
+
+        Starts the workers, merges their deltas and restarts them when they exit, until `Supervisor.stop()` is called.
+        The workers are then stopped with SIGTERM (and killed if they do not exit within 5 seconds).
+        """
+        self.running = True
+        scheduler = self.scheduler
+        wakeup, self._wakeup = socket.socketpair()
+        wakeup.setblocking(False)
+        self._wakeup.setblocking(False)
+        sweep = scheduler.call_every(EXPIRY_RESOLUTION, self.expire)
+        try:
+            for worker in self.workers:
+                self.start(worker)
+            while self.running:
+                scheduler.run_due()
+                waitables = {wakeup: None}
+                for worker in self.workers:
+                    if worker.connection is not None:
+                        waitables[worker.connection] = worker
+                    if worker.process is not None:
+                        waitables[worker.process.sentinel] = worker
+                for ready in multiprocessing.connection.wait(list(waitables), scheduler.timeout()):
+                    worker = waitables[ready]
+                    if worker is None:
+                        wakeup.recv(64)
+                    elif ready is worker.connection:
+                        self._receive(worker)
+                    elif worker.process is not None and ready == worker.process.sentinel:
+                        self._exited(worker)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.running = False
+            scheduler.cancel(sweep)
+            self._stop_workers()
+            self._wakeup.close()
+            self._wakeup = None
+            wakeup.close()
+
+    def _stop_workers(self, timeout: float = 5.0):
+        for worker in self.workers:
+            if worker.restart is not None:
+                self.scheduler.cancel(worker.restart)
+                worker.restart = None
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            worker.process.join(max(deadline - time.monotonic(), 0.0))
+            if worker.process.is_alive():
+                worker.process.kill()
+            self._exited(worker)
+
+    def stop(self):
+        """Stop the supervisor loop
+
+        May be called from another thread or a signal handler.
+        """
+        self.running = False
+        wakeup = self._wakeup
+        if wakeup is not None:
+            try:
+                wakeup.send(b"\x00")
+            except OSError:
+                pass
@@ -0,0 +1,179 @@
+"""Discovery of the local system information announced in the optional TLVs
+
+`SystemInfo` collects
+
+    System Name          /etc/hostname, the kernel host name if the file is missing
+    System Description   PRETTY_NAME of /etc/os-release and the kernel (`os.uname()`)
+    Port Description     the interface alias (/sys/class/net/<interface>/ifalias), the interface name if unset
+    System Capabilities  router if IPv4 forwarding is enabled (/proc/sys/net/ipv4/ip_forward), bridge if the interface
+                         is a bridge port, station otherwise
+    Management Address   the IPv4 address of the interface (SIOCGIFADDR), otherwise its first global IPv6 address
+                         (/proc/net/if_inet6), with the interface index (/sys/class/net/<interface>/ifindex)
+
+and caches the resulting TLVs. `SystemInfo.refresh()` only runs cheap checks: files in /etc are re-read when their
+modification time changes, the small procfs and sysfs attributes (which have no meaningful modification time) are
+re-read and compared, the IPv4 address costs one ioctl. The TLVs are rebuilt only if one of the values changed.
+"""
+import fcntl
+import os
+import socket
+import struct
+from ipaddress import IPv4Address, IPv6Address
+
+from lldp.tlv import ManagementAddressTLV, PortDescriptionTLV, SystemCapabilitiesTLV, SystemDescriptionTLV, \
+    SystemNameTLV
+
+SIOCGIFADDR = 0x8915
+
+_MAX_STRING = 255
+
+
+class _Source:
+    """A small text file whose content is cached
+
+    If `use_mtime` is set, the file is only re-read when its modification time, size or inode changed. Otherwise it is
+    re-read on every check. The content is None if the file does not exist.
+    """
+
+    def __init__(self, path: str, use_mtime: bool = True):
+        self.path = path
+        self.use_mtime = use_mtime
+        self._stamp = None
+        self.content = None
+
+    def check(self) -> bool:
+        """Update the content, returns True if it changed"""
+        if self.use_mtime:
+            try:
+                st = os.stat(self.path)
+                stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+            except OSError:
+                stamp = None
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                content = f.read()
+        except OSError:
+            content = None
+        if content == self.content:
+            return False
+        self.content = content
+        return True
+
+
+def _truncate(text: str) -> str:
+    """Cut `text` to the 255 bytes a string TLV can carry"""
+    raw = text.encode("utf-8")
+    if len(raw) <= _MAX_STRING:
+        return text
+    return raw[:_MAX_STRING].decode("utf-8", "ignore")
+
+
+def _os_name(os_release: str):
+    for line in (os_release or "").splitlines():
+        if line.startswith("PRETTY_NAME="):
+            return line[len("PRETTY_NAME="):].strip().strip("\"'")
+    return None
+
+
+class SystemInfo:
+    """Cached local system information for the interface `interface_name`
+
+    Parameters:
+        interface_name (str): The local interface
+        interval (float): Seconds between change checks, used by the agent
+        root (str): Directory containing etc, proc and sys. Used for testing
+    """
+
+    def __init__(self, interface_name: str, interval: float = 5.0, root: str = "/"):
+        self.interface_name = interface_name
+        self.interval = interval
+        self.root = root
+        interface = os.path.join(root, "sys/class/net", interface_name)
+        self._hostname = _Source(os.path.join(root, "etc/hostname"))
+        self._os_release = _Source(os.path.join(root, "etc/os-release"))
+        self._ifalias = _Source(os.path.join(interface, "ifalias"), use_mtime=False)
+        self._ifindex = _Source(os.path.join(interface, "ifindex"), use_mtime=False)
+        self._forwarding = _Source(os.path.join(root, "proc/sys/net/ipv4/ip_forward"), use_mtime=False)
+        self._if_inet6 = _Source(os.path.join(root, "proc/net/if_inet6"), use_mtime=False)
+        self._brport = os.path.join(interface, "brport")
+        uname = os.uname()
+        self._kernel = "{} {} {} {}".format(uname.sysname, uname.release, uname.version, uname.machine)
+        self._state = None
+        self._tlvs = None
+
+    def tlvs(self) -> list:
+        """The TLVs describing the local system, from the cache if it is up to date"""
+        if self._tlvs is None:
+            self.refresh()
+        return self._tlvs
+
+    def refresh(self) -> bool:
+        """Check the sources for changes and rebuild the TLVs if needed. Returns True if they changed"""
+        for source in (self._hostname, self._os_release, self._ifalias, self._ifindex, self._forwarding):
+            source.check()
+
+        name = (self._hostname.content or "").strip() or os.uname().nodename
+        os_name = _os_name(self._os_release.content)
+        description = self._kernel if os_name is None else "{} {}".format(os_name, self._kernel)
+        port_description = (self._ifalias.content or "").strip() or self.interface_name
+
+        caps = SystemCapabilitiesTLV.Capability
+        supported = caps.ROUTER | caps.STATION_ONLY
+        enabled = 0
+        if (self._forwarding.content or "").strip() == "1":
+            enabled |= caps.ROUTER
+        if os.path.exists(self._brport):
+            supported |= caps.BRIDGE
+            enabled |= caps.BRIDGE
+        if not enabled:
+            enabled = caps.STATION_ONLY
+
+        try:
+            ifindex = int(self._ifindex.content)
+        except (TypeError, ValueError):
+            ifindex = 0
+        address = self.ipv4_address()
+        if address is None:
+            address = self.ipv6_address()
+
+        state = (name, description, port_description, int(supported), int(enabled), address, ifindex)
+        if state == self._state:
+            return False
+        self._state = state
+
+        tlvs = [PortDescriptionTLV(_truncate(port_description)),
+                SystemNameTLV(_truncate(name)),
+                SystemDescriptionTLV(_truncate(description)),
+                SystemCapabilitiesTLV(int(supported), int(enabled))]
+        if address is not None:
+            tlvs.append(ManagementAddressTLV(address, ifindex, ManagementAddressTLV.IFNumberingSubtype.IF_INDEX
+                                             if ifindex else ManagementAddressTLV.IFNumberingSubtype.UNKNOWN))
+        self._tlvs = tlvs
+        return True
+
+    def ipv4_address(self):
+        """IPv4 address of the interface or None"""
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            info = fcntl.ioctl(s.fileno(), SIOCGIFADDR, struct.pack("256s", self.interface_name[:15].encode("ascii")))
+        except OSError:
+            return None
+        finally:
+            s.close()
+        return IPv4Address(info[20:24])
+
+    def ipv6_address(self):
+        """First global IPv6 address of the interface or None"""
+        self._if_inet6.check()
+        for line in (self._if_inet6.content or "").splitlines():
+            fields = line.split()
+            # address, ifindex, prefix length, scope, flags, interface name
+            if len(fields) == 6 and fields[5] == self.interface_name and fields[3] == "00":
+                try:
+                    return IPv6Address(bytes.fromhex(fields[0]))
+                except ValueError:
+                    continue
+        return None
@@ -0,0 +1,21 @@
+from ipaddress import ip_address, IPv4Address, IPv6Address
+
+ADDRESS_CLASSES = {4: IPv4Address, 6: IPv6Address}
+
+
+def pack_address(address) -> tuple:
+    """Return the (packed address, IP version) tuple of `address`
+
+    Args:
+        address (IPv4Address, IPv6Address, str or int): The address
+
+    Raises a `ValueError` if `address` is not a valid IP address.
+    """
+    if not isinstance(address, (IPv4Address, IPv6Address)):
+        address = ip_address(address)
+    return address.packed, address.version
+
+
+def unpack_address(packed: bytes, family: int):
+    """Create the `IPv4Address` or `IPv6Address` object of a packed address"""
+    return ADDRESS_CLASSES[family](packed)
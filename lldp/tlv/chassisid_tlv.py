@@ -1,7 +1,9 @@
 from enum import IntEnum
-from ipaddress import ip_address, IPv4Address, IPv6Address
+from ipaddress import IPv4Address, IPv6Address
 
 from lldp.tlv import TLV
+from lldp.tlv.address import pack_address, unpack_address
+from lldp.tlv.intern import STRINGS
 
 
 # TODO: implement support for most significant length byte that is contained the first data-byte. Currently this bit is still ignored in all methods
@@ -118,29 +120,65 @@ class ChassisIdTLV(TLV):
         # TODO: check for validity of network address, mac adress here
         self.type = TLV.Type.CHASSIS_ID
         self.subtype = subtype
-        self.value = id
 
         # Mac address case
         if self.subtype == 4:
-            if len(self.value) != 6:
+            if len(id) != 6:
                 raise ValueError()
+            self.value = id
 
         # ip address case
         elif self.subtype == 5:
-            if self.value.version == 4:
-                # ipv4 case
-                return
-            elif self.value.version == 6:
-                # ipv6 case
-                return
-            else:
-                raise ValueError()
+            self.packed, self.family = pack_address(id)
+            self._address = id if isinstance(id, (IPv4Address, IPv6Address)) else None
 
         # all other cases:
         else:
-            if len(self.value) > 255 or len(self.value) == 0:
-                raise ValueError
-            return
+            if len(id) > 255 or len(id) == 0:
+                raise ValueError()
+            self.value = id
+
+    @property
+    def value(self):
+        """The ID. For network addresses the `ipaddress` object is only created on first access"""
+        if self.subtype == 5:
+            if self._address is None:
+                self._address = unpack_address(self.packed, self.family)
+            return self._address
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if self.subtype == 5:
+            self.packed, self.family = pack_address(value)
+            self._address = value if isinstance(value, (IPv4Address, IPv6Address)) else None
+        else:
+            self._value = value
+
+    @classmethod
+    def from_packed_address(cls, packed: bytes, family: int) -> "ChassisIdTLV":
+        """Create a network address ChassisIdTLV from a packed IPv4 (`family` 4) or IPv6 (`family` 6) address"""
+        tlv = cls.__new__(cls)
+        tlv.type = TLV.Type.CHASSIS_ID
+        tlv.subtype = cls.Subtype.NETWORK_ADDRESS
+        tlv.packed = packed
+        tlv.family = family
+        tlv._address = None
+        return tlv
+
+    def __eq__(self, other):
+        if not isinstance(other, ChassisIdTLV):
+            return NotImplemented
+        if other.subtype != self.subtype:
+            return False
+        if self.subtype == 5:
+            return self.family == other.family and self.packed == other.packed
+        return self._value == other._value
+
+    def __hash__(self):
+        if self.subtype == 5:
+            return hash((self.type, self.subtype, self.packed))
+        return hash((self.type, self.subtype, self._value))
 
     def __bytes__(self):
         """Return the byte representation of the TLV.
@@ -153,19 +191,18 @@ class ChassisIdTLV(TLV):
             return bytes([self.type * 2, 1 + 6, self.subtype]) + self.value
         # ip address case
         elif self.subtype == 5:
-            if self.value.version == 4:
+            if self.family == 4:
                 # ipv4 case
-                return bytes([self.type * 2, 1 + 5, self.subtype ,1]) + self.value.packed
+                return bytes([self.type * 2, 1 + 5, self.subtype, 1]) + self.packed
             else:
                 # ipv6 case
-                return bytes([self.type * 2, 1 + 17, self.subtype, 2]) + self.value.packed
+                return bytes([self.type * 2, 1 + 17, self.subtype, 2]) + self.packed
 
         #all other cases:
         else:
-            if len(self.value) > 255:
-                return bytes([(self.type * 2) + 1, len(self.value) - 256]) + self.subtype.to_bytes(1, 'big') + self.value.encode('utf-8')
-            else:
-                return bytes([self.type * 2, len(self.value) + 1]) + self.subtype.to_bytes(1, 'big') + self.value.encode('utf-8')
+            value = self.value.encode('utf-8')
+            length = len(value) + 1
+            return bytes([(self.type * 2) + (length >> 8), length & 0xff, self.subtype]) + value
 
 
     def __len__(self):
@@ -179,7 +216,7 @@ class ChassisIdTLV(TLV):
             return 7
         # ip address case
         elif self.subtype == 5:
-            if self.value.version == 4:
+            if self.family == 4:
                 # ipv4 case
                 return 6
             else:
@@ -211,7 +248,7 @@ class ChassisIdTLV(TLV):
             raise ValueError()
 
         type_shifted = data[0]
-        if type_shifted != TLV.Type.CHASSIS_ID * 2:
+        if type_shifted >> 1 != TLV.Type.CHASSIS_ID:
             raise ValueError()
 
         length = data[1]
@@ -238,18 +275,18 @@ class ChassisIdTLV(TLV):
             if data[3] == 1:
                 if length != 6:
                     raise ValueError()
-                return ChassisIdTLV(subtype, IPv4Address(data[4:]))
+                return ChassisIdTLV.from_packed_address(bytes(data[4:]), 4)
                 # ipv4 case
                 return
             if data[3] == 2:
                 # ipv6 case
                 if length != 18:
                     raise ValueError()
-                return ChassisIdTLV(subtype, IPv6Address(data[4:]))
+                return ChassisIdTLV.from_packed_address(bytes(data[4:]), 6)
             else:
                 # Ip address with not prefix 1 or 2
                 raise ValueError()
 
         # all other cases:
         else:
-            return ChassisIdTLV(subtype, data[3:].decode("utf-8"))
\ No newline at end of file
+            return ChassisIdTLV(subtype, STRINGS.decode(data[3:]))
\ No newline at end of file
@@ -0,0 +1,108 @@
+import sys
+
+# size of an empty ASCII str object, sys.getsizeof("")
+_STR_OVERHEAD = sys.getsizeof("")
+
+
+class StringInterner:
+    """Share the `str` objects of repeated TLV string values
+
+    Many TLV strings repeat across neighbors and refreshes, e.g. the system description of all switches of one model or
+    the system name of a neighbor that re-announces every 30 seconds. The interner maps the raw UTF-8 bytes of a value
+    to a single decoded `str`, so repeated values are neither decoded nor allocated again.
+
+    Entries are not reference counted individually. Instead `StringInterner.sweep()` drops the strings nobody but the
+    table refers to anymore; the agent calls it after neighbors expired and every `STRINGS_SWEEP_INTERVAL` seconds,
+    which releases the strings of neighbors that shut down, were dropped with their interface or changed their TLVs.
+    Once the table holds `max_entries` strings, new values are decoded without being added until a sweep makes room.
+    Decoding never sweeps: a sweep walks the whole table, and with a table full of strings that are still in use it
+    would free nothing on every miss.
+
+    Attributes:
+        enabled (bool): If False, `StringInterner.decode()` decodes without using the table
+        hits (int): Number of values found in the table
+        misses (int): Number of values that had to be decoded
+        saved_bytes (int): Memory not allocated thanks to hits, in bytes (exact for ASCII values, an estimate
+            otherwise)
+        swept (int): Number of entries removed by sweeps
+    """
+
+    def __init__(self, max_entries: int = 65536):
+        self.max_entries = max_entries
+        self.enabled = True
+        self._strings = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved_bytes = 0
+        self.swept = 0
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def decode(self, raw) -> str:
+        """Decode the UTF-8 value `raw`, returning the shared `str` if the value is known
+
+        Raises a `UnicodeDecodeError` (a `ValueError`) for invalid UTF-8.
+        """
+        if not self.enabled:
+            return raw.decode("utf-8")
+        if type(raw) is not bytes:
+            raw = bytes(raw)
+        value = self._strings.get(raw)
+        if value is not None:
+            self.hits += 1
+            self.saved_bytes += _STR_OVERHEAD + len(raw)
+            return value
+
+        self.misses += 1
+        value = raw.decode("utf-8")
+        if len(self._strings) < self.max_entries:
+            self._strings[raw] = value
+        return value
+
+    def sweep(self) -> int:
+        """Remove the entries that are only referenced by the table. Returns the number of removed entries
+
+        On interpreters without reference counts (`sys.getrefcount()`) the whole table is cleared.
+        """
+        getrefcount = getattr(sys, "getrefcount", None)
+        if getrefcount is None:
+            removed = len(self._strings)
+            self._strings.clear()
+        else:
+            # an unused value is referenced by the table and the argument of getrefcount() only
+            strings = self._strings
+            unused = [raw for raw in strings if getrefcount(strings[raw]) <= 2]
+            for raw in unused:
+                del self._strings[raw]
+            removed = len(unused)
+        self.swept += removed
+        return removed
+
+    def clear(self):
+        self._strings.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def table_bytes(self) -> int:
+        """Approximate memory used by the table entries (keys and values, not the dict itself), in bytes"""
+        getsizeof = sys.getsizeof
+        return sum(getsizeof(raw) + getsizeof(value) for raw, value in self._strings.items())
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._strings),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "saved_bytes": self.saved_bytes,
+            "table_bytes": self.table_bytes(),
+            "swept": self.swept,
+        }
+
+
+STRINGS = StringInterner()
+"""The interner used by the TLV decoders"""
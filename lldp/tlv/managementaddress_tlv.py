@@ -1,5 +1,6 @@
 from lldp.tlv import TLV
-from ipaddress import ip_address, IPv4Address, IPv6Address
+from ipaddress import IPv4Address, IPv6Address
+from lldp.tlv.address import pack_address, unpack_address
 from enum import IntEnum
 
 
@@ -106,16 +107,50 @@ class ManagementAddressTLV(TLV):
         self.subtype = ifsubtype
         if ifsubtype > 3:
             raise ValueError()
-        if isinstance(address, str):
-            self.value = ip_address(address)
-        else:
-            self.value = address
+        self.packed, self.family = pack_address(address)
+        self._address = address if isinstance(address, (IPv4Address, IPv6Address)) else None
         self.oid = oid
         self.ifnumber  = interface_number
         if oid is not None:
             if len(oid) > 128:
                 raise ValueError()
 
+    @property
+    def value(self):
+        """The management address. The `ipaddress` object is only created on first access"""
+        if self._address is None:
+            self._address = unpack_address(self.packed, self.family)
+        return self._address
+
+    @value.setter
+    def value(self, address):
+        self.packed, self.family = pack_address(address)
+        self._address = address if isinstance(address, (IPv4Address, IPv6Address)) else None
+
+    @classmethod
+    def from_packed_address(cls, packed: bytes, family: int, interface_number: int = 0,
+                            ifsubtype: 'ManagementAddressTLV.IFNumberingSubtype' = 1,
+                            oid: TLV.ByteType = None) -> "ManagementAddressTLV":
+        """Create a ManagementAddressTLV from a packed IPv4 (`family` 4) or IPv6 (`family` 6) address"""
+        tlv = cls.__new__(cls)
+        tlv.type = TLV.Type.MANAGEMENT_ADDRESS
+        tlv.subtype = ifsubtype
+        tlv.packed = packed
+        tlv.family = family
+        tlv._address = None
+        tlv.oid = oid
+        tlv.ifnumber = interface_number
+        return tlv
+
+    def __eq__(self, other):
+        if not isinstance(other, ManagementAddressTLV):
+            return NotImplemented
+        return (self.family == other.family and self.packed == other.packed and self.subtype == other.subtype and
+                self.ifnumber == other.ifnumber and self.oid == other.oid)
+
+    def __hash__(self):
+        return hash((self.type, self.packed, self.subtype, self.ifnumber, self.oid))
+
     def __bytes__(self):
         """Return the byte representation of the TLV.
 
@@ -127,20 +162,20 @@ class ManagementAddressTLV(TLV):
         if self.oid is not None:
             oid_length = len(self.oid)
 
-        if self.value.version == 4:
+        if self.family == 4:
             if self.oid is None:
-                return bytes([self.type * 2, 8 + 4, 5, 1]) + self.value.packed + self.subtype.to_bytes(1, 'big') + self.ifnumber.to_bytes(4, 'big') + oid_length.to_bytes(1, 'big')
+                return bytes([self.type * 2, 8 + 4, 5, 1]) + self.packed + self.subtype.to_bytes(1, 'big') + self.ifnumber.to_bytes(4, 'big') + oid_length.to_bytes(1, 'big')
 
             else:
-                return bytes([self.type * 2, 8 + 4 + oid_length, 5, 1]) + self.value.packed + self.subtype.to_bytes(1, 'big') + self.ifnumber.to_bytes(4, 'big') + oid_length.to_bytes(1, 'big') + self.oid
+                return bytes([self.type * 2, 8 + 4 + oid_length, 5, 1]) + self.packed + self.subtype.to_bytes(1, 'big') + self.ifnumber.to_bytes(4, 'big') + oid_length.to_bytes(1, 'big') + self.oid
         else:
             if self.oid is None:
                 return bytes(
-                    [self.type * 2, 8 + 16, 17, 2]) + self.value.packed + self.subtype.to_bytes(1,
+                    [self.type * 2, 8 + 16, 17, 2]) + self.packed + self.subtype.to_bytes(1,
                                                                                                                 'big') + self.ifnumber.to_bytes(
                     4, 'big') + oid_length.to_bytes(1, 'big')
             else:
-                return bytes([self.type * 2, 8 + 16 + oid_length, 17, 2]) + self.value.packed + self.subtype.to_bytes(1, 'big') + self.ifnumber.to_bytes(4, 'big') + oid_length.to_bytes(1, 'big') + self.oid
+                return bytes([self.type * 2, 8 + 16 + oid_length, 17, 2]) + self.packed + self.subtype.to_bytes(1, 'big') + self.ifnumber.to_bytes(4, 'big') + oid_length.to_bytes(1, 'big') + self.oid
 
     def __len__(self):
         """Return the length of the TLV value.
@@ -148,17 +183,21 @@ class ManagementAddressTLV(TLV):
         This method must return an int. Returning anything else will raise a TypeError.
         See `TLV.__len__()` for more information.
         """
-        if self.value.version == 4:
-            return 8 + 4 + len(self.oid)
+        oid_length = 0
+        if self.oid is not None:
+            oid_length = len(self.oid)
+
+        if self.family == 4:
+            return 8 + 4 + oid_length
         else:
-            return 8 + 16 + len(self.oid)
+            return 8 + 16 + oid_length
 
     def __repr__(self):
         """Return a printable representation of the TLV object.
 
         See `TLV.__repr__()` for more information.
         """
-        return "ManagementAddressTLV(" + repr(self.address) +  ", " + repr(self.ifnumber) + ", " + repr(self.subtype) + ", " + repr(self.oid) + ")"
+        return "ManagementAddressTLV(" + repr(self.value) +  ", " + repr(self.ifnumber) + ", " + repr(self.subtype) + ", " + repr(self.oid) + ")"
 
 
     @staticmethod
@@ -197,7 +236,7 @@ class ManagementAddressTLV(TLV):
 
         if_subtype = data[4 + addr_length]
 
-        ifnumber = data[(5 + addr_length) : (9 + addr_length)]
+        ifnumber = int.from_bytes(data[(5 + addr_length) : (9 + addr_length)], 'big')
 
         oid_len = data[(9 + addr_length)]
 
@@ -207,14 +246,15 @@ class ManagementAddressTLV(TLV):
             oid = None
 
 
+        if if_subtype > 3 or (oid is not None and len(oid) > 128):
+            raise ValueError()
+
         if man_addr_subtype == 1:
             #ipv4 case
-            addr = IPv4Address(man_addr)
-            return ManagementAddressTLV(addr, ifnumber, if_subtype, oid)
+            return ManagementAddressTLV.from_packed_address(bytes(man_addr), 4, ifnumber, if_subtype, oid)
 
         else:
             #ipv6 case
-            addr = IPv6Address(man_addr)
-            return ManagementAddressTLV(addr, ifnumber, if_subtype, oid)
+            return ManagementAddressTLV.from_packed_address(bytes(man_addr), 6, ifnumber, if_subtype, oid)
 
 
@@ -59,7 +59,8 @@ class OrganizationallySpecificTLV(TLV):
         This method must return bytes. Returning a bytearray will raise a TypeError.
         See `TLV.__bytes__()` for more information.
         """
-        return bytes([self.type * 2, 4 + len(self.value)]) + self.oui + self.subtype + self.value
+        length = 4 + len(self.value)
+        return bytes([(self.type * 2) + (length >> 8), length & 0xff]) + self.oui + self.subtype + self.value
 
     def __len__(self):
         """Return the length of the TLV value.
@@ -1,7 +1,9 @@
 from enum import IntEnum
-from ipaddress import ip_address, IPv4Address, IPv6Address
+from ipaddress import IPv4Address, IPv6Address
 
 from lldp.tlv import TLV
+from lldp.tlv.address import pack_address, unpack_address
+from lldp.tlv.intern import STRINGS
 
 
 class PortIdTLV(TLV):
@@ -109,29 +111,65 @@ class PortIdTLV(TLV):
         """
         self.type = TLV.Type.PORT_ID
         self.subtype = subtype
-        self.value = id
 
         # Mac address case
         if self.subtype == 3:
-            if len(self.value) != 6:
+            if len(id) != 6:
                 raise ValueError()
+            self.value = id
 
         # ip address case
         elif self.subtype == 4:
-            if self.value.version == 4:
-                # ipv4 case
-                return
-            elif self.value.version == 6:
-                # ipv6 case
-                return
-            else:
-                raise ValueError()
+            self.packed, self.family = pack_address(id)
+            self._address = id if isinstance(id, (IPv4Address, IPv6Address)) else None
 
         # all other cases:
         else:
-            if len(self.value) > 255:
+            if len(id) > 255:
                 raise ValueError()
-            return
+            self.value = id
+
+    @property
+    def value(self):
+        """The ID. For network addresses the `ipaddress` object is only created on first access"""
+        if self.subtype == 4:
+            if self._address is None:
+                self._address = unpack_address(self.packed, self.family)
+            return self._address
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if self.subtype == 4:
+            self.packed, self.family = pack_address(value)
+            self._address = value if isinstance(value, (IPv4Address, IPv6Address)) else None
+        else:
+            self._value = value
+
+    @classmethod
+    def from_packed_address(cls, packed: bytes, family: int) -> "PortIdTLV":
+        """Create a network address PortIdTLV from a packed IPv4 (`family` 4) or IPv6 (`family` 6) address"""
+        tlv = cls.__new__(cls)
+        tlv.type = TLV.Type.PORT_ID
+        tlv.subtype = cls.Subtype.NETWORK_ADDRESS
+        tlv.packed = packed
+        tlv.family = family
+        tlv._address = None
+        return tlv
+
+    def __eq__(self, other):
+        if not isinstance(other, PortIdTLV):
+            return NotImplemented
+        if other.subtype != self.subtype:
+            return False
+        if self.subtype == 4:
+            return self.family == other.family and self.packed == other.packed
+        return self._value == other._value
+
+    def __hash__(self):
+        if self.subtype == 4:
+            return hash((self.type, self.subtype, self.packed))
+        return hash((self.type, self.subtype, self._value))
 
     def __bytes__(self):
         """Return the byte representation of the TLV.
@@ -144,19 +182,18 @@ class PortIdTLV(TLV):
             return bytes([self.type * 2, 1 + 6, self.subtype]) + self.value
         # ip address case
         elif self.subtype == 4:
-            if self.value.version == 4:
+            if self.family == 4:
                 # ipv4 case
-                return bytes([self.type * 2, 1 + 5, self.subtype ,1]) + self.value.packed
+                return bytes([self.type * 2, 1 + 5, self.subtype, 1]) + self.packed
             else:
                 # ipv6 case
-                return bytes([self.type * 2, 1 + 17, self.subtype, 2]) + self.value.packed
+                return bytes([self.type * 2, 1 + 17, self.subtype, 2]) + self.packed
 
         #all other cases:
         else:
-            if len(self.value) > 255:
-                return bytes([(self.type * 2) + 1, len(self.value) - 256, self.subtype]) + bytes(self.value, 'utf-8')
-            else:
-                return bytes([self.type * 2, len(self.value) + 1, self.subtype]) + bytes(self.value,'utf-8')
+            value = bytes(self.value, 'utf-8')
+            length = len(value) + 1
+            return bytes([(self.type * 2) + (length >> 8), length & 0xff, self.subtype]) + value
 
     def __len__(self):
         """Return the length of the TLV value.
@@ -169,7 +206,7 @@ class PortIdTLV(TLV):
             return 7
         # ip address case
         elif self.subtype == 4:
-            if self.value.version == 4:
+            if self.family == 4:
                 # ipv4 case
                 return 6
             else:
@@ -201,7 +238,7 @@ class PortIdTLV(TLV):
             raise ValueError()
 
         type_shifted = data[0]
-        if type_shifted != TLV.Type.PORT_ID * 2:
+        if type_shifted >> 1 != TLV.Type.PORT_ID:
             raise ValueError()
 
         length = data[1]
@@ -228,14 +265,14 @@ class PortIdTLV(TLV):
             if data[3] == 1:
                 if length != 6:
                     raise ValueError()
-                return PortIdTLV(subtype, IPv4Address(data[4:]))
+                return PortIdTLV.from_packed_address(bytes(data[4:]), 4)
                 # ipv4 case
                 return
             if data[3] == 2:
                 # ipv6 case
                 if length != 18:
                     raise ValueError()
-                return PortIdTLV(subtype, IPv6Address(data[4:]))
+                return PortIdTLV.from_packed_address(bytes(data[4:]), 6)
             else:
                 # Ip address with not prefix 1 or 2
                 raise ValueError()
@@ -244,4 +281,4 @@ class PortIdTLV(TLV):
         else:
             if len(data[3:]) > 255:
                 raise ValueError()
-            return PortIdTLV(subtype, data[3:].decode("utf-8"))
+            return PortIdTLV(subtype, STRINGS.decode(data[3:]))
@@ -1,4 +1,5 @@
 from lldp.tlv import TLV
+from lldp.tlv.intern import STRINGS
 
 
 class PortDescriptionTLV(TLV):
@@ -79,7 +80,7 @@ class PortDescriptionTLV(TLV):
         if length != len(data[2:]):
             raise ValueError()
 
-        return PortDescriptionTLV(data[2:].decode("utf-8"))
+        return PortDescriptionTLV(STRINGS.decode(data[2:]))
 
 
 class SystemDescriptionTLV(TLV):
@@ -159,7 +160,7 @@ class SystemDescriptionTLV(TLV):
         if length != len(data[2:]):
             raise ValueError()
 
-        return SystemDescriptionTLV(data[2:].decode("utf-8"))
+        return SystemDescriptionTLV(STRINGS.decode(data[2:]))
 
 
 class SystemNameTLV(TLV):
@@ -241,4 +242,4 @@ class SystemNameTLV(TLV):
         if length != len(data[2:]):
             raise ValueError()
 
-        return SystemNameTLV(data[2:].decode("utf-8"))
+        return SystemNameTLV(STRINGS.decode(data[2:]))
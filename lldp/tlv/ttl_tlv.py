@@ -12,7 +12,7 @@ class TTLTLV(TLV):
 
     Attributes:
         type (TLV.Type): The type of the TLV
-        value (int): The TTL in seconds
+        value (int): The TTL in seconds. A TTL of 0 marks a shutdown LLDPDU: the sender is going away
 
     TLV Format:
 
@@ -27,7 +27,7 @@ class TTLTLV(TLV):
     """
 
     def __init__(self, ttl: int):
-        if ttl <= 0 or ttl > 65535:
+        if ttl < 0 or ttl > 65535:
             raise ValueError()
 
         self.type = TLV.Type.TTL
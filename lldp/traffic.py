@@ -0,0 +1,93 @@
+import random
+from ipaddress import ip_address
+
+from lldp.frame import LLDP_ETHERTYPE, NEAREST_BRIDGE, lldp_frame
+from lldp.lldpdu import LLDPDU
+from lldp.tlv import ChassisIdTLV, PortIdTLV, TTLTLV, EndOfLLDPDUTLV, PortDescriptionTLV, SystemNameTLV, \
+    SystemDescriptionTLV, SystemCapabilitiesTLV, ManagementAddressTLV
+
+
+def synthetic_mac(index: int, prefix: int = 0x02) -> bytes:
+    """Return a locally administered MAC address derived from `index`"""
+    return bytes([prefix]) + index.to_bytes(5, "big")
+
+
+def neighbor_lldpdu(index: int, ttl: int = 120) -> LLDPDU:
+    """Build a realistic LLDPDU for synthetic neighbor number `index`"""
+    caps = SystemCapabilitiesTLV.Capability
+    return LLDPDU(
+        ChassisIdTLV(ChassisIdTLV.Subtype.MAC_ADDRESS, synthetic_mac(index)),
+        PortIdTLV(PortIdTLV.Subtype.INTERFACE_NAME, "Ethernet{}".format(index % 48 + 1)),
+        TTLTLV(ttl),
+        PortDescriptionTLV("Link to lab host {}".format(index)),
+        SystemNameTLV("sw-{:05d}".format(index)),
+        SystemDescriptionTLV("Synthetic LLDP neighbor generated by lldp.traffic"),
+        SystemCapabilitiesTLV(caps.BRIDGE | caps.ROUTER, caps.BRIDGE),
+        ManagementAddressTLV(ip_address(0x0a000000 + index), index,
+                             ManagementAddressTLV.IFNumberingSubtype.IF_INDEX),
+        EndOfLLDPDUTLV())
+
+
+class TrafficMix:
+    """Generator for a configurable mix of Ethernet frames as seen by an LLDP agent
+
+    Four kinds of frames are generated:
+
+        valid       LLDP frames from one of `neighbors` synthetic neighbors
+        non_lldp    frames with another ethertype or destination, which the agent has to drop
+        own         LLDP frames sent by the agent itself (source address `local_mac`)
+        malformed   LLDP frames carrying a broken LLDPDU, which the agent has to reject
+
+    The LLDPDUs of all neighbors are encoded once up front, generating frames only picks templates.
+
+    Parameters:
+        local_mac (bytes): MAC address of the agent under test
+        neighbors (int): Number of distinct neighbors sending valid frames
+        valid, non_lldp, own, malformed (float): Relative weights of the frame kinds
+        seed: Seed for the random number generator, makes the sequence reproducible
+    """
+
+    KINDS = ("valid", "non_lldp", "own", "malformed")
+
+    def __init__(self, local_mac: bytes, neighbors: int = 100, valid: float = 0.7, non_lldp: float = 0.2,
+                 own: float = 0.05, malformed: float = 0.05, seed=0):
+        self.local_mac = local_mac
+        self.weights = (valid, non_lldp, own, malformed)
+        if sum(self.weights) <= 0:
+            raise ValueError("At least one frame kind needs a positive weight")
+        self.random = random.Random(seed)
+
+        self.valid = [lldp_frame(synthetic_mac(i), bytes(neighbor_lldpdu(i))) for i in range(max(neighbors, 1))]
+        own_lldpdu = bytes(neighbor_lldpdu(0))
+        self.own = [lldp_frame(local_mac, own_lldpdu)]
+        self.non_lldp = [
+            # IPv4 broadcast
+            b"\xff" * 6 + synthetic_mac(1) + b"\x08\x00" + bytes(46),
+            # LLDP ethertype to a unicast address
+            synthetic_mac(2) + synthetic_mac(1) + LLDP_ETHERTYPE + own_lldpdu,
+            # LLDP multicast address with another ethertype
+            NEAREST_BRIDGE + synthetic_mac(1) + b"\x86\xdd" + bytes(46),
+        ]
+        template = self.valid[0]
+        self.malformed = [
+            # truncated in the middle of a TLV
+            template[:20],
+            # port ID TLV missing
+            lldp_frame(synthetic_mac(3), bytes(ChassisIdTLV(ChassisIdTLV.Subtype.MAC_ADDRESS, synthetic_mac(3))) +
+                       bytes(TTLTLV(120))),
+            # unknown TLV type 9 after the mandatory TLVs
+            template[:14] + bytes(neighbor_lldpdu(3))[:25] + b"\x12\x02ab",
+            # length field pointing beyond the frame
+            template[:14] + b"\x02\xff\x04" + synthetic_mac(3),
+        ]
+
+    def frame(self) -> tuple:
+        """Return a random (kind, frame) tuple"""
+        kind = self.random.choices(self.KINDS, self.weights)[0]
+        return kind, self.random.choice(getattr(self, kind))
+
+    def frames(self, count: int) -> list:
+        """Return a list of `count` random (kind, frame) tuples"""
+        kinds = self.random.choices(self.KINDS, self.weights, k=count)
+        choice = self.random.choice
+        return [(kind, choice(getattr(self, kind))) for kind in kinds]
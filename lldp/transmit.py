@@ -0,0 +1,77 @@
+"""Transmit timing following IEEE 802.1AB
+
+Instead of announcing at one fixed rate, an 802.1AB agent announces
+
+    * every `msgTxInterval` seconds in steady state,
+    * every `msgFastTx` seconds for the next `txFastInit` LLDPDUs after the link came up or a new neighbor was seen,
+      so neighbors learn about the agent quickly (fast start),
+    * immediately when its own information changed (`txNow`).
+
+All transmissions draw from a token bucket of `txCreditMax` credits that refills by one credit per second, which
+bounds the rate of LLDPDUs no matter how often the information changes.
+
+When the agent stops it sends a shutdown LLDPDU with TTL 0, so that neighbors remove it right away instead of waiting
+for its TTL to run out.
+"""
+
+
+def ttl_for(interval: float, hold: int = 4) -> int:
+    """TTL for announces every `interval` seconds that neighbors keep for `hold` intervals (msgTxHold)"""
+    return min(65535, int(interval * hold) + 1)
+
+
+class TransmitState:
+    """Fast start and transmit credit state of an agent
+
+    Parameters:
+        interval (float): Announce interval in steady state (msgTxInterval), in seconds
+        fast_interval (float): Announce interval during fast start (msgFastTx), in seconds
+        fast_count (int): Number of LLDPDUs sent at the fast interval (txFastInit)
+        credit_max (int): Maximum number of LLDPDUs sent in a burst (txCreditMax)
+
+    Attributes:
+        fast (int): Remaining fast start transmissions (txFast)
+        credit (float): Available transmit credit (txCredit)
+    """
+
+    def __init__(self, interval: float, fast_interval: float = 1.0, fast_count: int = 4, credit_max: int = 5):
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.fast_count = fast_count
+        self.credit_max = credit_max
+        self.fast = 0
+        self.credit = float(credit_max)
+        self._updated = None
+
+    def start_fast(self):
+        """Start fast transmission, e.g. on link up or when a new neighbor was seen
+
+        A fast start that is already running is not extended.
+        """
+        if self.fast == 0:
+            self.fast = self.fast_count
+
+    def take(self, now: float) -> bool:
+        """Use one transmit credit. Returns False if no credit is available"""
+        self._refill(now)
+        if self.credit >= 1.0:
+            self.credit -= 1.0
+            return True
+        return False
+
+    def wait(self, now: float) -> float:
+        """Seconds until one transmit credit is available"""
+        self._refill(now)
+        return max(1.0 - self.credit, 0.0)
+
+    def next_interval(self) -> float:
+        """Delay after a transmission until the next one, counting down the fast start"""
+        if self.fast > 0:
+            self.fast -= 1
+            return self.fast_interval
+        return self.interval
+
+    def _refill(self, now: float):
+        if self._updated is not None and now > self._updated:
+            self.credit = min(self.credit + (now - self._updated), float(self.credit_max))
+        self._updated = now
@@ -1,37 +1,194 @@
-#!/usr/bin/env python3.6
+#!/usr/bin/env python3
 
 import argparse
-import errno
-import fcntl
+import functools
+import os
+import signal
 from lldp.agent import *
-import socket
-import struct
-
-
-def get_hardware_address(ifname):
-    """Get the MAC address of the named interface
-
-    Raises an OSError if no interface witht the given name is found.
-    """
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    info = fcntl.ioctl(s.fileno(), 0x8927,  struct.pack('256s', ifname[:15].encode("ascii")))
-    s.close()
-    return info[18:24]
+from lldp.capture import AsyncCaptureWriter, CaptureTap, FrameRing, PcapWriter
+from lldp.handoff import HandoffServer, take_over
+from lldp.instrument import StageTimer
+from lldp.interfaces import InterfaceManager
+from lldp.metrics import MetricsServer
+from lldp.netlink import LinkMonitor
+from lldp.profiling import profile_agent
+from lldp.sockstats import PacketSocketMonitor
+from lldp.supervisor import Supervisor, run_worker
+from lldp.sysinfo import SystemInfo
+from lldp.transmit import ttl_for
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="A simple LLDP agent.")
-    parser.add_argument("interface_name", help="The name of the network interface to send/receive LLDP frames on.",
-                        nargs="?", type=str, default="eth0")
+    parser.add_argument("interfaces", help="Names of the network interfaces to send/receive LLDP frames on. Shell-style "
+                        "patterns (e.g. 'eth*') are allowed; interfaces are added and removed as they come and go. "
+                        "All Ethernet interfaces by default.", nargs="*", type=str, default=["*"])
+    parser.add_argument("--interval", help="Seconds between announces in steady state (msgTxInterval).",
+                        type=float, default=30.0)
+    parser.add_argument("--tx-hold", help="Announce a TTL of this many intervals (msgTxHold).",
+                        type=int, default=4)
+    parser.add_argument("--fast-interval", help="Seconds between announces during fast start (msgFastTx).",
+                        type=float, default=1.0)
+    parser.add_argument("--fast-count", help="Number of fast announces on startup and new neighbors (txFastInit).",
+                        type=int, default=4)
+    parser.add_argument("--tx-credit-max", help="Maximum number of announces sent in a burst (txCreditMax).",
+                        type=int, default=5)
+    parser.add_argument("--no-sysinfo", help="Only announce the mandatory TLVs, no system name, description, "
+                        "capabilities and management address.", action="store_true")
+    parser.add_argument("--jitter", help="Maximum random delay added to every announce, in seconds.",
+                        type=float, default=0.1)
+    parser.add_argument("--metrics-port", help="Expose Prometheus metrics via HTTP on this port (0 disables).",
+                        type=int, default=0)
+    parser.add_argument("--metrics-host", help="Address to bind the metrics endpoint to.",
+                        type=str, default="127.0.0.1")
+    parser.add_argument("--instrument", help="Record per-stage timings and print them on SIGUSR1.",
+                        action="store_true")
+    parser.add_argument("--timestamps", help="Use kernel receive timestamps to measure frame processing latency.",
+                        action="store_true")
+    parser.add_argument("--stats-interval", help="Seconds between reads of the kernel drop statistics (0 disables).",
+                        type=float, default=5.0)
+    parser.add_argument("--max-rcvbuf", help="Grow the socket receive buffer up to this many bytes on kernel drops.",
+                        type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--profile", help="Profile the agent for the given number of seconds, then exit.",
+                        type=float, metavar="SECONDS", default=0)
+    parser.add_argument("--profile-output", help="Path prefix for the .pstats and .collapsed profile files.",
+                        type=str, default="lldp-profile")
+    parser.add_argument("--capture", help="Write received and/or sent LLDP frames to this pcap file.",
+                        type=str, metavar="FILE")
+    parser.add_argument("--capture-direction", help="Frames to capture (default: both).",
+                        choices=("rx", "tx", "both"), default="both")
+    parser.add_argument("--capture-max-bytes", help="Start a new capture file after this many bytes.",
+                        type=int)
+    parser.add_argument("--capture-max-seconds", help="Start a new capture file after this many seconds.",
+                        type=float)
+    parser.add_argument("--capture-max-files", help="Only keep this many rotated capture files.",
+                        type=int)
+    parser.add_argument("--capture-ring", help="Keep the last N frames in memory and write them to a pcap file "
+                                               "on SIGUSR2.", type=int, metavar="N", default=0)
+    parser.add_argument("--capture-ring-output", help="Path prefix for the ring buffer dumps.",
+                        type=str, default="lldp-ring")
+    parser.add_argument("--snapshot", help="Persist the neighbor table to this file and restore it on startup.",
+                        type=str, default=None)
+    parser.add_argument("--snapshot-interval", help="Seconds between neighbor table snapshots.",
+                        type=float, default=30.0)
+    parser.add_argument("--handoff-socket", help="Listen on this Unix socket for a new agent process taking over "
+                        "(hot restart).", type=str, default=None)
+    parser.add_argument("--take-over", help="Take over the socket and state of the agent listening on "
+                        "--handoff-socket instead of opening a new socket.", action="store_true")
+    parser.add_argument("--workers", help="Split the interfaces across this many worker processes (0 runs all "
+                        "agents in this process).", type=int, default=0)
+    parser.add_argument("--pin-workers", help="Pin every worker process to one CPU.", action="store_true")
     args = parser.parse_args()
 
-    try:
-        mac_address = get_hardware_address(args.interface_name)
-    except OSError as e:
-        if e.errno == errno.ENODEV:
-            print("No interface named '{}'.".format(args.interface_name))
+    # hot restarts hand over the socket of a single agent
+    single = args.handoff_socket is not None
+    if single and (len(args.interfaces) != 1 or any(c in args.interfaces[0] for c in "*?[")):
+        parser.error("--handoff-socket requires exactly one interface name")
+    if args.workers:
+        # these keep per-process state that would have to be merged across workers
+        for option in ("handoff_socket", "capture", "capture_ring", "instrument", "profile"):
+            if getattr(args, option):
+                parser.error("--{} is not supported with --workers".format(option.replace("_", "-")))
+
+    # MAC addresses and interface indexes of all interfaces, from a single netlink dump
+    if single:
+        links = LinkMonitor()
+        links.dump()
+        link = links.by_name(args.interfaces[0])
+        links.close()
+        if link is None:
+            print("No interface named '{}'.".format(args.interfaces[0]))
             print("Exiting.")
             exit(1)
 
-    agent = LLDPAgent(mac_address, interface_name=args.interface_name)
-    agent.run()
+    timer = None
+    if args.instrument:
+        timer = StageTimer()
+        timer.install_signal_handler()
+
+    monitor = None
+    if args.stats_interval > 0:
+        monitor = PacketSocketMonitor(interval=args.stats_interval, max_rcvbuf=args.max_rcvbuf)
+
+    tap = None
+    if args.capture or args.capture_ring:
+        writer = None
+        if args.capture:
+            writer = AsyncCaptureWriter(PcapWriter(args.capture, max_bytes=args.capture_max_bytes,
+                                                   max_seconds=args.capture_max_seconds,
+                                                   max_files=args.capture_max_files))
+        ring = None
+        if args.capture_ring:
+            ring = FrameRing(args.capture_ring)
+            ring.install_signal_handler(args.capture_ring_output)
+        tap = CaptureTap(writer, ring, received=args.capture_direction != "tx", sent=args.capture_direction != "rx")
+
+    # shared by the agents of all interfaces
+    metrics = AgentMetrics()
+    registry = metrics.registry
+
+    def create_agent(link, scheduler=None, handoff=None, sock=None):
+        snapshot = args.snapshot
+        if snapshot is not None and not single:
+            # one snapshot per interface
+            snapshot = "{}.{}".format(snapshot, link.name)
+        return LLDPAgent(link.mac, interface_name=link.name, metrics=metrics, timer=timer,
+                         timestamps=args.timestamps, monitor=monitor, tap=tap, snapshot=snapshot,
+                         snapshot_interval=args.snapshot_interval, handoff=handoff, jitter=args.jitter,
+                         interval=args.interval, ttl=ttl_for(args.interval, args.tx_hold),
+                         fast_interval=args.fast_interval, fast_count=args.fast_count,
+                         tx_credit_max=args.tx_credit_max,
+                         sysinfo=None if args.no_sysinfo else SystemInfo(link.name),
+                         scheduler=scheduler, sock=sock)
+
+    if single:
+        state = None
+        if args.take_over:
+            # acknowledged once the new agent is set up, until then the running agent continues
+            try:
+                state = take_over(args.handoff_socket, link.name, acknowledge=False)
+            except ValueError as e:
+                parser.error(str(e))
+
+        handoff = None
+        try:
+            # the listener replaces the one of the agent taken over from
+            handoff = HandoffServer(args.handoff_socket)
+            runner = create_agent(link, handoff=handoff, sock=state.sockets[0] if state is not None else None)
+            if state is not None:
+                runner.take_over(state)
+                state.acknowledge()
+        except BaseException:
+            if state is not None:
+                state.abort()
+            if handoff is not None:
+                handoff.close()
+            raise
+    elif args.take_over:
+        parser.error("--take-over requires --handoff-socket")
+    elif args.workers:
+        # the workers open their own netlink sockets and stream their neighbors and metrics to the supervisor
+        cpus = sorted(os.sched_getaffinity(0)) if args.pin_workers else None
+        runner = Supervisor(functools.partial(run_worker, create_agent, args.interfaces, registry=registry),
+                            args.workers, cpus=cpus)
+        registry = runner.registry
+    else:
+        runner = InterfaceManager(create_agent, LinkMonitor(), args.interfaces)
+    # stop gracefully on SIGTERM, so the shutdown LLDPDUs are sent
+    signal.signal(signal.SIGTERM, lambda signum, frame: runner.stop())
+
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = MetricsServer(registry, host=args.metrics_host, port=args.metrics_port).start()
+
+    try:
+        if args.profile > 0:
+            profile_agent(runner, args.profile, args.profile_output)
+        else:
+            runner.run()
+    finally:
+        if not single and tap is not None:
+            # agents only close the tap when they run their own loop
+            tap.close()
+        if metrics_server is not None:
+            metrics_server.stop()
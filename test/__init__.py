@@ -1,12 +1,36 @@
 from .agent import *
+from .analyze import *
+from .batch import *
+from .bench import *
+from .capture import *
 from .chassisid_tlv import *
 from .eolldpdu_tlv import *
+from .handoff import *
+from .instrument import *
+from .interfaces import *
+from .intern import *
 from .lldpdu import *
+from .loadgen import *
 from .managementaddress_tlv import *
+from .metrics import *
+from .netlink import *
+from .neighbors import *
 from .organizationallyspecific_tlv import *
+from .pcap import *
 from .portdescription_tlv import *
 from .portid_tlv import *
+from .profiling import *
+from .query import *
+from .scheduler import *
+from .serialize import *
+from .snapshot import *
+from .sockstats import *
+from .store import *
+from .supervisor import *
+from .sysinfo import *
 from .systemcapabilities_tlv import *
 from .systemdescription_tlv import *
 from .systemname_tlv import *
+from .traffic import *
+from .transmit import *
 from .ttl_tlv import *
@@ -0,0 +1,116 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from lldp.analyze import TopologySummary, analyze as analyze_captures, plan, main as analyze_main
+from lldp.traffic import lldp_frame, neighbor_lldpdu, synthetic_mac
+from test.pcap import write_pcap, write_pcapng
+from contextlib import redirect_stdout
+
+SECOND = 1000000000
+
+
+def neighbor_frame(index, ttl=120):
+    return lldp_frame(synthetic_mac(index), bytes(neighbor_lldpdu(index, ttl)))
+
+
+class AnalyzeTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pcapng = os.path.join(self.directory.name, "large.pcapng")
+        self.pcap = os.path.join(self.directory.name, "small.pcap")
+
+        packets = [(i % 2, (1500000000 + i) * SECOND, neighbor_frame(i % 4)) for i in range(40)]
+        # neighbor 0 changes its TTL and later goes silent for longer than the TTL
+        packets.append((0, 1500000100 * SECOND, neighbor_frame(0, ttl=10)))
+        packets.append((0, 1500000200 * SECOND, neighbor_frame(0, ttl=10)))
+        packets.append((1, 1500000200 * SECOND, b"\xff" * 60))
+        write_pcapng(self.pcapng, [("eth0", 9), ("eth1", 9)], packets)
+        write_pcap(self.pcap, [(1500000000 * 1000000, neighbor_frame(7)), (1500000001 * 1000000, neighbor_frame(7))])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_plan(self):
+        tasks = plan([self.pcapng, self.pcap], chunk_size=1024)
+        self.assertGreater(len(tasks), 3)
+        self.assertEqual(tasks[-1], (self.pcap, None, None, None, None))
+        # chunks are contiguous and cover the whole pcapng file
+        chunks = tasks[:-1]
+        self.assertEqual(chunks[0][1], 0)
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertEqual(previous[2], current[1])
+            self.assertEqual(len(current[4]), 2)
+        self.assertEqual(chunks[-1][2], os.path.getsize(self.pcapng))
+
+    def check_summary(self, summary):
+        self.assertEqual(summary.frames, 44)
+        self.assertEqual(summary.errors, 0)
+        self.assertEqual(len(summary.links), 5)
+        self.assertEqual(len(summary.chassis()), 5)
+
+        link = summary.links[(self.pcapng, "eth0", "02:00:00:00:00:00", "Ethernet1")]
+        self.assertEqual(link.lldpdus, 12)
+        self.assertEqual(link.first_seen, 1500000000 * SECOND)
+        self.assertEqual(link.last_seen, 1500000200 * SECOND)
+        self.assertEqual(link.ttl_changes, 1)
+        self.assertEqual(link.expirations, 1)
+        self.assertEqual(link.system_name, "sw-00000")
+
+        link = summary.links[(self.pcap, None, "02:00:00:00:00:07", "Ethernet8")]
+        self.assertEqual(link.lldpdus, 2)
+        self.assertEqual(summary.anomalies(), [summary.links[(self.pcapng, "eth0", "02:00:00:00:00:00", "Ethernet1")]])
+
+    def test_sequential(self):
+        self.check_summary(analyze_captures([self.pcapng, self.pcap], workers=1))
+
+    def test_chunked_matches_whole(self):
+        whole = analyze_captures([self.pcapng, self.pcap], workers=1, chunk_size=1 << 30)
+        chunked = analyze_captures([self.pcapng, self.pcap], workers=1, chunk_size=512)
+        self.assertEqual(whole.to_dict(), chunked.to_dict())
+
+    def test_parallel(self):
+        self.check_summary(analyze_captures([self.pcapng, self.pcap], workers=2, chunk_size=1024))
+
+    def test_merge_expiration_across_chunks(self):
+        first, second = TopologySummary(), TopologySummary()
+        first.add(0, "a.pcapng", "eth0", neighbor_lldpdu(1, ttl=10))
+        second.add(11 * SECOND, "a.pcapng", "eth0", neighbor_lldpdu(1, ttl=10))
+        first.merge(second)
+        link = next(iter(first.links.values()))
+        self.assertEqual((link.lldpdus, link.expirations, link.ttl_changes), (2, 1, 0))
+
+    def test_shutdown(self):
+        path = os.path.join(self.directory.name, "shutdown.pcapng")
+        write_pcapng(path, [("eth0", 9)], [(0, 1500000000 * SECOND, neighbor_frame(3)),
+                                           (0, 1500000001 * SECOND, neighbor_frame(3, ttl=0))])
+        summary = analyze_captures([path], workers=1)
+        self.assertEqual(summary.errors, 0)
+        link = summary.links[(path, "eth0", "02:00:00:00:00:03", "Ethernet4")]
+        self.assertEqual((link.lldpdus, link.shutdowns, link.ttl), (2, 1, 0))
+        self.assertEqual(summary.anomalies(), [link])
+
+    def test_same_interface_name_in_two_captures(self):
+        # the same neighbor seen on eth0 of two hosts: a TTL change or a gap between the captures is no anomaly
+        first = os.path.join(self.directory.name, "host-a.pcapng")
+        second = os.path.join(self.directory.name, "host-b.pcapng")
+        write_pcapng(first, [("eth0", 9)], [(0, 1500000000 * SECOND, neighbor_frame(3))])
+        write_pcapng(second, [("eth0", 9)], [(0, 1500001000 * SECOND, neighbor_frame(3, ttl=10))])
+        summary = analyze_captures([first, second], workers=1)
+        self.assertEqual(len(summary.links), 2)
+        self.assertEqual(summary.anomalies(), [])
+        link = summary.links[(second, "eth0", "02:00:00:00:00:03", "Ethernet4")]
+        self.assertEqual((link.lldpdus, link.first_seen, link.ttl), (1, 1500001000 * SECOND, 10))
+        self.assertEqual([port[0] for port in summary.chassis()["02:00:00:00:00:03"]["ports"]], [first, second])
+
+    def test_main(self):
+        output = os.path.join(self.directory.name, "topology.json")
+        with redirect_stdout(io.StringIO()) as stdout:
+            self.assertEqual(analyze_main([self.pcapng, self.pcap, "-j", "1", "--chunk-size", "1k", "--json", output]),
+                             0)
+        self.assertIn("TTL anomalies", stdout.getvalue())
+        with open(output) as f:
+            result = json.load(f)
+        self.assertEqual(result["frames"], 44)
+        self.assertEqual(len(result["links"]), 5)
@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+import lldp.batch
+from lldp.batch import FrameBatch, MISSING
+from lldp.frame import is_lldp_frame
+from lldp.traffic import TrafficMix
+
+LOCAL_MAC = b"\x02\xaa\xbb\xcc\xdd\xee"
+
+
+class FrameBatchTests(unittest.TestCase):
+    def setUp(self):
+        mix = TrafficMix(LOCAL_MAC, neighbors=10, seed=1)
+        self.frames = [frame for _, frame in mix.frames(500)]
+        # edge cases: empty, header only, truncated TLV headers
+        self.frames += [b"", mix.valid[0][:14], mix.valid[0][:15], mix.valid[0][:25], mix.valid[0][:40]]
+
+    def check(self, buffer_type=bytes):
+        packed = FrameBatch.pack(self.frames)
+        frame_batch = FrameBatch(buffer_type(packed.buffer), packed.offsets)
+        self.assertEqual(len(frame_batch), len(self.frames))
+
+        rows = [int(row) for row in frame_batch.classify(LOCAL_MAC)]
+        expected = [i for i, frame in enumerate(self.frames) if is_lldp_frame(frame, LOCAL_MAC)]
+        self.assertEqual(rows, expected)
+        self.assertGreater(len(frame_batch.classify()), len(rows))
+
+        headers = frame_batch.headers(rows)
+        self.assertEqual(len(headers), len(rows))
+        lldpdus = frame_batch.decode(rows)
+        for i, row in enumerate(rows):
+            frame = self.frames[row]
+            self.assertEqual(bytes(headers.src_mac[i]), frame[6:12])
+            lldpdu = lldpdus[i]
+            if lldpdu is not None and lldpdu.complete():
+                self.assertEqual([int(t) for t in headers.tlv_types[i]], [1, 2, 3])
+                self.assertEqual(headers.ttl[i], lldpdu[2].value)
+
+        truncated = frame_batch.headers([len(self.frames) - 4, len(self.frames) - 3, len(self.frames) - 1])
+        self.assertEqual([int(t) for t in truncated.tlv_types[0]], [MISSING] * 3)
+        self.assertEqual([int(t) for t in truncated.tlv_types[1]], [MISSING] * 3)
+        self.assertEqual([int(t) for t in truncated.tlv_types[2]], [1, 2, 3])
+        self.assertEqual(list(truncated.ttl), [-1, -1, 120])
+        return headers
+
+    def test_python(self):
+        with mock.patch("lldp.batch.numpy", None):
+            self.check()
+
+    def test_python_buffer_types(self):
+        with mock.patch("lldp.batch.numpy", None):
+            self.check(bytearray)
+            self.check(lambda buffer: memoryview(bytearray(buffer)))
+
+    @unittest.skipIf(lldp.batch.numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        headers = self.check()
+        with mock.patch("lldp.batch.numpy", None):
+            fallback = self.check()
+        self.assertEqual(headers.tlv_types.tolist(), [list(t) for t in fallback.tlv_types])
+        self.assertEqual(headers.ttl.tolist(), list(fallback.ttl))
+
+    def test_empty(self):
+        frame_batch = FrameBatch.pack([])
+        self.assertEqual(len(frame_batch.classify()), 0)
+        self.assertEqual(len(frame_batch.headers()), 0)
+        self.assertEqual(frame_batch.decode([]), [])
@@ -0,0 +1,77 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from lldp.bench import agent, codec, compare, measure, query, views
+from lldp.bench.__main__ import main as bench_main
+from lldp.traffic import TrafficMix, neighbor_lldpdu
+
+
+class BenchTests(unittest.TestCase):
+    def test_measure(self):
+        result = measure(lambda: None, min_time=0.001, repeat=2)
+        self.assertEqual(result["unit"], "ns/op")
+        self.assertGreater(result["value"], 0)
+
+    def test_codec_cases_roundtrip(self):
+        for name, tlv in codec.tlv_cases().items():
+            self.assertEqual(bytes(type(tlv).from_bytes(bytes(tlv))), bytes(tlv), name)
+
+    def test_codec_filter(self):
+        results = codec.run(min_time=0.001, repeat=1, filter="tlv.ttl.")
+        self.assertEqual(sorted(results), ["codec.tlv.ttl.decode", "codec.tlv.ttl.encode"])
+
+    def test_compare(self):
+        baseline = {"a": {"value": 100.0}, "b": {"value": 100.0}, "c": {"value": 10.0, "better": "higher"}}
+        current = {"a": {"value": 105.0}, "b": {"value": 150.0}, "c": {"value": 5.0, "better": "higher"},
+                   "new": {"value": 1.0}}
+        rows = {row[0]: row for row in compare(current, baseline, threshold=0.1)}
+        self.assertFalse(rows["a"][4])
+        self.assertTrue(rows["b"][4])
+        self.assertTrue(rows["c"][4])
+        self.assertNotIn("new", rows)
+
+    def test_main_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "current.json")
+            baseline = os.path.join(directory, "baseline.json")
+            argv = ["codec", "-k", "tlv.ttl.encode", "--min-time", "0.001", "--repeat", "1"]
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(bench_main(argv + ["-o", output]), 0)
+            with open(output) as f:
+                data = json.load(f)
+            data["results"]["codec.tlv.ttl.encode"]["value"] /= 100
+            with open(baseline, "w") as f:
+                json.dump(data, f)
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(bench_main(argv + ["-b", baseline]), 1)
+
+    def test_agent_inprocess(self):
+        result = agent.run_agent("inprocess", [frame for _, frame in TrafficMix(agent.LOCAL_MAC, neighbors=10)
+                                               .frames(500)])
+        self.assertGreater(result["fps"], 0)
+        self.assertGreater(result["decode_errors"], 0)
+        self.assertGreater(result["dropped"], 0)
+        self.assertEqual(result["neighbors"], 10)
+
+    def test_agent_socketpair(self):
+        traffic = TrafficMix(agent.LOCAL_MAC, neighbors=5, valid=1, non_lldp=0, own=0, malformed=0)
+        result = agent.run_agent("socketpair", [frame for _, frame in traffic.frames(200)])
+        self.assertEqual(result["neighbors"], 5)
+        self.assertEqual(result["decode_errors"], 0)
+
+    def test_views(self):
+        lldpdus = [neighbor_lldpdu(i) for i in range(100)]
+        for locked in (False, True):
+            result = views.run_scenario(lldpdus, 1, locked, 0.05)
+            self.assertGreater(result["updates"], 0)
+            self.assertGreater(result["views"], 0)
+
+    def test_query(self):
+        results = query.run(min_time=0.001, repeat=1, neighbors=100)
+        self.assertIn("query.update.indexed", results)
+        self.assertIn("query.lookup.sorted_page", results)
+        self.assertEqual(set(query.run(min_time=0.001, repeat=1, filter="update", neighbors=10)),
+                         {"query.update.plain", "query.update.indexed"})
@@ -0,0 +1,147 @@
+import os
+import socket
+import tempfile
+import time
+import unittest
+from lldp import LLDPAgent
+from lldp.capture import AsyncCaptureWriter, CaptureTap, FrameRing, PcapWriter
+from lldp.pcap import read_capture
+from lldp.traffic import lldp_frame, neighbor_lldpdu, synthetic_mac
+from test.agent import MockLogger
+
+
+def read_frames(path):
+    return [(timestamp, bytes(frame)) for timestamp, _, frame in read_capture(path)]
+
+
+class CaptureTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "lldp.pcap")
+        self.frame = lldp_frame(synthetic_mac(1), bytes(neighbor_lldpdu(1)))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_writer_roundtrip(self):
+        writer = PcapWriter(self.path)
+        writer.write(1500000000123456789, self.frame)
+        writer.write(1500000001000000000, b"\x01" * 60)
+        writer.close()
+        self.assertEqual(read_frames(self.path), [(1500000000123456789, self.frame),
+                                                  (1500000001000000000, b"\x01" * 60)])
+
+    def test_writer_snaplen(self):
+        writer = PcapWriter(self.path, snaplen=20)
+        writer.write(0, self.frame)
+        writer.close()
+        self.assertEqual(read_frames(self.path), [(0, self.frame[:20])])
+
+    def test_rotate_size(self):
+        writer = PcapWriter(self.path, max_bytes=200, max_files=2)
+        for i in range(10):
+            writer.write(i, b"\x02" * 100)
+        writer.close()
+        files = sorted(os.listdir(self.directory.name))
+        self.assertEqual(files, ["lldp.000003.pcap", "lldp.000004.pcap"])
+        self.assertEqual(len(read_frames(os.path.join(self.directory.name, files[0]))), 2)
+
+    def test_rotate_time(self):
+        writer = PcapWriter(self.path, max_seconds=0.05)
+        writer.write(0, self.frame)
+        time.sleep(0.06)
+        writer.write(1, self.frame)
+        writer.close()
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["lldp.000000.pcap", "lldp.000001.pcap"])
+
+    def test_async_writer(self):
+        writer = AsyncCaptureWriter(PcapWriter(self.path))
+        for i in range(100):
+            writer.write(i, self.frame)
+        writer.close()
+        self.assertEqual(len(read_frames(self.path)), 100 - writer.dropped)
+
+    def test_async_writer_drops_when_full(self):
+        class SlowWriter:
+            def __init__(self):
+                self.frames = 0
+
+            def write(self, timestamp, frame):
+                time.sleep(0.01)
+                self.frames += 1
+
+            def flush(self):
+                pass
+
+            def close(self):
+                pass
+
+        slow = SlowWriter()
+        writer = AsyncCaptureWriter(slow, queue_size=2)
+        for i in range(20):
+            writer.write(i, self.frame)
+        writer.close()
+        self.assertGreater(writer.dropped, 0)
+        self.assertEqual(slow.frames + writer.dropped, 20)
+
+    def test_async_writer_error(self):
+        class FullDisk:
+            def __init__(self):
+                self.closed = False
+
+            def write(self, timestamp, frame):
+                raise OSError(28, "No space left on device")
+
+            def flush(self):
+                pass
+
+            def close(self):
+                self.closed = True
+
+        disk = FullDisk()
+        writer = AsyncCaptureWriter(disk, queue_size=2)
+        writer.write(0, self.frame)
+        writer.thread.join(1.0)
+        self.assertFalse(writer.thread.is_alive())
+        self.assertEqual(writer.error.errno, 28)
+        self.assertTrue(disk.closed)
+        # the queue would be full by now, closing must not wait for the dead thread
+        for i in range(20):
+            writer.write(i, self.frame)
+        writer.close()
+        self.assertEqual(writer.dropped, 20)
+
+    def test_ring(self):
+        ring = FrameRing(3)
+        for i in range(5):
+            ring.write(i, bytes([i]) * 20)
+        self.assertEqual(ring.dump(self.path), 3)
+        self.assertEqual([t for t, _ in read_frames(self.path)], [2, 3, 4])
+
+    def test_tap_direction(self):
+        ring = FrameRing(10)
+        tap = CaptureTap(ring=ring, received=True, sent=False)
+        tap.received(1, self.frame)
+        tap.sent(2, self.frame)
+        self.assertEqual([t for t, _ in ring.frames], [1])
+
+    def test_agent_tap(self):
+        sock, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(peer.close)
+        tap = CaptureTap(PcapWriter(self.path))
+        agent = LLDPAgent(b"\x02\xaa\xbb\xcc\xdd\xee", interface_name="tap0", interval=30.0, sock=sock,
+                          logger=MockLogger(), tap=tap)
+        # the first announce is due right away
+        agent.last_announce = time.monotonic() - 30.0
+        peer.send(b"\xff" * 60)
+        peer.send(self.frame)
+        agent.run(run_once=True)
+
+        frames = read_frames(self.path)
+        sent = peer.recv(4096)
+        shutdown = peer.recv(4096)
+        self.assertIn(self.frame, [frame for _, frame in frames])
+        self.assertIn(sent, [frame for _, frame in frames])
+        # the shutdown LLDPDU sent when the agent stops
+        self.assertEqual(frames[-1][1], shutdown)
+        self.assertEqual(len(frames), 3)
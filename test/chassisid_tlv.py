@@ -106,3 +106,32 @@ class ChassisIdTLVTests(unittest.TestCase):
     def test_chassisid_load_invalid_ipv6(self):
         with self.assertRaises(ValueError):
             ChassisIdTLV.from_bytes(b"\x02\x10\x05\x20\x01\x00\xdb\x00\x00\x00\x00\x00\x00\x00\x00\x00\xff\x00")
+
+    def test_chassisid_max_length_roundtrip(self):
+        tlv = ChassisIdTLV(subtype=ChassisIdTLV.Subtype.LOCAL, id="c" * 255)
+        self.assertEqual(bytes(tlv)[:3], b"\x03\x00\x07")
+        self.assertEqual(ChassisIdTLV.from_bytes(bytes(tlv)).value, "c" * 255)
+
+    def test_chassisid_address_setter(self):
+        tlv = ChassisIdTLV(ChassisIdTLV.Subtype.NETWORK_ADDRESS, ip_address("192.0.2.1"))
+        tlv.value = "2001:db8::2"
+        self.assertEqual(tlv.value, ip_address("2001:db8::2"))
+        self.assertEqual(tlv.family, 6)
+
+    def test_chassisid_lazy_address(self):
+        data = b"\x02\x06\x05\x01\xc0\x00\x02\x64"
+        tlv = ChassisIdTLV.from_bytes(data)
+        self.assertEqual((tlv.packed, tlv.family), (b"\xc0\x00\x02\x64", 4))
+        self.assertEqual(bytes(tlv), data)
+        self.assertIsNone(tlv._address)
+        self.assertEqual(tlv.value, ip_address("192.0.2.100"))
+
+    def test_chassisid_equality(self):
+        decoded = ChassisIdTLV.from_bytes(b"\x02\x06\x05\x01\xc0\x00\x02\x64")
+        built = ChassisIdTLV(ChassisIdTLV.Subtype.NETWORK_ADDRESS, ip_address("192.0.2.100"))
+        self.assertEqual(decoded, built)
+        self.assertEqual(hash(decoded), hash(built))
+        self.assertIsNone(decoded._address)
+        self.assertNotEqual(decoded, ChassisIdTLV(ChassisIdTLV.Subtype.NETWORK_ADDRESS, ip_address("192.0.2.101")))
+        self.assertNotEqual(decoded, ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "192.0.2.100"))
+        self.assertEqual(ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "a"), ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "a"))
@@ -0,0 +1,121 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from lldp import LLDPAgent
+from lldp.handoff import HandoffServer, take_over
+from lldp.traffic import neighbor_lldpdu
+from test.agent import MockLogger
+
+
+class HandoffTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "handoff.sock")
+        # a datagram socket pair stands in for the packet socket
+        self.packet_socket, self.peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def tearDown(self):
+        self.peer.close()
+        self.directory.cleanup()
+
+    def start_agent(self):
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", interface_name="eth3", interval=30.0, sock=self.packet_socket,
+                          logger=MockLogger(), handoff=HandoffServer(self.path))
+        for i in range(20):
+            agent.neighbors.update(neighbor_lldpdu(i), "eth3")
+        agent.last_announce = self.last_announce = time.monotonic()
+        thread = threading.Thread(target=agent.run, daemon=True)
+        thread.start()
+        return agent, thread
+
+    def test_take_over(self):
+        agent, thread = self.start_agent()
+        state = take_over(self.path, acknowledge=False)
+        # the old agent waits for the acknowledgement and no longer reads, frames queued until then must be readable by
+        # the new process
+        self.peer.send(b"queued frame")
+        state.acknowledge()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(agent.handed_off)
+        self.assertFalse(os.path.exists(self.path))
+
+        self.assertEqual(state.interface_name, "eth3")
+        self.assertEqual(state.last_announce, self.last_announce)
+        self.assertEqual(len(state.neighbors), 20)
+        for neighbor in agent.neighbors:
+            self.assertEqual(state.neighbors.get(neighbor.key).deadline, neighbor.deadline)
+
+        self.assertEqual(len(state.sockets), 1)
+        sock = state.sockets[0]
+        sock.settimeout(1)
+        try:
+            self.assertEqual(sock.recv(100), b"queued frame")
+            self.peer.send(b"new frame")
+            self.assertEqual(sock.recv(100), b"new frame")
+
+            successor = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", interface_name="eth3", sock=sock, logger=MockLogger())
+            successor.take_over(state)
+            self.assertIs(successor.neighbors, state.neighbors)
+            self.assertEqual(successor.last_announce, self.last_announce)
+        finally:
+            sock.close()
+
+    def test_failed_handoff_keeps_running(self):
+        agent, thread = self.start_agent()
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(self.path)
+        client.recv(10)
+        client.close()
+        self.assertKeepsRunning(agent, thread)
+
+    def assertKeepsRunning(self, agent, thread):
+        time.sleep(0.2)
+        self.assertTrue(thread.is_alive())
+        self.assertFalse(agent.handed_off)
+        agent.stop()
+        try:
+            # wake up the loop
+            self.peer.send(b"x")
+        except ConnectionRefusedError:
+            # already stopped and closed its socket
+            pass
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_other_interface(self):
+        agent, thread = self.start_agent()
+        with self.assertRaises(ValueError):
+            take_over(self.path, "eth4")
+        self.assertKeepsRunning(agent, thread)
+
+    def test_deferred_acknowledge(self):
+        agent, thread = self.start_agent()
+        state = take_over(self.path, "eth3", acknowledge=False)
+        time.sleep(0.1)
+        # the previous agent waits for the acknowledgement
+        self.assertFalse(agent.handed_off)
+        state.acknowledge()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(agent.handed_off)
+        state.sockets[0].close()
+
+    def test_abort(self):
+        agent, thread = self.start_agent()
+        state = take_over(self.path, "eth3", acknowledge=False)
+        state.abort()
+        self.assertEqual(state.sockets[0].fileno(), -1)
+        self.assertKeepsRunning(agent, thread)
+
+    def test_listener_replacement(self):
+        first = HandoffServer(self.path)
+        second = HandoffServer(self.path)
+        first.close()
+        self.assertTrue(os.path.exists(self.path))
+        second.close()
+        self.assertFalse(os.path.exists(self.path))
+        self.packet_socket.close()
@@ -0,0 +1,54 @@
+import binascii
+import socket
+import unittest
+from lldp import LLDPAgent, LLDPDU
+from lldp.instrument import LatencyHistogram, StageTimer
+from test.agent import MockLogger
+
+
+class StageTimerTests(unittest.TestCase):
+    def setUp(self):
+        self.timer = StageTimer()
+
+    def test_histogram_buckets(self):
+        h = LatencyHistogram()
+        for duration in (0, 1, 3, 1000, 1023, 1024):
+            h.record(duration)
+        self.assertEqual(h.counts[0], 1)
+        self.assertEqual(h.counts[10], 2)
+        self.assertEqual(h.counts[11], 1)
+        self.assertEqual(h.count, 6)
+        self.assertEqual(h.max, 1024)
+
+    def test_histogram_overflow(self):
+        h = LatencyHistogram()
+        h.record(1 << 40)
+        self.assertEqual(h.counts[-1], 1)
+
+    def test_percentile(self):
+        h = LatencyHistogram()
+        for _ in range(99):
+            h.record(100)
+        h.record(100000)
+        self.assertEqual(h.percentile(50), 128)
+        self.assertEqual(h.percentile(100), 100000)
+
+    def test_probe(self):
+        probe = self.timer.probe("stage")
+        probe(self.timer.clock())
+        self.assertEqual(self.timer.histogram("stage").count, 1)
+        self.assertIn("stage", self.timer.dump())
+
+    def test_tlv_stages(self):
+        LLDPDU.from_bytes(b"\x02\x08\x07Voyager\x04\x06\x0710743\x06\x02\x00\xff\x00\x00", self.timer)
+        for name in ("ChassisIdTLV", "PortIdTLV", "TTLTLV", "EndOfLLDPDUTLV"):
+            self.assertEqual(self.timer.histogram("tlv." + name).count, 1)
+
+    def test_agent_stages(self):
+        agent_end, peer_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        peer_end.send(binascii.unhexlify("0180c200000effeeddccbbaa88cc020704ffeeddccbbaa040703ffeeddccbbaa060200780000"))
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", sock=agent_end, logger=MockLogger(), timer=self.timer)
+        agent.run(run_once=True)
+        peer_end.close()
+        for stage in ("select", "recv", "classify", "decode", "neighbor_update", "log"):
+            self.assertEqual(self.timer.histogram(stage).count, 1, stage)
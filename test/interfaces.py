@@ -0,0 +1,178 @@
+import socket
+import threading
+import time
+import unittest
+from lldp import LLDPAgent
+from lldp.interfaces import InterfaceManager
+from lldp.metrics import AgentMetrics
+from lldp.netlink import IFF_RUNNING, IFF_UP, Link
+from lldp.traffic import neighbor_lldpdu
+from test.agent import MockLogger
+
+UP = IFF_UP | IFF_RUNNING
+
+
+class FakeLinks:
+    """Stands in for a LinkMonitor, `notify()` queues changes and makes it readable"""
+
+    def __init__(self, changes=()):
+        self.initial = list(changes)
+        self.changes = []
+        self.reader, self.writer = socket.socketpair()
+        self.reader.setblocking(False)
+
+    def fileno(self):
+        return self.reader.fileno()
+
+    def dump(self):
+        return self.initial
+
+    def read(self):
+        self.reader.recv(64)
+        changes, self.changes = self.changes, []
+        return changes
+
+    def notify(self, old, new):
+        self.changes.append((old, new))
+        self.writer.send(b"\x00")
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+class InterfaceManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.peers = {}
+        self.closing = []
+        self.metrics = AgentMetrics()
+        self.links = FakeLinks()
+        self.manager = InterfaceManager(self.create_agent, self.links, ["eth*", "swp1"], logger=MockLogger())
+
+    def tearDown(self):
+        # agents of tests that do not run the manager loop
+        for index in list(self.manager.agents):
+            self.manager.remove(index)
+        for peer in list(self.peers.values()) + self.closing:
+            peer.close()
+        self.links.close()
+
+    def create_agent(self, link, scheduler):
+        # a datagram socket pair stands in for the packet socket
+        sock, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        peer.setblocking(False)
+        if link.name in self.peers:
+            self.closing.append(self.peers[link.name])
+        self.peers[link.name] = peer
+        return LLDPAgent(link.mac, interface_name=link.name, interval=30.0, sock=sock, logger=MockLogger(),
+                         metrics=self.metrics, scheduler=scheduler)
+
+    def sent(self, name):
+        frames = []
+        while True:
+            try:
+                frames.append(self.peers[name].recv(4096))
+            except BlockingIOError:
+                return frames
+
+    def test_wanted(self):
+        wanted = self.manager.wanted
+        self.assertTrue(wanted(Link(2, "eth0", b"\x02" * 6, flags=UP)))
+        self.assertTrue(wanted(Link(3, "swp1", b"\x02" * 6, flags=UP)))
+        self.assertFalse(wanted(Link(4, "swp10", b"\x02" * 6, flags=UP)))
+        self.assertFalse(wanted(Link(2, "eth0", b"\x02" * 6, flags=IFF_UP)))
+        self.assertFalse(wanted(Link(2, "eth0", b"", type=65534, flags=UP)))
+
+    def test_update(self):
+        eth0 = Link(2, "eth0", b"\x02\x00\x00\x00\x00\x01", flags=UP)
+        eth1 = Link(3, "eth1", b"\x02\x00\x00\x00\x00\x02", flags=IFF_UP)
+        self.manager.update([(None, eth0), (None, eth1)])
+        self.assertEqual(list(self.manager.agents), [2])
+        self.manager.scheduler.run_due()
+        self.assertEqual(len(self.sent("eth0")), 1)
+
+        # the MAC address changed, the old identity says goodbye and a new agent announces
+        changed = Link(2, "eth0", b"\x02\x00\x00\x00\x00\x09", flags=UP)
+        agent = self.manager.agents[2]
+        old_peer = self.peers["eth0"]
+        self.manager.update([(eth0, changed)])
+        self.assertIsNot(self.manager.agents[2], agent)
+        self.assertEqual(self.manager.agents[2].mac_address, changed.mac)
+        self.assertTrue(old_peer.recv(4096).endswith(b"\x06\x02\x00\x00"))
+        self.manager.scheduler.run_due()
+        self.assertIn(changed.mac, self.sent("eth0")[0])
+
+        # operationally down
+        self.manager.update([(changed, Link(2, "eth0", changed.mac, flags=IFF_UP))])
+        self.assertEqual(self.manager.agents, {})
+        self.assertEqual(len(self.manager.scheduler), 0)
+
+    def test_removed_agent_drops_its_neighbors(self):
+        eth0 = Link(2, "eth0", b"\x02\x00\x00\x00\x00\x01", flags=UP)
+        eth1 = Link(3, "eth1", b"\x02\x00\x00\x00\x00\x02", flags=UP)
+        self.manager.update([(None, eth0), (None, eth1)])
+        for index, agent in self.manager.agents.items():
+            agent.neighbors.update(neighbor_lldpdu(index), agent.interface_name)
+            agent.count_neighbors()
+        self.assertEqual(len(list(self.manager.neighbors())), 2)
+        self.assertEqual(self.metrics.neighbors.value, 2)
+        self.manager.update([(eth1, None)])
+        self.assertEqual([n.interface for n in self.manager.neighbors()], ["eth0"])
+        self.assertEqual(self.metrics.neighbors.value, 1)
+
+    def test_query(self):
+        eth0 = Link(2, "eth0", b"\x02\x00\x00\x00\x00\x01", flags=UP)
+        eth1 = Link(3, "eth1", b"\x02\x00\x00\x00\x00\x02", flags=UP)
+        self.manager.update([(None, eth0), (None, eth1)])
+        for index, agent in self.manager.agents.items():
+            for i in range(index * 10, index * 10 + 3):
+                agent.neighbors.update(neighbor_lldpdu(i), agent.interface_name)
+            agent.neighbors.publish()
+        result = self.manager.query(sort="system_name", limit=4)
+        self.assertEqual(result.total, 6)
+        self.assertEqual([n.attributes.system_name for n in result.neighbors],
+                         ["sw-00020", "sw-00021", "sw-00022", "sw-00030"])
+        result = self.manager.query(interface="eth1", management_address="10.0.0.31")
+        self.assertEqual([n.interface for n in result.neighbors], ["eth1"])
+        self.assertEqual(self.manager.query(interface="eth9").total, 0)
+
+    def test_failing_agent(self):
+        def factory(link, scheduler):
+            raise OSError("No such device")
+        manager = InterfaceManager(factory, self.links, logger=MockLogger())
+        manager.update([(None, Link(2, "eth0", b"\x02" * 6, flags=UP))])
+        self.assertEqual(manager.agents, {})
+
+    def test_run(self):
+        eth0 = Link(2, "eth0", b"\x02\x00\x00\x00\x00\x01", flags=UP)
+        self.links.initial = [(None, eth0)]
+        thread = threading.Thread(target=self.manager.run)
+        thread.start()
+        try:
+            eth1 = Link(3, "eth1", b"\x02\x00\x00\x00\x00\x02", flags=UP)
+            self.links.notify(None, eth1)
+            deadline = time.monotonic() + 5.0
+            while len(self.manager.agents) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(sorted(self.manager.agents), [2, 3])
+
+            # a frame from a neighbor on eth1
+            frame = b"\x01\x80\xc2\x00\x00\x0e" + b"\x02\x00\x00\x00\x00\x77" + b"\x88\xcc" + \
+                bytes(neighbor_lldpdu(7))
+            self.peers["eth1"].send(frame)
+            while self.metrics.neighbors.value < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual([n.interface for n in self.manager.neighbors()], ["eth1"])
+
+            # a reader thread gets a current view from the running loop
+            view = self.manager.agents[3].neighbors.snapshot(timeout=5.0)
+            self.assertEqual([n.interface for n in view], ["eth1"])
+        finally:
+            self.manager.stop()
+            thread.join()
+        self.assertEqual(self.manager.agents, {})
+        # announce (and fast start after the new neighbor) followed by the shutdown LLDPDU
+        for name in ("eth0", "eth1"):
+            frames = self.sent(name)
+            self.assertGreaterEqual(len(frames), 2)
+            self.assertTrue(frames[-1].endswith(b"\x06\x02\x00\x00"))
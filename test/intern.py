@@ -0,0 +1,71 @@
+import gc
+import unittest
+from lldp.tlv import *
+from lldp.tlv.intern import STRINGS, StringInterner
+
+
+class StringInternerTests(unittest.TestCase):
+    def setUp(self):
+        self.interner = StringInterner()
+
+    def test_hit(self):
+        first = self.interner.decode(b"Arista Networks EOS")
+        second = self.interner.decode(bytearray(b"Arista Networks EOS"))
+        self.assertEqual(first, "Arista Networks EOS")
+        self.assertIs(first, second)
+        stats = self.interner.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertGreater(stats["saved_bytes"], len(first))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.interner.decode, b"\xff\xfe")
+        self.assertEqual(len(self.interner), 0)
+
+    def test_sweep(self):
+        kept = self.interner.decode(b"kept")
+        self.interner.decode(b"dropped")
+        gc.collect()
+        self.assertEqual(self.interner.sweep(), 1)
+        self.assertEqual(len(self.interner), 1)
+        self.assertIs(self.interner.decode(b"kept"), kept)
+
+    def test_max_entries(self):
+        interner = StringInterner(max_entries=2)
+        values = [interner.decode("value {}".format(i).encode()) for i in range(3)]
+        self.assertEqual(values, ["value 0", "value 1", "value 2"])
+        self.assertEqual(len(interner), 2)
+        del values
+        gc.collect()
+        # decoding does not sweep, the next sweep makes room again
+        interner.decode(b"value 3")
+        self.assertEqual((interner.swept, len(interner)), (0, 2))
+        self.assertEqual(interner.sweep(), 2)
+        interner.decode(b"value 4")
+        self.assertEqual(len(interner), 1)
+
+    def test_full_of_live_strings(self):
+        interner = StringInterner(max_entries=4)
+        live = [interner.decode("live {}".format(i).encode()) for i in range(4)]
+        sweeps = []
+        interner.sweep = lambda: sweeps.append(1)
+        for i in range(100):
+            self.assertEqual(interner.decode("new {}".format(i).encode()), "new {}".format(i))
+        self.assertEqual(sweeps, [])
+        self.assertEqual(len(interner), 4)
+        self.assertIs(interner.decode(b"live 0"), live[0])
+
+    def test_disabled(self):
+        self.interner.enabled = False
+        self.assertIsNot(self.interner.decode(b"x" * 20), self.interner.decode(b"x" * 20))
+        self.assertEqual(len(self.interner), 0)
+
+    def test_tlv_decoders(self):
+        for tlv in (SystemNameTLV("leaf-17"), SystemDescriptionTLV("Arista Networks EOS version 4.28.3M"),
+                    PortDescriptionTLV("Uplink to spine-2"), ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "leaf-17.dc1"),
+                    PortIdTLV(PortIdTLV.Subtype.INTERFACE_NAME, "Ethernet1/49")):
+            raw = bytes(tlv)
+            first, second = type(tlv).from_bytes(raw), type(tlv).from_bytes(raw)
+            self.assertEqual(first.value, tlv.value)
+            self.assertIs(first.value, second.value)
+        self.assertGreater(STRINGS.hits, 0)
@@ -0,0 +1,97 @@
+import io
+import os
+import struct
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from lldp import LLDPDU
+from lldp.loadgen import LoadGenerator, replay, main as loadgen_main
+from lldp.pcap import read_capture
+
+
+class CollectingTransport:
+    def __init__(self):
+        self.frames = []
+
+    def send(self, frame):
+        self.frames.append(frame)
+
+
+def write_pcap(path, records, magic=0xa1b2c3d4, byteorder="<"):
+    with open(path, "wb") as f:
+        f.write(struct.pack(byteorder + "IHHiIII", magic, 2, 4, 0, 0, 65535, 1))
+        for seconds, fraction, frame in records:
+            f.write(struct.pack(byteorder + "IIII", seconds, fraction, len(frame), len(frame)))
+            f.write(frame)
+
+
+class LoadGeneratorTests(unittest.TestCase):
+    def setUp(self):
+        self.transport = CollectingTransport()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_robin(self):
+        sent = LoadGenerator(self.transport, neighbors=5, rate=100000).run(count=12)
+        self.assertEqual(sent, 12)
+        self.assertEqual(len(set(self.transport.frames)), 5)
+        self.assertEqual(self.transport.frames[0], self.transport.frames[5])
+        self.assertTrue(LLDPDU.from_bytes(self.transport.frames[0][14:]).complete())
+
+    def test_repeated_runs(self):
+        generator = LoadGenerator(self.transport, neighbors=5, rate=200)
+        generator.run(count=10)
+        start = time.monotonic()
+        self.assertEqual(generator.run(count=20), 20)
+        self.assertEqual(len(self.transport.frames), 30)
+        # paced from the start of the second run
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_all_flapping(self):
+        times = []
+        self.transport.send = lambda frame: times.append(time.monotonic())
+        generator = LoadGenerator(self.transport, neighbors=4, rate=1000, flap_fraction=1.0, flap_period=0.1)
+        start = time.monotonic()
+        sent = generator.run(duration=0.3)
+        self.assertEqual(sent, len(times))
+        # nothing is sent while all neighbors are down, and the missed frames are not sent afterwards
+        self.assertFalse([t for t in times if 0.11 < t - start < 0.19])
+        self.assertGreater(len([t for t in times if t - start >= 0.2]), 0)
+        self.assertLess(sent, 260)
+
+    def test_rate(self):
+        start = time.monotonic()
+        LoadGenerator(self.transport, neighbors=5, rate=200).run(count=40)
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, LoadGenerator, self.transport, neighbors=0)
+        self.assertRaises(ValueError, LoadGenerator, self.transport, rate=0)
+        with redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+            loadgen_main(["generate", "--inprocess", "--neighbors", "0", "--count", "5"])
+        self.assertIn("--neighbors: must be positive", stderr.getvalue())
+
+    def test_read_pcap(self):
+        path = os.path.join(self.directory.name, "capture.pcap")
+        write_pcap(path, [(10, 5, b"\x01" * 20), (11, 0, b"\x02" * 30)], byteorder=">")
+        records = [(t, i, bytes(f)) for t, i, f in read_capture(path)]
+        self.assertEqual(records[0], (10000005000, None, b"\x01" * 20))
+        self.assertEqual(records[1][0], 11000000000)
+
+    def test_replay_timing(self):
+        path = os.path.join(self.directory.name, "capture.pcap")
+        write_pcap(path, [(10, 0, b"\x01" * 20), (10, 200000, b"\x02" * 20), (10, 400000, b"\x03" * 20)])
+        start = time.monotonic()
+        self.assertEqual(replay(path, self.transport, speed=2), 3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertEqual(self.transport.frames[2], b"\x03" * 20)
+
+    def test_inprocess(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            loadgen_main(["generate", "--inprocess", "--neighbors", "4", "--count", "20", "--rate", "1000"])
+        self.assertIn("Sent 20 frames", out.getvalue())
+        self.assertIn("20 received, 0 dropped, 0 decode errors, 4 neighbors", out.getvalue())
@@ -90,3 +90,31 @@ class ManagementAddressTLVTests(unittest.TestCase):
     def test_load_zero_oid(self):
         tlv = ManagementAddressTLV.from_bytes(b"\x10\x0C\x05\x01\xC0\x00\x02*\x03\x00\x00\x00\x01\x00")
         self.assertEqual(tlv.oid, None)
+
+    def test_load_interface_number(self):
+        data = b"\x10\x0C\x05\x01\xC0\x00\x02*\x02\x00\x00\x01\x02\x00"
+        tlv = ManagementAddressTLV.from_bytes(data)
+        self.assertEqual(tlv.ifnumber, 258)
+        self.assertEqual(bytes(tlv), data)
+
+    def test_repr_and_length_without_oid(self):
+        tlv = ManagementAddressTLV(address=self.v4_address, interface_number=self.ifnum)
+        self.assertEqual(len(tlv), 12)
+        self.assertEqual(repr(tlv).replace(" ", ""), "ManagementAddressTLV(IPv4Address('192.0.2.17'),5,1,None)")
+
+    def test_lazy_address(self):
+        data = b"\x10\x0C\x05\x01\xC0\x00\x02*\x02\x00\x00\x01\x02\x00"
+        tlv = ManagementAddressTLV.from_bytes(data)
+        self.assertEqual((tlv.packed, tlv.family), (b"\xC0\x00\x02*", 4))
+        self.assertEqual(bytes(tlv), data)
+        self.assertIsNone(tlv._address)
+        self.assertEqual(tlv.value, ip_address("192.0.2.42"))
+
+    def test_equality(self):
+        data = b"\x10\x0C\x05\x01\xC0\x00\x02*\x02\x00\x00\x01\x02\x00"
+        built = ManagementAddressTLV(ip_address("192.0.2.42"), 258, ManagementAddressTLV.IFNumberingSubtype.IF_INDEX)
+        self.assertEqual(ManagementAddressTLV.from_bytes(data), built)
+        self.assertEqual(hash(ManagementAddressTLV.from_bytes(data)), hash(built))
+        self.assertNotEqual(ManagementAddressTLV.from_bytes(data),
+                            ManagementAddressTLV(ip_address("192.0.2.42"), 259,
+                                                 ManagementAddressTLV.IFNumberingSubtype.IF_INDEX))
@@ -0,0 +1,76 @@
+import binascii
+import socket
+import struct
+import unittest
+import urllib.request
+from lldp import LLDPAgent
+from lldp.agent import SCM_TIMESTAMPNS, kernel_timestamp
+from lldp.metrics import Registry, AgentMetrics, MetricsServer
+from test.agent import MockSocket, MockLogger
+
+
+class MetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter(self):
+        c = self.registry.counter("test_frames", "Frames")
+        inc = c.inc
+        inc()
+        inc(2)
+        self.assertEqual(c.value, 3)
+        self.assertIn("test_frames_total 3\n", self.registry.render())
+
+    def test_duplicate_name(self):
+        self.registry.counter("test_frames")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("test_frames")
+
+    def test_histogram_buckets(self):
+        h = self.registry.histogram("test_latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            h.observe(value)
+        text = self.registry.render()
+        self.assertIn('test_latency_bucket{le="0.1"} 2\n', text)
+        self.assertIn('test_latency_bucket{le="1.0"} 3\n', text)
+        self.assertIn('test_latency_bucket{le="+Inf"} 4\n', text)
+        self.assertIn("test_latency_count 4\n", text)
+        self.assertIn("# TYPE test_latency histogram\n", text)
+
+    def test_agent_counts_sent_frames(self):
+        metrics = AgentMetrics()
+        a = LLDPAgent(b"\x66\x6F\x6F\x62\x61\x72", interface_name="lo", sock=MockSocket(), metrics=metrics)
+        a.announce()
+        a.announce()
+        self.assertEqual(metrics.frames_sent.value, 2)
+
+    def test_server(self):
+        self.registry.gauge("test_neighbors").set(7)
+        server = MetricsServer(self.registry, port=0).start()
+        try:
+            host, port = server.address
+            with urllib.request.urlopen("http://{}:{}/metrics".format(host, port)) as response:
+                self.assertEqual(response.status, 200)
+                self.assertIn("text/plain", response.headers["Content-Type"])
+                self.assertIn("test_neighbors 7", response.read().decode("utf-8"))
+        finally:
+            server.stop()
+
+    def test_arrival_latency(self):
+        agent_end, peer_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        metrics = AgentMetrics()
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", sock=agent_end, logger=MockLogger(), metrics=metrics,
+                          timestamps=True)
+        peer_end.send(binascii.unhexlify("0180c200000effeeddccbbaa88cc020704ffeeddccbbaa040703ffeeddccbbaa060200780000"))
+        agent.run(run_once=True)
+        peer_end.close()
+        self.assertEqual(metrics.arrival_to_decoded.count, 1)
+        self.assertEqual(metrics.arrival_to_neighbor.count, 1)
+        self.assertGreaterEqual(metrics.arrival_to_neighbor.sum, metrics.arrival_to_decoded.sum)
+        self.assertEqual(metrics.frames_received.value, 1)
+        self.assertEqual(metrics.neighbors.value, 1)
+
+    def test_kernel_timestamp(self):
+        ancdata = [(socket.SOL_SOCKET, SCM_TIMESTAMPNS, struct.pack("@ll", 12, 345))]
+        self.assertEqual(kernel_timestamp(ancdata), 12000000345)
+        self.assertIsNone(kernel_timestamp([]))
@@ -0,0 +1,164 @@
+import threading
+import time
+import unittest
+from lldp import LLDPDU
+from lldp.neighbors import NeighborTable
+from lldp.tlv import *
+from test.util import make_lldpdu
+
+
+class NeighborTableTests(unittest.TestCase):
+    def setUp(self):
+        self.table = NeighborTable()
+
+    def test_update_adds_and_refreshes(self):
+        first = self.table.update(make_lldpdu(), "eth0", now=10.0)
+        second = self.table.update(make_lldpdu(ttl=30), "eth0", now=20.0)
+        self.assertIs(first, second)
+        self.assertEqual(len(self.table), 1)
+        self.assertEqual(second.first_seen, 10.0)
+        self.assertEqual(second.deadline, 50.0)
+
+    def test_distinct_ports(self):
+        self.table.update(make_lldpdu(port="port(1)"), now=0.0)
+        self.table.update(make_lldpdu(port="port(2)"), now=0.0)
+        self.assertEqual(len(self.table), 2)
+
+    def test_expire(self):
+        self.table.update(make_lldpdu(port="short", ttl=5), now=0.0)
+        self.table.update(make_lldpdu(port="long", ttl=50), now=0.0)
+        expired = self.table.expire(now=10.0)
+        self.assertEqual([n.lldpdu[1].value for n in expired], ["short"])
+        self.assertEqual(len(self.table), 1)
+
+    def test_expiry_wheel(self):
+        self.assertIsNone(self.table.next_deadline())
+        for port, ttl in (("a", 5), ("b", 10), ("c", 10), ("d", 30)):
+            self.table.update(make_lldpdu(port=port, ttl=ttl), now=0.25)
+        self.assertEqual(self.table.next_deadline(), 5.25)
+        # refreshed before it expires, removed and shut down neighbors are not expired
+        self.table.update(make_lldpdu(port="a", ttl=20), now=4.0)
+        self.table.update(make_lldpdu(port="c", ttl=0), now=4.0)
+        self.table.remove(NeighborTable.key_of(make_lldpdu(port="d")))
+        self.assertEqual(self.table.next_deadline(), 10.25)
+        # only the part of a bucket that is due expires
+        self.assertEqual(self.table.expire(now=10.0), [])
+        self.assertEqual([n.lldpdu[1].value for n in self.table.expire(now=10.5)], ["b"])
+        self.assertEqual(self.table.next_deadline(), 24.0)
+        neighbor = self.table.get(NeighborTable.key_of(make_lldpdu(port="a")))
+        self.table.insert(neighbor)
+        self.assertEqual(self.table.expire(now=1000.0), [neighbor])
+        self.assertIsNone(self.table.next_deadline())
+        self.assertEqual(len(self.table), 0)
+
+    def test_incomplete(self):
+        with self.assertRaises(ValueError):
+            self.table.update(LLDPDU(ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "switch")))
+
+    def test_shutdown_and_remove(self):
+        self.table.update(make_lldpdu(), now=0.0)
+        self.table.update(make_lldpdu(ttl=0), now=1.0)
+        self.assertEqual(len(self.table), 0)
+        neighbor = self.table.update(make_lldpdu(), now=2.0)
+        self.assertIs(self.table.remove(neighbor.key), neighbor)
+        self.assertIsNone(self.table.remove(neighbor.key))
+        self.assertEqual(len(self.table), 0)
+
+    def test_shards(self):
+        with self.assertRaises(ValueError):
+            NeighborTable(shards=3)
+        table = NeighborTable(shards=1)
+        for port in range(10):
+            table.update(make_lldpdu(port="port({})".format(port)), now=0.0)
+        self.assertEqual(len(table), 10)
+        self.assertEqual(len(list(table)), 10)
+
+
+class NeighborViewTests(unittest.TestCase):
+    def setUp(self):
+        self.table = NeighborTable()
+        for port in range(20):
+            self.table.update(make_lldpdu(port="port({})".format(port), ttl=10 + port), now=0.0)
+
+    def test_point_in_time(self):
+        view = self.table.publish()
+        first = view.get(NeighborTable.key_of(make_lldpdu(port="port(0)")))
+        self.assertEqual(len(view), 20)
+
+        refreshed = self.table.update(make_lldpdu(port="port(0)", ttl=100), now=5.0)
+        self.table.update(make_lldpdu(port="port(1)", ttl=0), now=5.0)
+        self.table.update(make_lldpdu(port="new"), now=5.0)
+        self.table.expire(now=20.0)
+
+        # the view and its entries are unchanged
+        self.assertEqual(len(view), 20)
+        self.assertEqual(len(list(view)), 20)
+        self.assertIs(view.get(first.key), first)
+        self.assertEqual(first.deadline, 10.0)
+        self.assertNotIn(NeighborTable.key_of(make_lldpdu(port="new")), view)
+
+        # refreshed entries of a published generation are replaced
+        self.assertIsNot(refreshed, first)
+        self.assertEqual((refreshed.first_seen, refreshed.deadline), (0.0, 105.0))
+        self.assertEqual(len(self.table), 11)
+        self.assertEqual(len(self.table.publish()), 11)
+
+    def test_refresh_in_place_until_published(self):
+        self.table.publish()
+        first = self.table.update(make_lldpdu(port="port(0)"), now=1.0)
+        second = self.table.update(make_lldpdu(port="port(0)"), now=2.0)
+        self.assertIs(first, second)
+
+    def test_snapshot_requests_publish(self):
+        requests = []
+        self.table.on_request = requests.append
+        # the view published before the updates
+        self.assertEqual(len(self.table.snapshot()), 0)
+        self.assertEqual(requests, [self.table])
+        self.table.publish_pending()
+        view = self.table.snapshot()
+        self.assertEqual(len(view), 20)
+        self.assertIs(self.table.snapshot(), view)
+        self.assertEqual(len(requests), 1)
+
+        # nothing requested, nothing published
+        self.table.update(make_lldpdu(port="new"), now=1.0)
+        generation = self.table.generation
+        self.table.publish_pending()
+        self.assertEqual(self.table.generation, generation)
+
+    def test_snapshot_waits_for_writer(self):
+        self.table.snapshot()
+        self.table.publish_pending()
+        self.table.update(make_lldpdu(port="new"), now=1.0)
+        writer = threading.Thread(target=lambda: (time.sleep(0.05), self.table.publish_pending()))
+        writer.start()
+        try:
+            self.assertEqual(len(self.table.snapshot(timeout=5.0)), 21)
+        finally:
+            writer.join()
+
+    def test_concurrent_readers(self):
+        stop = threading.Event()
+        errors = []
+
+        def reader():
+            while not stop.is_set():
+                view = self.table.snapshot()
+                entries = list(view)
+                if len(entries) != len(view) or len({n.key for n in entries}) != len(entries):
+                    errors.append(view)
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        try:
+            for i in range(20000):
+                self.table.update(make_lldpdu(port="port({})".format(i % 200), ttl=i % 7), now=float(i))
+                if i % 16 == 0:
+                    self.table.publish_pending()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
@@ -0,0 +1,112 @@
+import socket
+import struct
+import unittest
+from lldp.netlink import ARPHRD_ETHER, IFF_LOOPBACK, IFF_RUNNING, IFF_UP, NLMSG_DONE, NLMSG_ERROR, RTM_DELLINK, \
+    RTM_GETLINK, RTM_NEWLINK, Link, LinkMonitor, parse_messages
+
+UP = IFF_UP | IFF_RUNNING
+
+
+def attribute(kind: int, value: bytes) -> bytes:
+    data = struct.pack("=HH", 4 + len(value), kind) + value
+    return data + b"\x00" * (-len(data) % 4)
+
+
+def link_message(kind: int, index: int, name: str, mac: bytes, flags: int = UP, seq: int = 0,
+                 type: int = ARPHRD_ETHER) -> bytes:
+    payload = struct.pack("=BxHiII", 0, type, index, flags, 0) + attribute(3, name.encode() + b"\x00") + \
+        attribute(1, mac)
+    return struct.pack("=IHHII", 16 + len(payload), kind, 0, seq, 0) + payload
+
+
+def done_message(seq: int) -> bytes:
+    return struct.pack("=IHHII", 20, NLMSG_DONE, 2, seq, 0) + b"\x00" * 4
+
+
+class ParseTests(unittest.TestCase):
+    def test_parse_links(self):
+        data = link_message(RTM_NEWLINK, 2, "eth0", b"\x02\x00\x00\x00\x00\x01") + \
+            link_message(RTM_DELLINK, 3, "swp12", b"\x02\x00\x00\x00\x00\x02", flags=0) + done_message(5)
+        messages = parse_messages(data)
+        self.assertEqual([(kind, seq) for kind, seq, _ in messages],
+                         [(RTM_NEWLINK, 0), (RTM_DELLINK, 0), (NLMSG_DONE, 5)])
+        link = messages[0][2]
+        self.assertEqual((link.index, link.name, link.mac), (2, "eth0", b"\x02\x00\x00\x00\x00\x01"))
+        self.assertTrue(link.up)
+        self.assertTrue(link.ethernet)
+        self.assertFalse(messages[1][2].up)
+
+    def test_parse_error(self):
+        data = struct.pack("=IHHII", 36, NLMSG_ERROR, 0, 1, 0) + struct.pack("=i", -1) + b"\x00" * 16
+        self.assertEqual(parse_messages(data), [(NLMSG_ERROR, 1, -1)])
+
+    def test_truncated(self):
+        data = link_message(RTM_NEWLINK, 2, "eth0", b"\x02\x00\x00\x00\x00\x01")
+        self.assertEqual(parse_messages(data[:-4]), [])
+
+    def test_loopback_is_not_ethernet(self):
+        self.assertFalse(Link(1, "lo", b"\x00" * 6, ARPHRD_ETHER, UP | IFF_LOOPBACK).ethernet)
+        self.assertFalse(Link(5, "tun0", b"", 65534, UP).ethernet)
+
+
+class LinkMonitorTests(unittest.TestCase):
+    def setUp(self):
+        # a datagram socket pair stands in for the netlink socket
+        sock, self.kernel = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.monitor = LinkMonitor(sock)
+
+    def tearDown(self):
+        self.monitor.close()
+        self.kernel.close()
+
+    def test_dump(self):
+        # the reply to the first request (sequence number 1), with a notification in between
+        self.kernel.send(link_message(RTM_NEWLINK, 2, "eth0", b"\x02\x00\x00\x00\x00\x01", seq=1) +
+                         link_message(RTM_NEWLINK, 3, "eth1", b"\x02\x00\x00\x00\x00\x02", seq=1))
+        self.kernel.send(link_message(RTM_NEWLINK, 4, "eth2", b"\x02\x00\x00\x00\x00\x03"))
+        self.kernel.send(done_message(1))
+        changes = self.monitor.dump(timeout=1.0)
+
+        request = self.kernel.recv(4096)
+        self.assertEqual(struct.unpack_from("=IHHII", request)[1:4], (RTM_GETLINK, 0x301, 1))
+        self.assertEqual([(old, new.name) for old, new in changes], [(None, "eth0"), (None, "eth1"), (None, "eth2")])
+        self.assertEqual(self.monitor.by_name("eth1").index, 3)
+        self.assertIsNone(self.monitor.by_name("eth9"))
+
+    def test_dump_replaces_cache(self):
+        self.kernel.send(link_message(RTM_NEWLINK, 2, "eth0", b"\x02\x00\x00\x00\x00\x01", seq=1) + done_message(1))
+        self.monitor.dump(timeout=1.0)
+        self.kernel.send(link_message(RTM_NEWLINK, 3, "eth1", b"\x02\x00\x00\x00\x00\x02", seq=2) + done_message(2))
+        changes = self.monitor.dump(timeout=1.0)
+        self.assertEqual([(old and old.name, new and new.name) for old, new in changes],
+                         [("eth0", None), (None, "eth1")])
+
+    def test_dump_error(self):
+        self.kernel.send(struct.pack("=IHHII", 36, NLMSG_ERROR, 0, 1, 0) + struct.pack("=i", -1) + b"\x00" * 16)
+        with self.assertRaises(OSError):
+            self.monitor.dump(timeout=1.0)
+
+    def test_dump_timeout(self):
+        with self.assertRaises(OSError):
+            self.monitor.dump(timeout=0.01)
+
+    def test_notifications(self):
+        mac = b"\x02\x00\x00\x00\x00\x01"
+        self.assertEqual(self.monitor.read(), [])
+        self.kernel.send(link_message(RTM_NEWLINK, 2, "eth0", mac, flags=IFF_UP))
+        self.kernel.send(link_message(RTM_NEWLINK, 2, "eth0", mac, flags=IFF_UP))
+        self.kernel.send(link_message(RTM_NEWLINK, 2, "eth0", mac))
+        changes = self.monitor.read()
+        # the repeated notification is not a change
+        self.assertEqual(len(changes), 2)
+        self.assertIsNone(changes[0][0])
+        self.assertFalse(changes[0][1].up)
+        self.assertIs(changes[1][0], changes[0][1])
+        self.assertTrue(changes[1][1].up)
+
+        self.kernel.send(link_message(RTM_DELLINK, 2, "eth0", mac))
+        self.kernel.send(link_message(RTM_DELLINK, 7, "eth9", mac))
+        changes = self.monitor.read()
+        self.assertEqual(len(changes), 1)
+        self.assertEqual((changes[0][0].name, changes[0][1]), ("eth0", None))
+        self.assertEqual(self.monitor.links, {})
@@ -38,3 +38,8 @@ class OrganizationallySpecificTLVTests(unittest.TestCase):
         self.assertEqual(tlv.value, b"0118 999 88199 9119 725 3")
         self.assertEqual(tlv.oui, b"\xAA\xBB\xCC")
         self.assertEqual(tlv.subtype, b"\x1A")
+
+    def test_max_length_roundtrip(self):
+        tlv = OrganizationallySpecificTLV(b"\x00\x12\x0f", b"\x01", "x" * 507)
+        self.assertEqual(bytes(tlv)[:2], b"\xff\xff")
+        self.assertEqual(OrganizationallySpecificTLV.from_bytes(bytes(tlv)).value, b"x" * 507)
@@ -0,0 +1,115 @@
+import os
+import struct
+import tempfile
+import unittest
+from lldp.pcap import PCAPNG_EPB, read_capture, lldp_records, decode_lldpdus, capture_format, pcapng_blocks
+from lldp.traffic import TrafficMix
+
+
+def pcapng_block(block_type, body, byteorder="<"):
+    body += b"\x00" * (-len(body) % 4)
+    length = len(body) + 12
+    return struct.pack(byteorder + "II", block_type, length) + body + struct.pack(byteorder + "I", length)
+
+
+def pcapng_option(code, value, byteorder="<"):
+    return struct.pack(byteorder + "HH", code, len(value)) + value + b"\x00" * (-len(value) % 4)
+
+
+def write_pcapng(path, interfaces, packets, byteorder="<"):
+    """interfaces: list of (name, tsresol), packets: list of (interface id, timestamp, frame)"""
+    with open(path, "wb") as f:
+        f.write(pcapng_block(0x0a0d0d0a, struct.pack(byteorder + "IHHq", 0x1a2b3c4d, 1, 0, -1), byteorder))
+        for name, tsresol in interfaces:
+            options = pcapng_option(2, name.encode(), byteorder)
+            if tsresol is not None:
+                options += pcapng_option(9, bytes([tsresol]), byteorder)
+            options += pcapng_option(0, b"", byteorder)
+            f.write(pcapng_block(1, struct.pack(byteorder + "HHI", 1, 0, 65535) + options, byteorder))
+        for interface_id, timestamp, frame in packets:
+            body = struct.pack(byteorder + "IIIII", interface_id, timestamp >> 32, timestamp & 0xffffffff,
+                               len(frame), len(frame)) + frame
+            f.write(pcapng_block(6, body, byteorder))
+
+
+def write_pcap(path, packets, byteorder="<"):
+    """packets: list of (timestamp in us, frame)"""
+    with open(path, "wb") as f:
+        f.write(struct.pack(byteorder + "IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1))
+        for timestamp, frame in packets:
+            f.write(struct.pack(byteorder + "IIII", timestamp // 1000000, timestamp % 1000000, len(frame), len(frame)))
+            f.write(frame)
+
+
+class CaptureReaderTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "capture")
+        self.mix = TrafficMix(b"\x02\xaa\xbb\xcc\xdd\xee", neighbors=3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pcapng(self):
+        for byteorder in ("<", ">"):
+            write_pcapng(self.path, [("eth0", None), ("eth1", 9)],
+                         [(0, 1500000000000001, self.mix.valid[0]), (1, 1500000000000000002, self.mix.valid[1])],
+                         byteorder)
+            records = list(read_capture(self.path))
+            self.assertEqual(len(records), 2)
+            self.assertEqual(records[0][:2], (1500000000000001000, "eth0"))
+            self.assertEqual(records[1][:2], (1500000000000000002, "eth1"))
+            self.assertIsInstance(records[1][2], memoryview)
+            self.assertEqual(bytes(records[1][2]), self.mix.valid[1])
+            del records
+
+    def test_pcap(self):
+        for byteorder in ("<", ">"):
+            write_pcap(self.path, [(1000000, self.mix.valid[0]), (2500000, self.mix.non_lldp[0])], byteorder)
+            records = [(t, i, bytes(f)) for t, i, f in read_capture(self.path)]
+            self.assertEqual(records, [(1000000000, None, self.mix.valid[0]), (2500000000, None, self.mix.non_lldp[0])])
+
+    def test_truncated(self):
+        write_pcap(self.path, [(0, self.mix.valid[0]), (1, self.mix.valid[1])])
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 5)
+        self.assertEqual(len(list(read_capture(self.path))), 1)
+
+    def test_unknown_format(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\x00" * 64)
+        with self.assertRaises(ValueError):
+            list(read_capture(self.path))
+        with self.assertRaises(ValueError):
+            capture_format(b"")
+
+    def test_invalid_interface_id(self):
+        write_pcapng(self.path, [("eth0", None)], [(0, 1, self.mix.valid[0]), (1, 2, self.mix.valid[1])])
+        records = read_capture(self.path)
+        next(records)
+        with self.assertRaises(ValueError):
+            next(records)
+
+    def test_oversized_captured_length(self):
+        frames = [self.mix.valid[0], self.mix.valid[1]]
+        write_pcapng(self.path, [("eth0", None)], [(0, i, frame) for i, frame in enumerate(frames)])
+        with open(self.path, "rb") as f:
+            data = bytearray(f.read())
+        offset = next(offset for offset, block_type, _, _ in pcapng_blocks(data) if block_type == PCAPNG_EPB)
+        struct.pack_into("<I", data, offset + 20, 0xffff)
+        with open(self.path, "wb") as f:
+            f.write(data)
+        records = [bytes(frame) for _, _, frame in read_capture(self.path)]
+        # the first frame ends with its block, the second one is read as usual
+        self.assertEqual(records[0][:len(frames[0])], frames[0])
+        self.assertLess(len(records[0]), len(frames[0]) + 4)
+        self.assertEqual(records[1], frames[1])
+
+    def test_pipeline(self):
+        frames = self.mix.valid + self.mix.non_lldp + self.mix.malformed + self.mix.own
+        write_pcapng(self.path, [("eth0", None)], [(0, i, frame) for i, frame in enumerate(frames)])
+        errors = []
+        lldpdus = list(decode_lldpdus(lldp_records(read_capture(self.path), self.mix.local_mac), errors))
+        self.assertEqual(len(lldpdus), len(self.mix.valid))
+        self.assertEqual(len(errors), len(self.mix.malformed))
+        self.assertTrue(all(lldpdu.complete() for _, _, lldpdu in lldpdus))
@@ -80,3 +80,25 @@ class PortIdTLVTests(unittest.TestCase):
     def test_load_invalid_ipv6(self):
         with self.assertRaises(ValueError):
             PortIdTLV.from_bytes(b"\x04\x06\x04\x02\xC0\x02\x00\x01")
+
+    def test_max_length_roundtrip(self):
+        tlv = PortIdTLV(subtype=PortIdTLV.Subtype.LOCAL, id="p" * 255)
+        self.assertEqual(bytes(tlv)[:3], b"\x05\x00\x07")
+        self.assertEqual(PortIdTLV.from_bytes(bytes(tlv)).value, "p" * 255)
+
+    def test_portid_address_setter(self):
+        tlv = PortIdTLV(PortIdTLV.Subtype.NETWORK_ADDRESS, ip_address("192.0.2.1"))
+        tlv.value = "2001:db8::2"
+        self.assertEqual(tlv.value, ip_address("2001:db8::2"))
+        self.assertEqual(tlv.family, 6)
+
+    def test_portid_lazy_address(self):
+        data = b"\x04\x12\x04\x02" + ip_address("2001:db8::1").packed
+        tlv = PortIdTLV.from_bytes(data)
+        self.assertEqual(tlv.family, 6)
+        self.assertEqual(bytes(tlv), data)
+        self.assertEqual(len(tlv), 18)
+        self.assertIsNone(tlv._address)
+        self.assertEqual(tlv.value, ip_address("2001:db8::1"))
+        self.assertEqual(tlv, PortIdTLV(PortIdTLV.Subtype.NETWORK_ADDRESS, ip_address("2001:db8::1")))
+        self.assertEqual(len({tlv, PortIdTLV.from_bytes(data)}), 1)
@@ -0,0 +1,56 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from lldp import LLDPAgent
+from lldp.profiling import SamplingProfiler, agent_stages, profile_agent
+from test.agent import MockLogger
+
+
+def busy_wait(event):
+    while not event.is_set():
+        sum(range(1000))
+
+
+class ProfilingTests(unittest.TestCase):
+    def test_sampler_collapsed_output(self):
+        done = threading.Event()
+        worker = threading.Thread(target=busy_wait, args=(done,))
+        worker.start()
+        sampler = SamplingProfiler(thread_id=worker.ident, interval=0.001,
+                                   stages={busy_wait.__code__: "busy"}).start()
+        done.wait(0.2)
+        sampler.stop()
+        done.set()
+        worker.join()
+
+        self.assertGreater(sampler.stage_totals()["busy"], 0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.collapsed")
+            sampler.write_collapsed(path)
+            with open(path) as f:
+                for line in f:
+                    stack, count = line.rsplit(" ", 1)
+                    self.assertTrue(stack.startswith("busy;"))
+                    self.assertGreater(int(count), 0)
+
+    def test_agent_stages(self):
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", sock=socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM),
+                          logger=MockLogger())
+        stages = agent_stages(agent)
+        self.assertIn("announce", stages.values())
+        self.assertIn("decode;ChassisIdTLV", stages.values())
+        self.assertIn("log", stages.values())
+        agent.socket.close()
+
+    def test_profile_agent(self):
+        agent_end, peer_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", interval=0.05, sock=agent_end, logger=MockLogger())
+        with tempfile.TemporaryDirectory() as directory:
+            prefix = os.path.join(directory, "profile")
+            profile_agent(agent, 0.2, prefix)
+            self.assertTrue(os.path.getsize(prefix + ".pstats") > 0)
+            self.assertTrue(os.path.exists(prefix + ".collapsed"))
+        self.assertFalse(agent.running)
+        peer_end.close()
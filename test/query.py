@@ -0,0 +1,181 @@
+import unittest
+from ipaddress import ip_address
+from lldp import LLDPDU
+from lldp.neighbors import NeighborTable
+# aliased, `from .query import *` in the package would replace the test module by the function
+from lldp.query import NeighborIndex, SORT_KEYS, attributes_of, query as run_query
+from lldp.tlv import *
+from test.util import make_lldpdu
+
+Capability = SystemCapabilitiesTLV.Capability
+
+
+def ports(result):
+    return [neighbor.lldpdu[1].value for neighbor in result.neighbors]
+
+
+class NeighborIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.table = NeighborTable(indexed=True)
+        self.table.update(make_lldpdu("core", "1", "core-1", "10.0.0.1", Capability.ROUTER | Capability.BRIDGE,
+                                      Capability.ROUTER), "eth0", now=0.0)
+        self.table.update(make_lldpdu("core", "2", "core-1", "10.0.0.1", Capability.ROUTER | Capability.BRIDGE,
+                                      Capability.BRIDGE), "eth1", now=0.0)
+        self.table.update(make_lldpdu("access", "3", "access-1", "2001:db8::3", Capability.BRIDGE,
+                                      Capability.BRIDGE), "eth1", now=0.0)
+        self.table.update(make_lldpdu("phone", "4", ttl=10), "eth2", now=0.0)
+
+    def test_attributes(self):
+        neighbor = self.table.get(NeighborTable.key_of(make_lldpdu("core", "1")))
+        self.assertEqual(neighbor.attributes, attributes_of(neighbor))
+        self.assertEqual(neighbor.attributes, ("eth0", (ChassisIdTLV.Subtype.LOCAL, "core"), "core-1",
+                                               (ip_address("10.0.0.1").packed,), Capability.ROUTER | Capability.BRIDGE,
+                                               Capability.ROUTER))
+
+    def test_filters(self):
+        view = self.table.publish()
+        self.assertEqual(sorted(ports(run_query(view, interface="eth1"))), ["2", "3"])
+        self.assertEqual(sorted(ports(run_query(view, chassis_id=(ChassisIdTLV.Subtype.LOCAL, "core")))), ["1", "2"])
+        # the same value with another subtype is another chassis
+        self.assertEqual(run_query(view, chassis_id=(ChassisIdTLV.Subtype.INTERFACE_NAME, "core")).total, 0)
+        self.assertEqual(sorted(ports(run_query(view, chassis_id=ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "core")))),
+                         ["1", "2"])
+        self.assertEqual(sorted(ports(run_query(view, system_name="core-1"))), ["1", "2"])
+        self.assertEqual(ports(run_query(view, system_name="access-1")), ["3"])
+        self.assertEqual(sorted(ports(run_query(view, management_address="10.0.0.1"))), ["1", "2"])
+        self.assertEqual(ports(run_query(view, management_address=ip_address("2001:db8::3"))), ["3"])
+        self.assertEqual(ports(run_query(view, management_address=ManagementAddressTLV(ip_address("2001:db8::3")))),
+                         ["3"])
+        self.assertEqual(ports(run_query(view, enabled=Capability.ROUTER)), ["1"])
+        self.assertEqual(sorted(ports(run_query(view, supported=Capability.ROUTER))), ["1", "2"])
+        self.assertEqual(sorted(ports(run_query(view, supported=Capability.BRIDGE, enabled=Capability.BRIDGE))),
+                         ["2", "3"])
+        self.assertEqual(ports(run_query(view, supported=Capability.ROUTER | Capability.BRIDGE, interface="eth1")),
+                         ["2"])
+        on_eth0 = run_query(view, system_name="core-1", where=lambda neighbor: neighbor.interface == "eth0")
+        self.assertEqual(ports(on_eth0), ["1"])
+        self.assertEqual(run_query(view, system_name="nobody"), (0, []))
+        self.assertEqual(run_query(view, enabled=Capability.TELEPHONE, interface="eth1"), (0, []))
+        self.assertEqual(run_query(view).total, 4)
+
+    def test_unindexed(self):
+        unindexed = NeighborTable()
+        for neighbor in self.table:
+            unindexed.update(neighbor.lldpdu, neighbor.interface, now=0.0)
+        indexed, scanned = self.table.publish(), unindexed.publish()
+        self.assertIsNone(scanned.index)
+        for filters in ({"interface": "eth1"}, {"system_name": "core-1"}, {"management_address": "10.0.0.1"},
+                        {"supported": Capability.BRIDGE, "enabled": Capability.BRIDGE}, {}):
+            self.assertEqual(sorted(ports(run_query(scanned, **filters))), sorted(ports(run_query(indexed, **filters))))
+
+        unindexed.add_index()
+        self.assertEqual(len(unindexed.index), len(self.table.index))
+        self.assertEqual(ports(run_query(unindexed.publish(), enabled=Capability.ROUTER)), ["1"])
+
+    def test_changes(self):
+        view = self.table.publish()
+        # the access switch becomes a router and changes its name
+        self.table.update(make_lldpdu("access", "3", "access-2", "2001:db8::3", Capability.BRIDGE | Capability.ROUTER,
+                                      Capability.ROUTER), "eth1", now=1.0)
+        self.table.update(make_lldpdu("core", "1", ttl=0), "eth0", now=1.0)
+        self.table.expire(now=20.0)
+        current = self.table.publish()
+        self.assertEqual(ports(run_query(current, enabled=Capability.ROUTER)), ["3"])
+        self.assertEqual(ports(run_query(current, system_name="access-2")), ["3"])
+        self.assertEqual(run_query(current, system_name="access-1").total, 0)
+        self.assertEqual(ports(run_query(current, system_name="core-1")), ["2"])
+        self.assertEqual(run_query(current, interface="eth2").total, 0)
+
+        # the earlier view and its index are unchanged
+        self.assertEqual(ports(run_query(view, enabled=Capability.ROUTER)), ["1"])
+        self.assertEqual(ports(run_query(view, system_name="access-1")), ["3"])
+        self.assertEqual(ports(run_query(view, interface="eth2")), ["4"])
+
+        for neighbor in list(self.table):
+            self.table.remove(neighbor.key)
+        self.assertEqual(len(self.table.index), 0)
+        self.assertEqual(run_query(self.table.publish(), supported=Capability.BRIDGE).total, 0)
+
+    def test_network_address_chassis(self):
+        table = NeighborTable(indexed=True)
+        address = ChassisIdTLV.from_bytes(bytes(ChassisIdTLV(ChassisIdTLV.Subtype.NETWORK_ADDRESS,
+                                                             ip_address("192.0.2.1"))))
+        table.update(LLDPDU(address, PortIdTLV(PortIdTLV.Subtype.LOCAL, "1"), TTLTLV(120), EndOfLLDPDUTLV()), "eth0",
+                     now=0.0)
+        # indexed by the packed address, without creating the address object
+        self.assertIsNone(address._address)
+        view = table.publish()
+        for chassis_id in ((ChassisIdTLV.Subtype.NETWORK_ADDRESS, "192.0.2.1"),
+                           ChassisIdTLV(ChassisIdTLV.Subtype.NETWORK_ADDRESS, ip_address("192.0.2.1"))):
+            self.assertEqual(ports(run_query(view, chassis_id=chassis_id)), ["1"])
+        self.assertEqual(run_query(view, chassis_id=(ChassisIdTLV.Subtype.NETWORK_ADDRESS, "192.0.2.2")).total, 0)
+
+    def test_insert(self):
+        neighbor = self.table.get(NeighborTable.key_of(make_lldpdu("core", "1")))
+        table = NeighborTable(indexed=True)
+        table.insert(neighbor)
+        table.insert(neighbor)
+        self.assertEqual(ports(run_query(table.publish(), enabled=Capability.ROUTER)), ["1"])
+        self.assertEqual(len(table.index), len(NeighborIndex.FIELDS) + 1)
+
+
+class QueryTests(unittest.TestCase):
+    def setUp(self):
+        self.table = NeighborTable(indexed=True)
+        for i in range(200):
+            self.table.update(make_lldpdu("chassis-{}".format(i % 50), "{:03d}".format(i), "sw-{:03d}".format(199 - i),
+                                          "10.0.{}.{}".format(i // 100, i % 100), Capability.BRIDGE | Capability.ROUTER,
+                                          Capability.ROUTER if i % 20 == 0 else Capability.BRIDGE),
+                              "eth{}".format(i % 2), now=float(i))
+        self.view = self.table.publish()
+
+    def test_unsorted_pages(self):
+        everything = run_query(self.view)
+        self.assertEqual(everything.total, 200)
+        pages = [run_query(self.view, offset=offset, limit=30).neighbors for offset in range(0, 200, 30)]
+        self.assertEqual([n for page in pages for n in page], everything.neighbors)
+        self.assertEqual(run_query(self.view, offset=300).neighbors, [])
+        self.assertEqual(run_query(self.view, limit=0), (200, []))
+
+    def test_sorted(self):
+        for sort in SORT_KEYS:
+            for reverse in (False, True):
+                for filters in ({}, {"enabled": Capability.BRIDGE}, {"enabled": Capability.ROUTER},
+                                {"where": lambda neighbor: neighbor.ttl > 0}):
+                    expected = sorted(run_query(self.view, **filters).neighbors, key=SORT_KEYS[sort], reverse=reverse)
+                    result = run_query(self.view, sort=sort, reverse=reverse, **filters)
+                    self.assertEqual(result.neighbors, expected)
+                    pages = [run_query(self.view, sort=sort, reverse=reverse, offset=offset, limit=7, **filters)
+                             for offset in range(0, result.total, 7)]
+                    self.assertEqual([n for page in pages for n in page.neighbors], expected)
+                    self.assertTrue(all(page.total == result.total for page in pages))
+
+        first = run_query(self.view, sort="system_name", limit=3)
+        self.assertEqual([n.attributes.system_name for n in first.neighbors], ["sw-000", "sw-001", "sw-002"])
+        last = run_query(self.view, sort="management_address", reverse=True, enabled=Capability.ROUTER, limit=1)
+        self.assertEqual((last.total, ports(last)), (10, ["180"]))
+
+    def test_several_views(self):
+        other = NeighborTable(indexed=True)
+        other.update(make_lldpdu("chassis-x", "900", "sw-0995", supported=Capability.ROUTER,
+                                 enabled=Capability.ROUTER), "eth9", now=0.0)
+        views = [self.view, other.publish(), NeighborTable().publish()]
+        result = run_query(views, enabled=Capability.ROUTER, sort="system_name")
+        self.assertEqual(result.total, 11)
+        names = [n.attributes.system_name for n in result.neighbors]
+        self.assertEqual(names, sorted(names))
+        self.assertIn("sw-0995", names)
+        self.assertEqual(run_query(views, sort="interface", reverse=True, limit=1).neighbors[0].interface, "eth9")
+        self.assertEqual(run_query([]), (0, []))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            run_query(self.view, sort="color")
+        with self.assertRaises(ValueError):
+            run_query(self.view, offset=-1)
+        with self.assertRaises(ValueError):
+            run_query(self.view, limit=-1)
+        with self.assertRaises(ValueError):
+            run_query(self.view, management_address="not an address")
+        with self.assertRaises(ValueError):
+            run_query(self.view, chassis_id="chassis-1")
@@ -0,0 +1,136 @@
+import gc
+import random
+import unittest
+from unittest import mock
+from lldp import LLDPAgent
+from lldp.agent import STRINGS_SWEEP_INTERVAL
+from lldp.scheduler import Scheduler
+from lldp.tlv.intern import StringInterner
+from lldp.traffic import neighbor_lldpdu
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class NullSocket:
+    def send(self, data):
+        pass
+
+    def close(self):
+        pass
+
+
+class SchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = Scheduler(clock=self.clock, random=random.Random(1))
+        self.calls = []
+
+    def test_timeout(self):
+        self.assertIsNone(self.scheduler.timeout())
+        self.assertEqual(self.scheduler.timeout(maximum=5.0), 5.0)
+        self.scheduler.call_later(2.5, self.calls.append, "a")
+        self.assertEqual(self.scheduler.timeout(), 2.5)
+        self.assertEqual(self.scheduler.timeout(maximum=1.0), 1.0)
+        self.clock.now += 3
+        self.assertEqual(self.scheduler.timeout(), 0.0)
+
+    def test_one_shot_and_cancel(self):
+        self.scheduler.call_at(101.0, self.calls.append, "a")
+        b = self.scheduler.call_at(102.0, self.calls.append, "b")
+        self.scheduler.call_at(103.0, self.calls.append, "c")
+        self.scheduler.cancel(b)
+        self.assertEqual(len(self.scheduler), 2)
+        self.assertEqual(self.scheduler.run_due(), 0)
+        self.assertEqual(self.scheduler.run_due(now=105.0), 2)
+        self.assertEqual(self.calls, ["a", "c"])
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertIsNone(self.scheduler.next_deadline())
+
+    def test_periodic_does_not_drift(self):
+        timer = self.scheduler.call_every(1.0, self.calls.append, "tick")
+        self.assertEqual(timer.deadline, 101.0)
+        # run late every time, the deadlines stay on the grid
+        for now in (101.3, 102.3, 103.3):
+            self.scheduler.run_due(now)
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(timer.deadline, 104.0)
+        # missed periods are skipped instead of run in a burst
+        self.assertEqual(self.scheduler.run_due(110.5), 1)
+        self.assertEqual(timer.deadline, 111.0)
+
+    def test_jitter_and_stagger(self):
+        timers = [self.scheduler.call_every(30.0, self.calls.append, port, stagger=True, jitter=1.0)
+                  for port in range(5000)]
+        deadlines = sorted(timer.deadline for timer in timers)
+        self.assertGreaterEqual(deadlines[0], 130.0)
+        self.assertLess(deadlines[-1], 161.0)
+        # roughly uniform: no second of the period gets more than twice its share
+        per_second = [0] * 31
+        for deadline in deadlines:
+            per_second[int(deadline - 130.0)] += 1
+        self.assertLess(max(per_second), 2 * 5000 / 30)
+
+        self.assertEqual(self.scheduler.run_due(now=161.0), 5000)
+        for timer in timers:
+            self.assertGreaterEqual(timer.deadline - timer.base, 0.0)
+            self.assertLess(timer.deadline - timer.base, 1.0)
+
+    def test_callbacks_cancel_and_reschedule(self):
+        other = self.scheduler.call_at(101.0, self.calls.append, "other")
+        periodic = None
+
+        def first():
+            self.calls.append("first")
+            self.scheduler.cancel(other)
+            self.scheduler.reschedule(periodic, 150.0)
+
+        self.scheduler.call_at(100.5, first)
+        periodic = self.scheduler.call_every(0.5, self.calls.append, "periodic")
+        self.scheduler.run_due(now=101.0)
+        self.assertEqual(self.calls, ["first"])
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertEqual(self.scheduler.next_deadline(), 150.0)
+
+
+class AgentSchedulingTests(unittest.TestCase):
+    def test_expiry_is_scheduled(self):
+        clock = FakeClock()
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", sock=NullSocket())
+        agent.scheduler = Scheduler(clock=clock)
+        agent.neighbors.update(neighbor_lldpdu(1, ttl=10), now=clock.now)
+        agent.neighbors.update(neighbor_lldpdu(2, ttl=20), now=clock.now)
+        agent.expire()
+        self.assertEqual(agent.scheduler.next_deadline(), 110.0)
+
+        clock.now = 110.0
+        agent.scheduler.run_due()
+        self.assertEqual(len(agent.neighbors), 1)
+        self.assertEqual(agent.scheduler.next_deadline(), 120.0)
+        self.assertEqual(agent.metrics.neighbors.value, 1)
+
+    def test_strings_are_swept_periodically(self):
+        clock = FakeClock()
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", sock=NullSocket())
+        agent.scheduler = Scheduler(clock=clock)
+        interner = StringInterner(max_entries=4)
+        with mock.patch("lldp.agent.STRINGS", interner):
+            agent.start()
+            # a full table of strings nobody refers to anymore, e.g. of neighbors that shut down
+            for i in range(4):
+                interner.decode("gone {}".format(i).encode())
+            gc.collect()
+            interner.decode(b"new")
+            self.assertEqual(len(interner), 4)
+
+            clock.now += STRINGS_SWEEP_INTERVAL
+            agent.scheduler.run_due()
+            self.assertEqual(len(interner), 0)
+            self.assertEqual(agent.metrics.intern_entries.value, 0)
+            self.assertIs(interner.decode(b"new"), interner.decode(b"new"))
+            agent.close(shutdown=False)
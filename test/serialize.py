@@ -0,0 +1,76 @@
+import pickle
+import unittest
+from lldp import LLDPDU
+from lldp.neighbors import Neighbor, NeighborTable
+from lldp.serialize import batch_records, decode_neighbor, decode_neighbors, encode_neighbor, encode_neighbors
+from lldp.traffic import neighbor_lldpdu
+
+
+def make_neighbor(index: int, now: float = 100.0) -> Neighbor:
+    lldpdu = neighbor_lldpdu(index)
+    key = bytes(lldpdu[0]) + bytes(lldpdu[1])
+    neighbor = Neighbor(key, lldpdu, "eth{}".format(index % 4), lldpdu[2].value, now)
+    neighbor.last_seen = now + 5
+    return neighbor
+
+
+class SerializeTests(unittest.TestCase):
+    def assertNeighborEqual(self, first, second):
+        self.assertEqual(first.key, second.key)
+        self.assertEqual(first.interface, second.interface)
+        self.assertEqual(first.ttl, second.ttl)
+        self.assertEqual(first.deadline, second.deadline)
+        self.assertEqual(first.first_seen, second.first_seen)
+        self.assertEqual(first.last_seen, second.last_seen)
+        self.assertEqual(bytes(first.lldpdu), bytes(second.lldpdu))
+
+    def test_neighbor_roundtrip(self):
+        neighbor = make_neighbor(3)
+        self.assertNeighborEqual(decode_neighbor(encode_neighbor(neighbor)), neighbor)
+
+    def test_batch_roundtrip(self):
+        neighbors = [make_neighbor(i, now=float(i)) for i in range(50)]
+        decoded = decode_neighbors(encode_neighbors(neighbors))
+        self.assertEqual(len(decoded), 50)
+        for first, second in zip(decoded, neighbors):
+            self.assertNeighborEqual(first, second)
+        self.assertEqual(decode_neighbors(encode_neighbors([])), [])
+
+    def test_records_without_decoding(self):
+        neighbors = [make_neighbor(i) for i in range(5)]
+        data = encode_neighbors(neighbors)
+        records = list(batch_records(data))
+        self.assertEqual(len(records), 5)
+        key, interface, ttl, deadline, first_seen, last_seen, raw = records[2]
+        self.assertEqual(bytes(key), neighbors[2].key)
+        self.assertEqual(interface, "eth2")
+        self.assertEqual(ttl, 120)
+        self.assertEqual(deadline, 220.0)
+        self.assertEqual(bytes(raw), bytes(neighbors[2].lldpdu))
+        self.assertIsInstance(raw, memoryview)
+
+    def test_invalid(self):
+        data = encode_neighbors([make_neighbor(1)])
+        with self.assertRaises(ValueError):
+            decode_neighbors(b"XXXX" + data[4:])
+        with self.assertRaises(ValueError):
+            decode_neighbors(data[:-3])
+        with self.assertRaises(ValueError):
+            decode_neighbors(data[:4])
+
+    def test_pickle(self):
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            lldpdu = neighbor_lldpdu(7)
+            self.assertEqual(bytes(pickle.loads(pickle.dumps(lldpdu, protocol))), bytes(lldpdu))
+            self.assertEqual(len(pickle.loads(pickle.dumps(LLDPDU(), protocol))), 0)
+
+            neighbor = make_neighbor(7)
+            self.assertNeighborEqual(pickle.loads(pickle.dumps(neighbor, protocol)), neighbor)
+
+            table = NeighborTable()
+            for i in range(10):
+                table.update(neighbor_lldpdu(i), "eth0", now=50.0)
+            copy = pickle.loads(pickle.dumps(table, protocol))
+            self.assertEqual(len(copy), 10)
+            for neighbor in table:
+                self.assertNeighborEqual(copy.get(neighbor.key), neighbor)
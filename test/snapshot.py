@@ -0,0 +1,104 @@
+import os
+import tempfile
+import time
+import unittest
+from lldp import LLDPAgent
+from lldp.neighbors import NeighborTable
+from lldp.snapshot import NeighborSnapshot, load, save
+from lldp.traffic import neighbor_lldpdu
+from test.agent import MockLogger
+
+
+class NullSocket:
+    def close(self):
+        pass
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "neighbors.snapshot")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_table(self, count=10):
+        table = NeighborTable()
+        now = time.monotonic()
+        for i in range(count):
+            # neighbors 0, 2, 4, ... expire one second from now, the others in two minutes
+            table.update(neighbor_lldpdu(i, ttl=1 if i % 2 == 0 else 120), "eth{}".format(i % 2), now=now)
+        return table
+
+    def test_save_and_restore(self):
+        table = self.make_table()
+        self.assertEqual(save(table, self.path), 10)
+        self.assertEqual(os.listdir(self.directory.name), ["neighbors.snapshot"])
+
+        restored = NeighborTable()
+        self.assertEqual(load(restored, self.path), 10)
+        for neighbor in table:
+            copy = restored.get(neighbor.key)
+            self.assertEqual(bytes(copy.lldpdu), bytes(neighbor.lldpdu))
+            self.assertEqual(copy.interface, neighbor.interface)
+            self.assertAlmostEqual(copy.deadline, neighbor.deadline, places=2)
+            self.assertAlmostEqual(copy.first_seen, neighbor.first_seen, places=2)
+
+    def test_expired_entries_are_skipped(self):
+        table = self.make_table()
+        save(table, self.path)
+        with NeighborSnapshot(self.path, now=time.time() + 60) as snapshot:
+            self.assertEqual(len(snapshot), 5)
+            self.assertEqual(snapshot.expired, 5)
+            # entries are accessible without decoding the LLDPDUs
+            self.assertEqual({record[1] for record in snapshot}, {"eth1"})
+            self.assertEqual(snapshot[0][2], 120)
+
+    def test_close_with_held_entries(self):
+        table = self.make_table()
+        save(table, self.path)
+        snapshot = NeighborSnapshot(self.path)
+        record = snapshot[0]
+        snapshot.close()
+        snapshot.close()
+        self.assertIn(bytes(record[0]), table)
+
+        with NeighborSnapshot(self.path) as snapshot:
+            records = [record for record in snapshot]
+        self.assertEqual(len(records), 10)
+
+    def test_restore_keeps_newer_entries(self):
+        save(self.make_table(), self.path)
+        table = NeighborTable()
+        neighbor = table.update(neighbor_lldpdu(1), "eth7")
+        self.assertEqual(load(table, self.path), 9)
+        self.assertIs(table.get(neighbor.key), neighbor)
+
+    def test_invalid(self):
+        with open(self.path, "wb") as f:
+            f.write(b"LLDN")
+        with self.assertRaises(ValueError):
+            NeighborSnapshot(self.path)
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot at all")
+        with self.assertRaises(ValueError):
+            NeighborSnapshot(self.path)
+
+    def test_agent_warm_restart(self):
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", sock=NullSocket(), logger=MockLogger(), snapshot=self.path)
+        self.assertEqual(agent.restore_snapshot(), 0)
+        agent.neighbors = self.make_table()
+        agent.save_snapshot()
+
+        restarted = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", sock=NullSocket(), logger=MockLogger(), snapshot=self.path)
+        self.assertEqual(restarted.restore_snapshot(), 10)
+        self.assertEqual(len(restarted.neighbors), 10)
+        self.assertEqual(restarted.metrics.neighbors.value, 10)
+
+    def test_agent_ignores_corrupt_snapshot(self):
+        with open(self.path, "wb") as f:
+            f.write(b"garbage")
+        logger = MockLogger()
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", sock=NullSocket(), logger=logger, snapshot=self.path)
+        self.assertEqual(agent.restore_snapshot(), 0)
+        self.assertIn("Ignoring neighbor snapshot", logger.full_log)
@@ -0,0 +1,42 @@
+import socket
+import unittest
+from lldp.metrics import AgentMetrics
+from lldp.sockstats import PacketSocketMonitor, read_packet_statistics, receive_queue_bytes
+
+
+class PacketSocketMonitorTests(unittest.TestCase):
+    def setUp(self):
+        self.metrics = AgentMetrics()
+
+    def test_packet_statistics(self):
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(0x0003))
+        sock.bind(("lo", 0x0003))
+        try:
+            packets, drops = read_packet_statistics(sock)
+            self.assertGreaterEqual(packets, drops)
+            self.assertIsNotNone(receive_queue_bytes(sock))
+
+            PacketSocketMonitor().poll(sock, self.metrics)
+            self.assertGreater(self.metrics.receive_buffer.value, 0)
+        finally:
+            sock.close()
+
+    def test_grow_is_bounded(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            monitor = PacketSocketMonitor(max_rcvbuf=PacketSocketMonitor.rcvbuf(sock) + 1000)
+            grown = monitor.grow(sock)
+            self.assertLessEqual(grown, monitor.max_rcvbuf)
+            self.assertEqual(monitor.grow(sock), grown)
+        finally:
+            sock.close()
+
+    def test_unsupported_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            monitor = PacketSocketMonitor()
+            monitor.poll(sock, self.metrics)
+            self.assertFalse(monitor.supported)
+            self.assertEqual(self.metrics.kernel_packets.value, 0)
+        finally:
+            sock.close()
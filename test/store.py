@@ -0,0 +1,95 @@
+import random
+import unittest
+from ipaddress import ip_address
+from lldp import LLDPDU
+from lldp.bench import memory
+from lldp.store import NeighborStore, StringTable
+from lldp.tlv import *
+from lldp.traffic import neighbor_lldpdu
+from test.util import make_lldpdu
+
+
+class StringTableTests(unittest.TestCase):
+    def test_refcount_and_reuse(self):
+        strings = StringTable()
+        a = strings.intern("leaf-1")
+        self.assertEqual(strings.intern("leaf-1"), a)
+        self.assertEqual(strings.refcount(a), 2)
+        self.assertEqual(strings.intern(None), 0)
+        strings.release(a)
+        self.assertEqual(strings[a], "leaf-1")
+        strings.release(a)
+        self.assertEqual(len(strings), 0)
+        self.assertEqual(strings.find("leaf-1"), 0)
+        self.assertEqual(strings.intern(b"other"), a)
+
+
+class NeighborStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.store = NeighborStore()
+
+    def test_entry(self):
+        slot = self.store.update(neighbor_lldpdu(3), ifindex=7, now=10.0)
+        entry = self.store.entry(slot)
+        self.assertEqual(entry["ifindex"], 7)
+        self.assertEqual(entry["chassis_id"].value, b"\x02\x00\x00\x00\x00\x03")
+        self.assertEqual(entry["port_id"].value, "Ethernet4")
+        self.assertEqual((entry["ttl"], entry["deadline"], entry["last_seen"]), (120, 130.0, 10.0))
+        self.assertEqual(entry["system_name"], "sw-00003")
+        self.assertEqual(entry["port_description"], "Link to lab host 3")
+        caps = SystemCapabilitiesTLV.Capability
+        self.assertEqual(entry["capabilities"], (caps.BRIDGE | caps.ROUTER, caps.BRIDGE))
+        self.assertEqual(entry["management_address"], ip_address("10.0.0.3"))
+
+    def test_update_refreshes(self):
+        first = self.store.update(make_lldpdu(name="a"), now=0.0)
+        second = self.store.update(make_lldpdu(ttl=30, name="b"), now=20.0)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.deadline[first], 50.0)
+        self.assertEqual(self.store.entry(first)["system_name"], "b")
+        self.assertEqual(self.store.strings.find("a"), 0)
+        # chassis, port and system name
+        self.assertEqual(len(self.store.strings), 3)
+
+    def test_lookup(self):
+        lldpdu = make_lldpdu()
+        slot = self.store.update(lldpdu, now=0.0)
+        self.assertEqual(self.store.slot(bytes(lldpdu[0]), bytes(lldpdu[1])), slot)
+        self.assertIn((bytes(lldpdu[0]), bytes(lldpdu[1])), self.store)
+        self.assertIsNone(self.store.slot(bytes(lldpdu[0]), b"\x04\x02\x07x"))
+
+    def test_expire_and_reuse(self):
+        self.store.update(make_lldpdu(port="1", ttl=10), now=0.0)
+        slot = self.store.update(make_lldpdu(port="2", ttl=100), now=0.0)
+        expired = self.store.expire(now=10.0)
+        self.assertEqual(len(expired), 1)
+        self.assertEqual(list(self.store), [slot])
+        # the expired slot is reused, the string table only holds the remaining neighbor
+        self.assertEqual(self.store.update(make_lldpdu(port="3"), now=11.0), expired[0])
+        self.assertEqual(len(self.store.used), 2)
+        self.store.remove(slot)
+        self.store.remove(expired[0])
+        self.assertEqual(len(self.store.strings), 0)
+        self.assertRaises(KeyError, self.store.remove, slot)
+
+    def test_expiry_wheel(self):
+        rng = random.Random(1)
+        now = 0.0
+        for step in range(2000):
+            now += rng.random() * 0.5
+            lldpdu = make_lldpdu(port=str(rng.randrange(50)), ttl=rng.randrange(1, 30))
+            if step % 7 == 0 and len(self.store):
+                self.store.remove(rng.choice(list(self.store)))
+            else:
+                self.store.update(lldpdu, now=now)
+            due = sorted(slot for slot in self.store if self.store.deadline[slot] <= now)
+            self.assertEqual(sorted(self.store.expire(now=now)), due)
+            self.assertTrue(all(self.store.deadline[slot] > now for slot in self.store))
+
+    def test_incomplete(self):
+        self.assertRaises(ValueError, self.store.update, LLDPDU(ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, "x")))
+
+    def test_memory_bench(self):
+        results = memory.run(neighbors=200)
+        self.assertLess(results["memory.neighbor_store"]["value"], results["memory.neighbor_table"]["value"])
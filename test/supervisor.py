@@ -0,0 +1,207 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from lldp.interfaces import InterfaceManager, partition_of
+from lldp.metrics import AgentMetrics
+from lldp.netlink import IFF_RUNNING, IFF_UP, Link
+from lldp.neighbors import NeighborTable
+from lldp.serialize import encode_neighbors
+from lldp.supervisor import DeltaStream, Supervisor, Worker
+from lldp.traffic import neighbor_lldpdu
+from test.agent import MockLogger
+
+
+class FakeAgent:
+    def __init__(self, name):
+        self.interface_name = name
+        self.neighbors = NeighborTable()
+
+
+class FakeManager:
+    def __init__(self):
+        self.agents = {}
+
+
+class FakeProcess:
+    exitcode = 0
+
+    def join(self):
+        pass
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def steady_worker(number, count, connection):
+    # reports one neighbor per worker and runs until terminated
+    table = NeighborTable()
+    table.update(neighbor_lldpdu(number), "eth{}".format(number))
+    connection.send((encode_neighbors(table), [], [], None))
+    while True:
+        time.sleep(1)
+
+
+class DeltaStreamTests(unittest.TestCase):
+    def setUp(self):
+        self.receiver, self.sender = multiprocessing.Pipe(duplex=False)
+        self.manager = FakeManager()
+        self.stream = DeltaStream(self.manager, self.sender)
+        self.supervisor = Supervisor(steady_worker, 1, logger=MockLogger())
+
+    def tearDown(self):
+        self.receiver.close()
+        self.sender.close()
+
+    def sync(self):
+        sent = self.stream.sync()
+        if sent:
+            self.supervisor.apply(self.receiver.recv())
+        return sent
+
+    def test_deltas(self):
+        self.assertFalse(self.sync())
+        eth0 = self.manager.agents[2] = FakeAgent("eth0")
+        eth1 = self.manager.agents[3] = FakeAgent("eth1")
+        eth0.neighbors.update(neighbor_lldpdu(1), "eth0")
+        self.assertTrue(self.sync())
+        self.assertEqual(len(self.supervisor), 1)
+
+        # only changes are sent
+        self.assertFalse(self.sync())
+        eth0.neighbors.update(neighbor_lldpdu(2), "eth0")
+        eth1.neighbors.update(neighbor_lldpdu(1), "eth1")
+        self.sync()
+        self.assertEqual(sorted(n.interface for n in self.supervisor.neighbors()), ["eth0", "eth0", "eth1"])
+
+        # refreshed and removed neighbors
+        refreshed = eth0.neighbors.update(neighbor_lldpdu(1), "eth0", now=time.monotonic() + 100)
+        eth0.neighbors.remove(NeighborTable.key_of(neighbor_lldpdu(2)))
+        self.sync()
+        self.assertEqual(len(self.supervisor), 2)
+        self.assertEqual(self.supervisor.get("eth0", refreshed.key).deadline, refreshed.deadline)
+
+        # interface gone
+        del self.manager.agents[3]
+        self.sync()
+        self.assertEqual([n.interface for n in self.supervisor.neighbors()], ["eth0"])
+        self.assertIsNone(self.supervisor.get("eth1", refreshed.key))
+
+    def test_replaced_agent(self):
+        self.manager.agents[2] = FakeAgent("eth0")
+        self.manager.agents[2].neighbors.update(neighbor_lldpdu(1), "eth0")
+        self.sync()
+        # e.g. after a MAC address change
+        self.manager.agents[2] = FakeAgent("eth0")
+        self.manager.agents[2].neighbors.update(neighbor_lldpdu(5), "eth0")
+        self.sync()
+        self.assertEqual([n.key for n in self.supervisor.neighbors()], [NeighborTable.key_of(neighbor_lldpdu(5))])
+
+    def test_metrics(self):
+        metrics = AgentMetrics()
+        self.stream.registry = metrics.registry
+        metrics.frames_received.inc(5)
+        metrics.decode_latency.observe(0.00002)
+        metrics.intern_hit_ratio.set(0.5)
+        worker = self.supervisor.workers[0]
+        self.assertTrue(self.stream.sync())
+        self.supervisor.apply(self.receiver.recv(), worker)
+        # unchanged metrics are not sent again
+        self.assertFalse(self.stream.sync())
+        merged = self.supervisor.metrics
+        self.assertEqual(merged.frames_received.value, 5)
+        self.assertEqual(merged.decode_latency.count, 1)
+
+        # a second worker
+        other = AgentMetrics()
+        other.frames_received.inc(2)
+        other.intern_hit_ratio.set(1.0)
+        self.supervisor.workers.append(Worker(1))
+        self.supervisor.apply((encode_neighbors([]), [], [], other.registry.values()), self.supervisor.workers[1])
+        self.assertEqual(merged.frames_received.value, 7)
+        self.assertEqual(merged.intern_hit_ratio.value, 0.75)
+        self.assertIn("lldp_frames_received_total 7", self.supervisor.registry.render())
+
+        # counters of an exited worker are kept
+        self.supervisor.workers[0].process = FakeProcess()
+        self.supervisor._exited(worker)
+        self.assertEqual(merged.frames_received.value, 7)
+        self.assertEqual(merged.decode_latency.count, 1)
+        self.assertEqual(merged.intern_hit_ratio.value, 1.0)
+
+    def test_expire(self):
+        self.manager.agents[2] = FakeAgent("eth0")
+        self.manager.agents[2].neighbors.update(neighbor_lldpdu(1, ttl=10), "eth0", now=100.0)
+        self.manager.agents[2].neighbors.update(neighbor_lldpdu(2, ttl=20), "eth0", now=100.0)
+        self.sync()
+        self.assertEqual(self.supervisor.expire(now=115.0), 1)
+        self.assertEqual(len(self.supervisor), 1)
+        self.assertEqual(self.supervisor.registry.render().count("lldp_neighbors 1"), 1)
+
+
+class PartitionTests(unittest.TestCase):
+    def test_partitions_split_interfaces(self):
+        links = [Link(i, "swp{}".format(i), b"\x02" * 6, flags=IFF_UP | IFF_RUNNING) for i in range(1, 65)]
+        managers = [InterfaceManager(None, None, partition=(number, 4), logger=MockLogger()) for number in range(4)]
+        for link in links:
+            owners = [number for number, manager in enumerate(managers) if manager.wanted(link)]
+            self.assertEqual(owners, [partition_of(link.name, 4)])
+        self.assertEqual(len({partition_of(link.name, 4) for link in links}), 4)
+
+
+class SupervisorTests(unittest.TestCase):
+    def test_restarts_crashed_worker(self):
+        with tempfile.TemporaryDirectory() as directory:
+            flag = os.path.join(directory, "crashed")
+
+            def target(number, count, connection):
+                if number == 1 and not os.path.exists(flag):
+                    open(flag, "w").close()
+                    os._exit(1)
+                steady_worker(number, count, connection)
+
+            supervisor = Supervisor(target, 2, restart_delay=0.05, logger=MockLogger())
+            thread = threading.Thread(target=supervisor.run)
+            thread.start()
+            try:
+                self.assertTrue(wait_for(lambda: len(supervisor) == 2))
+                self.assertEqual(supervisor._restarts.value, 1)
+                self.assertEqual(sorted(n.interface for n in supervisor.neighbors()), ["eth0", "eth1"])
+                pids = [worker.process.pid for worker in supervisor.workers]
+            finally:
+                supervisor.stop()
+                thread.join()
+            self.assertTrue(all(worker.process is None for worker in supervisor.workers))
+            for pid in pids:
+                with self.assertRaises(OSError):
+                    os.kill(pid, 0)
+
+    def test_pinned_workers(self):
+        cpu = min(os.sched_getaffinity(0))
+
+        def target(number, count, connection):
+            connection.send((encode_neighbors([]), [], [tuple(os.sched_getaffinity(0))], None))
+            while True:
+                time.sleep(1)
+
+        supervisor = Supervisor(target, 1, cpus=[cpu], logger=MockLogger())
+        deltas = []
+        supervisor.apply = lambda delta, worker: deltas.append(delta)
+        thread = threading.Thread(target=supervisor.run)
+        thread.start()
+        try:
+            self.assertTrue(wait_for(lambda: deltas))
+        finally:
+            supervisor.stop()
+            thread.join()
+        self.assertEqual(deltas[0][2], [(cpu,)])
+
+    def test_invalid_worker_count(self):
+        with self.assertRaises(ValueError):
+            Supervisor(steady_worker, 0)
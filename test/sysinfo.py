@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from ipaddress import IPv6Address
+from lldp import LLDPAgent
+from lldp.sysinfo import SystemInfo
+from lldp.tlv import ManagementAddressTLV, PortDescriptionTLV, SystemCapabilitiesTLV, SystemDescriptionTLV, \
+    SystemNameTLV
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def close(self):
+        pass
+
+
+class SystemInfoTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        # an interface name that does not exist on the host, so the IPv4 ioctl fails
+        self.write("etc/hostname", "leaf-1\n")
+        self.write("etc/os-release", 'NAME="Test"\nPRETTY_NAME="Test OS 1.0"\n')
+        self.write("sys/class/net/lldptest0/ifalias", "\n")
+        self.write("sys/class/net/lldptest0/ifindex", "7\n")
+        self.write("proc/sys/net/ipv4/ip_forward", "0\n")
+        self.write("proc/net/if_inet6", "fe800000000000000000000000000001 07 40 20 80 lldptest0\n"
+                                        "20010db8000000000000000000000001 07 40 00 80 lldptest0\n")
+        self.info = SystemInfo("lldptest0", root=self.root)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, path, content):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_tlvs(self):
+        tlvs = self.info.tlvs()
+        self.assertEqual(bytes(tlvs[0]), bytes(PortDescriptionTLV("lldptest0")))
+        self.assertEqual(bytes(tlvs[1]), bytes(SystemNameTLV("leaf-1")))
+        self.assertIsInstance(tlvs[2], SystemDescriptionTLV)
+        self.assertTrue(tlvs[2].value.startswith("Test OS 1.0 "))
+        self.assertEqual(tlvs[3].value, (SystemCapabilitiesTLV.Capability.ROUTER |
+                                         SystemCapabilitiesTLV.Capability.STATION_ONLY) << 16 |
+                         SystemCapabilitiesTLV.Capability.STATION_ONLY)
+        self.assertIsInstance(tlvs[4], ManagementAddressTLV)
+        self.assertEqual(tlvs[4].value, IPv6Address("2001:db8::1"))
+        self.assertEqual(tlvs[4].ifnumber, 7)
+
+    def test_refresh_only_on_change(self):
+        tlvs = self.info.tlvs()
+        self.assertFalse(self.info.refresh())
+        self.assertIs(self.info.tlvs(), tlvs)
+
+        self.write("sys/class/net/lldptest0/ifalias", "uplink to spine-1\n")
+        self.write("proc/sys/net/ipv4/ip_forward", "1\n")
+        self.assertTrue(self.info.refresh())
+        tlvs = self.info.tlvs()
+        self.assertEqual(bytes(tlvs[0]), bytes(PortDescriptionTLV("uplink to spine-1")))
+        self.assertEqual(tlvs[3].value & 0xffff, SystemCapabilitiesTLV.Capability.ROUTER)
+
+        self.write("etc/hostname", "leaf-2-renamed\n")
+        self.assertTrue(self.info.refresh())
+        self.assertEqual(bytes(self.info.tlvs()[1]), bytes(SystemNameTLV("leaf-2-renamed")))
+
+    def test_long_values_are_truncated(self):
+        self.write("sys/class/net/lldptest0/ifalias", "ä" * 200)
+        self.assertEqual(len(bytes(self.info.tlvs()[0])), 2 + 254)
+
+    def test_agent_announces_changes(self):
+        sock = RecordingSocket()
+        agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", interface_name="lldptest0", sock=sock, sysinfo=self.info)
+        agent.set_tlvs(self.info.tlvs())
+        agent.announce()
+        agent.announce()
+        self.assertIs(sock.sent[0], sock.sent[1])
+        self.assertTrue(sock.sent[0].endswith(bytes(self.info.tlvs()[-1])))
+
+        agent.scheduler.cancel(agent._transmit_timer)
+        agent.refresh_sysinfo()
+        self.assertFalse(agent._transmit_timer.pending)
+        self.write("etc/hostname", "leaf-2-renamed\n")
+        agent.refresh_sysinfo()
+        self.assertTrue(agent._transmit_timer.pending)
+        agent.announce()
+        self.assertIn(b"leaf-2-renamed", sock.sent[-1])
@@ -0,0 +1,38 @@
+import unittest
+from collections import Counter
+from lldp import LLDPDU
+from lldp.traffic import TrafficMix, lldp_frame, synthetic_mac, NEAREST_BRIDGE
+
+
+class TrafficMixTests(unittest.TestCase):
+    def setUp(self):
+        self.mix = TrafficMix(b"\x02\xaa\xbb\xcc\xdd\xee", neighbors=20, seed=1)
+
+    def test_lldp_frame(self):
+        self.assertEqual(lldp_frame(synthetic_mac(1), b"\x00\x00"),
+                         NEAREST_BRIDGE + b"\x02\x00\x00\x00\x00\x01\x88\xcc\x00\x00")
+
+    def test_valid_frames_decode(self):
+        for frame in self.mix.valid:
+            self.assertTrue(LLDPDU.from_bytes(frame[14:]).complete())
+
+    def test_malformed_frames_fail(self):
+        for frame in self.mix.malformed:
+            with self.assertRaises((ValueError, IndexError)):
+                LLDPDU.from_bytes(frame[14:])
+
+    def test_own_frames(self):
+        for frame in self.mix.own:
+            self.assertEqual(frame[6:12], b"\x02\xaa\xbb\xcc\xdd\xee")
+
+    def test_weights(self):
+        mix = TrafficMix(b"\x02\xaa\xbb\xcc\xdd\xee", valid=1, non_lldp=1, own=0, malformed=0)
+        kinds = Counter(kind for kind, _ in mix.frames(1000))
+        self.assertEqual(set(kinds), {"valid", "non_lldp"})
+        with self.assertRaises(ValueError):
+            TrafficMix(b"\x02\xaa\xbb\xcc\xdd\xee", valid=0, non_lldp=0, own=0, malformed=0)
+
+    def test_reproducible(self):
+        a = TrafficMix(b"\x02\xaa\xbb\xcc\xdd\xee", seed=5).frames(50)
+        b = TrafficMix(b"\x02\xaa\xbb\xcc\xdd\xee", seed=5).frames(50)
+        self.assertEqual(a, b)
@@ -0,0 +1,118 @@
+import unittest
+from lldp import LLDPAgent, LLDPDU
+from lldp.neighbors import NeighborTable
+from lldp.scheduler import Scheduler
+from lldp.tlv import SystemNameTLV, TTLTLV
+from lldp.traffic import neighbor_lldpdu
+from lldp.transmit import TransmitState, ttl_for
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def close(self):
+        pass
+
+
+class TransmitStateTests(unittest.TestCase):
+    def test_ttl(self):
+        self.assertEqual(ttl_for(30.0), 121)
+        self.assertEqual(ttl_for(30000.0), 65535)
+
+    def test_fast_start(self):
+        tx = TransmitState(30.0, fast_interval=1.0, fast_count=3)
+        self.assertEqual(tx.next_interval(), 30.0)
+        tx.start_fast()
+        self.assertEqual([tx.next_interval() for _ in range(3)], [1.0, 1.0, 1.0])
+        # a running fast start is not extended
+        tx.start_fast()
+        tx.start_fast()
+        self.assertEqual([tx.next_interval() for _ in range(4)], [1.0, 1.0, 1.0, 30.0])
+
+    def test_credit(self):
+        tx = TransmitState(30.0, credit_max=2)
+        self.assertTrue(tx.take(10.0))
+        self.assertTrue(tx.take(10.0))
+        self.assertFalse(tx.take(10.0))
+        self.assertEqual(tx.wait(10.25), 0.75)
+        self.assertTrue(tx.take(11.0))
+        # refills up to credit_max only
+        self.assertTrue(tx.take(100.0))
+        self.assertTrue(tx.take(100.0))
+        self.assertFalse(tx.take(100.0))
+
+
+class AdaptiveTransmitTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.socket = RecordingSocket()
+        self.agent = LLDPAgent(b"\xAA\xBB\xCC\xDD\xEE\xFF", interface_name="eth0", interval=30.0, sock=self.socket,
+                               fast_interval=1.0, fast_count=2, tx_credit_max=3)
+        self.agent.scheduler = Scheduler(clock=self.clock)
+
+    def advance(self, seconds):
+        self.clock.now += seconds
+        self.agent.scheduler.run_due()
+
+    def test_fast_start_then_steady_state(self):
+        self.agent.fast_start()
+        self.advance(0)
+        self.assertEqual(len(self.socket.sent), 1)
+        self.advance(1.0)
+        self.advance(1.0)
+        self.assertEqual(len(self.socket.sent), 3)
+        self.assertEqual(self.agent.scheduler.next_deadline(), 132.0)
+
+    def test_local_change_announces_right_away(self):
+        self.agent.announce_now()
+        self.advance(0)
+        self.agent.set_tlvs([SystemNameTLV("leaf-1")])
+        self.advance(0)
+        self.assertEqual(len(self.socket.sent), 2)
+        self.assertTrue(self.socket.sent[-1].endswith(bytes(SystemNameTLV("leaf-1"))))
+        # setting the same TLVs again is not a change
+        self.agent.set_tlvs([SystemNameTLV("leaf-1")])
+        self.advance(0)
+        self.assertEqual(len(self.socket.sent), 2)
+
+    def test_credit_limits_bursts(self):
+        for i in range(10):
+            self.agent.set_tlvs([SystemNameTLV("name {}".format(i))])
+            self.advance(0)
+        self.assertEqual(len(self.socket.sent), 3)
+        self.assertEqual(self.agent.metrics.announces_deferred.value, 7)
+        # the pending announce goes out once a credit is available
+        self.advance(1.0)
+        self.assertEqual(len(self.socket.sent), 4)
+
+    def test_shutdown(self):
+        self.agent.shutdown()
+        lldpdu = LLDPDU.from_bytes(self.socket.sent[0][14:])
+        self.assertEqual(lldpdu[2].value, 0)
+        self.assertEqual(len(lldpdu), 3)
+
+
+class ShutdownLLDPDUTests(unittest.TestCase):
+    def test_ttl_zero(self):
+        self.assertEqual(bytes(TTLTLV(0)), b"\x06\x02\x00\x00")
+        self.assertEqual(TTLTLV.from_bytes(b"\x06\x02\x00\x00").value, 0)
+        with self.assertRaises(ValueError):
+            TTLTLV(-1)
+
+    def test_shutdown_removes_neighbor(self):
+        table = NeighborTable()
+        table.update(neighbor_lldpdu(1))
+        self.assertIsNone(table.update(neighbor_lldpdu(1, ttl=0)))
+        self.assertEqual(len(table), 0)
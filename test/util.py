@@ -0,0 +1,15 @@
+from ipaddress import ip_address
+from lldp import LLDPDU
+from lldp.tlv import *
+
+
+def make_lldpdu(chassis="switch", port="port(1)", name=None, address=None, supported=0, enabled=0, ttl=120):
+    tlvs = [ChassisIdTLV(ChassisIdTLV.Subtype.LOCAL, chassis), PortIdTLV(PortIdTLV.Subtype.LOCAL, port), TTLTLV(ttl)]
+    if name is not None:
+        tlvs.append(SystemNameTLV(name))
+    if supported:
+        tlvs.append(SystemCapabilitiesTLV(supported, enabled))
+    if address is not None:
+        tlvs.append(ManagementAddressTLV(ip_address(address)))
+    tlvs.append(EndOfLLDPDUTLV())
+    return LLDPDU(*tlvs)